@@ -0,0 +1,55 @@
+"""Times PandasModel cell access while scrolling 50 pages of a route table
+
+Run with: python benchmarks/bench_pandas_model.py [rows]
+"""
+import sys
+import timeit
+
+import pandas as pd
+from PySide6.QtCore import QModelIndex
+
+from benchmarks.bench_process_route_info import make_route_frame
+from zc_flightplan_toolkit.api import FlightAwareAPI
+from zc_flightplan_toolkit.gui_classes import PandasModel
+
+VISIBLE_ROWS = 40
+
+
+def legacy_data(dataframe: pd.DataFrame, index: QModelIndex) -> str:
+    return str(dataframe.iloc[index.row(), index.column()])
+
+
+def scroll(model: PandasModel, data, pages: int = 50) -> None:
+    for page in range(pages):
+        first_row = page * VISIBLE_ROWS
+        for row in range(first_row, first_row + VISIBLE_ROWS):
+            for column in range(model.columnCount()):
+                data(model.index(row, column))
+
+
+def main(rows: int = 100_000, repeat: int = 5) -> None:
+    route_info = FlightAwareAPI.format_route_info(
+        FlightAwareAPI()._process_route_info(make_route_frame(rows), False)
+    )
+
+    warm_model = PandasModel(route_info)
+    scroll(warm_model, warm_model.data, pages=1)
+
+    cases = {
+        "legacy": lambda: scroll(
+            warm_model, lambda index: legacy_data(route_info, index)
+        ),
+        "first_paint": lambda: scroll(
+            model := PandasModel(route_info), model.data, pages=1
+        ),
+        "warm": lambda: scroll(warm_model, warm_model.data),
+        "sort": lambda: warm_model.sort(1),
+        "filter": lambda: warm_model.set_filter("A38"),
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f"{name:>12}: {best * 1000:8.1f} ms for {rows} rows")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
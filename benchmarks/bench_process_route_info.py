@@ -0,0 +1,70 @@
+"""Times FlightAwareAPI._process_route_info on a synthetic 100k row route frame
+
+Run with: python benchmarks/bench_process_route_info.py [rows]
+"""
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+from zc_flightplan_toolkit.api import FlightAwareAPI
+
+AIRCRAFT_TYPES = ["A20N", "A21N", "A320", "A333", "B38M", "B738", "B77W", "B789"]
+
+
+def make_route_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    type_counts = rng.integers(1, 6, rows)
+    return pd.DataFrame(
+        {
+            "aircraft_types": [
+                list(rng.choice(AIRCRAFT_TYPES, count)) for count in type_counts
+            ],
+            "count": rng.integers(1, 500, rows),
+            "filed_altitude_max": rng.integers(30, 43, rows) * 10,
+            "filed_altitude_min": rng.integers(20, 35, rows) * 10,
+            "last_departure_time": pd.date_range(
+                "2024-01-01", periods=rows, freq="min"
+            ).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "route": "DOTSS2 DOTSS J501 DDDDD ROBER2",
+        }
+    )
+
+
+def legacy_process_route_info(route_info: pd.DataFrame) -> pd.DataFrame:
+    route_info["aircraft_types"] = route_info["aircraft_types"].apply(
+        lambda aircrafts: ", ".join(set(aircrafts))
+    )
+    route_info["filed_altitude_max"] = "FL" + route_info["filed_altitude_max"].astype(
+        str
+    )
+    route_info["filed_altitude_min"] = "FL" + route_info["filed_altitude_min"].astype(
+        str
+    )
+    route_info["last_departure_time"] = pd.to_datetime(
+        route_info["last_departure_time"]
+    ).dt.strftime("%Y-%m-%d %H:%M:%S")
+    return route_info
+
+
+def main(rows: int = 100_000, repeat: int = 5) -> None:
+    api = FlightAwareAPI()
+    route_frame = make_route_frame(rows)
+    typed_frame = api._process_route_info(route_frame.copy(), display_format=False)
+
+    cases = {
+        "legacy": lambda: legacy_process_route_info(route_frame.copy()),
+        "typed": lambda: api._process_route_info(
+            route_frame.copy(), display_format=False
+        ),
+        "display": lambda: api._process_route_info(route_frame.copy()),
+        "format_only": lambda: api.format_route_info(typed_frame),
+    }
+    for name, case in cases.items():
+        best = min(timeit.repeat(case, number=1, repeat=repeat))
+        print(f"{name:>12}: {best * 1000:8.1f} ms for {rows} rows")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
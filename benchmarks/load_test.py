@@ -0,0 +1,224 @@
+"""Drives the API clients against local mock upstreams and reports throughput and latency
+
+Starts zc_flightplan_toolkit.mock_server in process, points FlightAwareAPI, CheckWxAPI,
+ClowdIoDATISAPI and the track fetchers at it and runs every scenario with --concurrency
+threads. Upstream latency is lognormal around --latency-ms, --error-rate of the requests
+fail with 503 and --rate-limit turns requests beyond it into 429s. Responses are cached
+for --cache-ttl seconds, by default not at all, so every call reaches the mock upstream
+unless it coalesces with an identical one in flight.
+
+Run with: python -m benchmarks.load_test [-s SCENARIO ...] [--concurrency N] [--requests N]
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from zc_flightplan_toolkit.api import (
+    CheckWxAPI,
+    ClowdIoDATISAPI,
+    FlightAwareAPI,
+    make_response_cache,
+)
+from zc_flightplan_toolkit.metrics import (
+    cache_collector,
+    format_prometheus,
+    get_metrics,
+)
+from zc_flightplan_toolkit.mock_server import (
+    MockUpstreamServer,
+    MockUpstreamURLs,
+    Upstream,
+    UpstreamBehaviour,
+)
+from zc_flightplan_toolkit.tracks import (
+    get_north_atlantic_track_records,
+    get_pacific_track_records,
+)
+from zc_flightplan_toolkit.transport import lognormal_sampler
+
+AIRPORTS = ["WSSS", "WMKK", "VHHH", "RJAA", "YSSY", "OMDB", "EGLL", "KJFK", "KLAX"]
+
+PERCENTILES = (50, 90, 99)
+
+
+class LoadClients(NamedTuple):
+    flightaware_api: FlightAwareAPI
+    weather_api: CheckWxAPI
+    datis_api: ClowdIoDATISAPI
+    urls: MockUpstreamURLs
+
+
+class LoadResult(NamedTuple):
+    scenario: str
+    latencies: List[float]
+    errors: Counter
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        return len(self.latencies) / self.elapsed if self.elapsed else 0.0
+
+    def percentile(self, percentile: float) -> float:
+        return float(np.percentile(self.latencies, percentile)) if self.latencies else 0
+
+
+def _airport(call: int) -> str:
+    return AIRPORTS[call % len(AIRPORTS)]
+
+
+def _city_pair(call: int) -> Tuple[str, str]:
+    return _airport(call), _airport(call * 7 + 1)
+
+
+SCENARIOS: Dict[str, Callable[[LoadClients, int], object]] = {
+    "airport": lambda clients, call: clients.flightaware_api.get_airport_information(
+        _airport(call)
+    ),
+    "routes": lambda clients, call: clients.flightaware_api.get_route_info(
+        *_city_pair(call), max_pages=1
+    ),
+    "route_pages": lambda clients, call: list(
+        clients.flightaware_api.iter_route_info(*_city_pair(call), max_pages=5)
+    ),
+    "metar": lambda clients, call: clients.weather_api.get_metar(_airport(call)),
+    "metars": lambda clients, call: clients.weather_api.get_metars(AIRPORTS),
+    "taf": lambda clients, call: clients.weather_api.get_taf(_airport(call)),
+    "datis": lambda clients, call: clients.datis_api.request_datis(_airport(call)),
+    "all_datis": lambda clients, call: clients.datis_api.request_all_datis(),
+    "nat_tracks": lambda clients, _: get_north_atlantic_track_records(
+        clients.urls.nat_tracks, refresh=True
+    ),
+    "pacific_tracks": lambda clients, _: get_pacific_track_records(
+        clients.urls.pacific_tracks, refresh=True
+    ),
+}
+
+
+def make_clients(urls: MockUpstreamURLs, cache_ttl: float = 0) -> LoadClients:
+    ttl = timedelta(seconds=cache_ttl)
+    response_cache = make_response_cache(ttl, ttl)
+    get_metrics().register_collector(
+        "response_cache", cache_collector("response", response_cache)
+    )
+    return LoadClients(
+        FlightAwareAPI(
+            api_url=urls.aeroapi, api_key="load-test", response_cache=response_cache
+        ),
+        CheckWxAPI(urls.checkwx, api_key="load-test", response_cache=response_cache),
+        ClowdIoDATISAPI(urls.datis, response_cache=response_cache),
+        urls,
+    )
+
+
+def run_scenario(
+    scenario: str, clients: LoadClients, requests: int, concurrency: int
+) -> LoadResult:
+    run = SCENARIOS[scenario]
+    errors: Counter = Counter()
+
+    def timed_call(call: int) -> Optional[float]:
+        started_at = time.perf_counter()
+        try:
+            run(clients, call)
+        except Exception as error:
+            errors[type(error).__name__] += 1
+            return None
+        return time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed_call, range(requests)))
+    return LoadResult(
+        scenario,
+        [latency for latency in latencies if latency is not None],
+        errors,
+        time.perf_counter() - started_at,
+    )
+
+
+def format_results(results: List[LoadResult]) -> str:
+    percentiles = " ".join(f"{f'p{p} ms':>9}" for p in PERCENTILES)
+    lines = [
+        f"{'scenario':<16} {'ok':>6} {'req/s':>8} {percentiles} {'max ms':>9} errors"
+    ]
+    for result in results:
+        latencies = " ".join(f"{result.percentile(p) * 1000:9.1f}" for p in PERCENTILES)
+        longest = max(result.latencies, default=0.0) * 1000
+        errors = ", ".join(f"{name} {count}" for name, count in result.errors.items())
+        lines.append(
+            f"{result.scenario:<16} {len(result.latencies):>6} "
+            f"{result.throughput:8.1f} {latencies} {longest:9.1f} {errors or '-'}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Load test the API clients against local mock upstreams"
+    )
+    parser.add_argument(
+        "-s",
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="scenario to run, repeatable, default all",
+    )
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="per scenario")
+    parser.add_argument("--latency-ms", type=float, default=50, help="median")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, help="requests per second")
+    parser.add_argument("--cache-ttl", type=float, default=0, help="seconds")
+    parser.add_argument("--route-pages", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="write the client metrics in the Prometheus text format to PATH",
+    )
+    parser.add_argument("--log-level", default="error")
+    args = parser.parse_args(argv)
+
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    behaviour = UpstreamBehaviour(
+        latency=lognormal_sampler(
+            args.latency_ms / 1000, args.latency_sigma, args.seed
+        ),
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+    )
+    with MockUpstreamServer(
+        behaviours={upstream: behaviour for upstream in Upstream},
+        route_pages=args.route_pages,
+        seed=args.seed,
+    ) as server:
+        clients = make_clients(server.urls, args.cache_ttl)
+        results = [
+            run_scenario(scenario, clients, args.requests, args.concurrency)
+            for scenario in args.scenarios or SCENARIOS
+        ]
+        responses = {
+            upstream.value: dict(statuses)
+            for upstream, statuses in server.responses.items()
+        }
+    print(format_results(results))
+    print(f"upstream responses by status: {responses}")
+    if args.metrics_file:
+        with open(args.metrics_file, "w", encoding="utf-8") as metrics_file:
+            metrics_file.write(format_prometheus())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""Runs every benchmark offline against benchmarks/fixtures and checks for regressions
+
+Each case is timed best of --repeat and compared with benchmarks/baselines.json, a case
+slower than its baseline by more than its threshold fails the run (exit code 1).
+Baselines are machine specific, record them on the machine that checks them.
+
+Run with: python -m benchmarks.run_benchmarks [--update-baseline] [-k NAME] [--repeat N]
+"""
+import argparse
+import json
+import platform
+import sys
+import tempfile
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+from requests import Response
+
+from benchmarks.bench_pandas_model import scroll
+from benchmarks.bench_process_route_info import make_route_frame
+from zc_flightplan_toolkit.api import CheckWxAPI, ClowdIoDATISAPI, FlightAwareAPI
+from zc_flightplan_toolkit.gui_classes import PandasModel
+from zc_flightplan_toolkit.runways import DMAirportRunwayInfo, DMColumns
+from zc_flightplan_toolkit.tracks import (
+    parse_north_atlantic_tracks,
+    parse_pacific_tracks,
+)
+from zc_flightplan_toolkit.watch import summarize_datis
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+BASELINES = Path(__file__).parent / "baselines.json"
+
+DEFAULT_THRESHOLD = 1.5
+
+RUNWAY_ROWS = 47_000
+
+ROUTE_ROWS = 10_000
+
+NAT_REFERENCE_TIME = datetime(2024, 1, 14, 12, tzinfo=timezone.utc)
+
+
+class BenchmarkCase(NamedTuple):
+    name: str
+    run: Callable[[], object]
+    number: int = 1
+    threshold: float = DEFAULT_THRESHOLD
+
+
+class BenchmarkResult(NamedTuple):
+    name: str
+    seconds: float
+    baseline: Optional[float]
+    threshold: float
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.seconds / self.baseline if self.baseline else None
+
+    @property
+    def regressed(self) -> bool:
+        return self.ratio is not None and self.ratio > self.threshold
+
+
+def make_runways_csv(path: Path, rows: int = RUNWAY_ROWS, seed: int = 0) -> Path:
+    """The fixture airports padded with synthetic ones to the size of runways.csv
+
+    Fixture airports come last so lookups scan the whole table, as they would for
+    most airports of the real file.
+    """
+    fixture = pd.read_csv(FIXTURES / "runways.csv")
+    padding_rows = max(rows - len(fixture), 0)
+    rng = np.random.default_rng(seed)
+    padding = fixture.sample(padding_rows, replace=True, random_state=seed)
+    padding[DMColumns.ICAO.value] = [
+        f"X{airport:05d}"
+        for airport in rng.integers(0, padding_rows // 2, padding_rows)
+    ]
+    pd.concat([padding, fixture], ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def make_fixture_response(fixture_name: str) -> Response:
+    response = Response()
+    response.status_code = 200
+    response._content = (FIXTURES / fixture_name).read_bytes()
+    return response
+
+
+def build_cases(workdir: Path) -> List[BenchmarkCase]:
+    runways_csv = make_runways_csv(workdir / "runways.csv")
+    runway_info = DMAirportRunwayInfo(str(runways_csv))
+    runway_info.data  # load once, lookups are timed separately from loading
+
+    weather_api = CheckWxAPI(api_key="offline")
+    metar_response = make_fixture_response("checkwx_metar_wsss.json")
+    setattr(weather_api, "_make_api_call", lambda *args, **kwargs: metar_response)
+
+    datis_api = ClowdIoDATISAPI()
+    datis_text = (FIXTURES / "datis_kjfk.json").read_text()
+    all_datis = pd.DataFrame(json.loads((FIXTURES / "datis_all.json").read_text()))
+    nat_html = (FIXTURES / "nat_tracks.html").read_text()
+    pacific_html = (FIXTURES / "pacific_tracks.html").read_text()
+
+    flightaware_api = FlightAwareAPI(api_key="offline", runway_info_source=runway_info)
+    route_frame = make_route_frame(ROUTE_ROWS)
+    route_info = FlightAwareAPI.format_route_info(
+        flightaware_api._process_route_info(route_frame.copy(), False)
+    )
+    route_model = PandasModel(route_info)
+
+    return [
+        BenchmarkCase(
+            "runways_load_csv",
+            lambda: DMAirportRunwayInfo(str(runways_csv)).data,
+            threshold=2.0,
+        ),
+        BenchmarkCase(
+            "runways_airport_lookup",
+            lambda: runway_info.get_airport_runways("WSSS"),
+            number=10,
+        ),
+        BenchmarkCase(
+            "runways_runway_info",
+            lambda: runway_info.get_runway_info("KJFK", "22L"),
+            number=20,
+        ),
+        BenchmarkCase(
+            "process_route_info_typed",
+            lambda: flightaware_api._process_route_info(
+                route_frame.copy(), display_format=False
+            ),
+        ),
+        BenchmarkCase(
+            "process_route_info_display",
+            lambda: flightaware_api._process_route_info(route_frame.copy()),
+        ),
+        BenchmarkCase(
+            "decoded_metar",
+            lambda: weather_api._get_decoded_metar("WSSS"),
+            number=50,
+        ),
+        BenchmarkCase(
+            "datis_process", lambda: datis_api._process_datis(datis_text), number=200
+        ),
+        BenchmarkCase("datis_summarize", lambda: summarize_datis(all_datis), number=20),
+        BenchmarkCase(
+            "nat_tracks_parse",
+            lambda: parse_north_atlantic_tracks(nat_html, NAT_REFERENCE_TIME),
+            number=100,
+        ),
+        BenchmarkCase(
+            "pacific_tracks_parse",
+            lambda: parse_pacific_tracks(pacific_html),
+            number=100,
+        ),
+        BenchmarkCase(
+            "pandas_model_data", lambda: scroll(route_model, route_model.data, pages=5)
+        ),
+    ]
+
+
+def run_cases(
+    cases: List[BenchmarkCase], baselines: Dict[str, float], repeat: int
+) -> List[BenchmarkResult]:
+    results = []
+    for case in cases:
+        case.run()  # warm up caches and lazy imports
+        best = min(timeit.repeat(case.run, number=case.number, repeat=repeat))
+        results.append(
+            BenchmarkResult(
+                case.name, best / case.number, baselines.get(case.name), case.threshold
+            )
+        )
+    return results
+
+
+def format_results(results: List[BenchmarkResult]) -> str:
+    lines = [f"{'case':<28} {'ms':>10} {'baseline':>10} {'ratio':>7}"]
+    for result in results:
+        baseline = (
+            f"{result.baseline * 1000:10.3f}" if result.baseline else f"{'-':>10}"
+        )
+        ratio = f"{result.ratio:7.2f}" if result.ratio is not None else f"{'-':>7}"
+        flag = "  REGRESSED" if result.regressed else ""
+        lines.append(
+            f"{result.name:<28} {result.seconds * 1000:10.3f} {baseline} {ratio}{flag}"
+        )
+    return "\n".join(lines)
+
+
+def load_baselines(path: Path = BASELINES) -> Dict[str, float]:
+    if not path.exists():
+        return {}
+    return json.loads(path.read_text())["seconds"]
+
+
+def save_baselines(results: List[BenchmarkResult], path: Path = BASELINES) -> None:
+    baselines = {**load_baselines(path), **{r.name: r.seconds for r in results}}
+    path.write_text(
+        json.dumps(
+            {
+                "machine": platform.platform(),
+                "python": platform.python_version(),
+                "pandas": pd.__version__,
+                "seconds": dict(sorted(baselines.items())),
+            },
+            indent=2,
+        )
+        + "\n"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Offline benchmarks compared with stored baselines"
+    )
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("-k", dest="pattern", help="only cases containing this text")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = [
+            case
+            for case in build_cases(Path(workdir))
+            if args.pattern is None or args.pattern in case.name
+        ]
+        results = run_cases(cases, load_baselines(), args.repeat)
+    print(format_results(results))
+
+    if args.update_baseline:
+        save_baselines(results)
+        print(f"baselines written to {BASELINES}")
+        return 0
+    return 1 if any(result.regressed for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,36 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 import sys
 
-from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtGui import QPixmap
+from PySide6.QtWidgets import QApplication, QSplashScreen
 
-from zc_flightplan_toolkit.gui_window import FlightPlanToolkit
+from zc_flightplan_toolkit.startup import StartupTimer
 
 if __name__ == "__main__":
+    startup = StartupTimer(STARTED_AT)
+    startup.mark("qt import")
+
     app = QApplication(sys.argv)
+    splash_pixmap = QPixmap(360, 120)
+    splash_pixmap.fill(Qt.GlobalColor.white)
+    splash = QSplashScreen(splash_pixmap)
+    splash.showMessage("Loading flight planning tool...", Qt.AlignmentFlag.AlignCenter)
+    splash.show()
+    app.processEvents()
+    startup.mark("splash")
+
+    # pandas and the api clients are only imported once something is on screen
+    from zc_flightplan_toolkit.gui_window import FlightPlanToolkit
+
+    startup.mark("toolkit import")
+
     router = FlightPlanToolkit()
+    startup.mark("window setup")
     router.show()
+    splash.finish(router)
+    QTimer.singleShot(0, lambda: (startup.mark("first paint"), startup.report()))
     sys.exit(app.exec())
@@ -7,7 +7,7 @@ setup(
     version="0.0.1",
     packages=find_packages(include=PACKAGE),
     install_requires=[
-        "pandas",
+        "pandas>=2.0",
         "numpy",
         "python-dotenv",
         "requests",
@@ -15,6 +15,12 @@ setup(
         "loguru",
         "frozendict",
     ],
+    entry_points={
+        "console_scripts": [
+            "zc-flightplan=zc_flightplan_toolkit.cli:main",
+            "zc-flightplan-service=zc_flightplan_toolkit.service:main",
+        ],
+    },
     extras_require={
         "dev": [
             "black",
@@ -31,6 +37,7 @@ setup(
             "pyinstaller",
             "pytest-qt; platform_system=='Windows'",
             "pandas-stubs",
-        ]
+        ],
+        "parquet": ["pyarrow"],
     },
 )
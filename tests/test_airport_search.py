@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.airport_search import AirportSearchIndex
+
+
+@pytest.fixture
+def search_index() -> AirportSearchIndex:
+    airports = pd.DataFrame(
+        {
+            "code_icao": ["WSSS", "KLAX", "EGLL", "EGLC", "WSSL"],
+            "code_iata": ["SIN", "LAX", "LHR", "LCY", "XSP"],
+            "code_lid": [None, "LAX", None, None, None],
+            "name": [
+                "Singapore Changi Airport",
+                "Los Angeles International Airport",
+                "London Heathrow Airport",
+                "London City Airport",
+                "Seletar Airport",
+            ],
+            "city": ["Singapore", "Los Angeles", "London", "London", "Singapore"],
+        }
+    )
+    return AirportSearchIndex(airports)
+
+
+@pytest.mark.parametrize(
+    "query, icao",
+    [
+        ("WSSS", "WSSS"),
+        ("sin", "WSSS"),
+        ("lax", "KLAX"),
+        ("EGL", "EGLL"),
+        ("changi", "WSSS"),
+        ("heathrow", "EGLL"),
+        ("Heathro", "EGLL"),
+        ("Los Angles Intl", "KLAX"),
+        ("Séletar", "WSSL"),
+    ],
+)
+def test_search_best_match(search_index: AirportSearchIndex, query: str, icao: str):
+    assert search_index.search(query)[0].code_icao == icao
+
+
+def test_search_ranks_full_code_match_above_prefix(search_index: AirportSearchIndex):
+    matches = search_index.search("WSS")
+    assert [match.code_icao for match in matches[:2]] == ["WSSS", "WSSL"]
+    assert search_index.search("WSSL")[0].code_icao == "WSSL"
+
+
+def test_search_limit(search_index: AirportSearchIndex):
+    assert len(search_index.search("london", limit=1)) == 1
+    assert {match.code_icao for match in search_index.search("london")} >= {
+        "EGLL",
+        "EGLC",
+    }
+
+
+@pytest.mark.parametrize("query", ["", "  ", "!!", "airport", "zzzzzz"])
+def test_search_no_match(search_index: AirportSearchIndex, query: str):
+    assert search_index.search(query) == []
+
+
+def test_reconcile(search_index: AirportSearchIndex):
+    reconciled = search_index.reconcile(["london heathrow", "LAX", "qqqq"])
+    assert reconciled["code_icao"].tolist() == ["EGLL", "KLAX", ""]
+    assert reconciled["query"].tolist() == ["london heathrow", "LAX", "qqqq"]
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.airports import DMAirportInfo
+
+AIRPORTS_CSV = """id,ident,type,name,latitude_deg,longitude_deg,elevation_ft,continent,iso_country,iso_region,municipality,scheduled_service,gps_code,icao_code,iata_code,local_code,home_link,wikipedia_link,keywords
+1,WSSS,large_airport,Singapore Changi Airport,1.35019,103.994003,22,AS,SG,SG-04,Singapore,yes,WSSS,WSSS,SIN,,,https://en.wikipedia.org/wiki/Singapore_Changi_Airport,
+2,KLAX,large_airport,Los Angeles International Airport,33.942501,-118.407997,125,NA,US,US-CA,Los Angeles,yes,KLAX,KLAX,LAX,LAX,,https://en.wikipedia.org/wiki/Los_Angeles_International_Airport,
+3,FYWH,medium_airport,Hosea Kutako International Airport,-22.4799,17.4709,5640,AF,NA,NA-KH,Windhoek,yes,FYWH,FYWH,WDH,,,,
+4,XLAX,closed,Old Lax Field,33.9,-118.4,100,NA,US,US-CA,Los Angeles,no,,,LAX,,,,
+"""
+
+
+@pytest.fixture
+def airport_info(tmp_path: Path) -> DMAirportInfo:
+    airports_csv = tmp_path / "airports.csv"
+    airports_csv.write_text(AIRPORTS_CSV)
+    return DMAirportInfo(str(airports_csv))
+
+
+@pytest.mark.parametrize(
+    "airport_id, icao",
+    [("WSSS", "WSSS"), ("sin", "WSSS"), ("LAX", "KLAX"), ("klax", "KLAX")],
+)
+def test_get_airport_record(airport_info: DMAirportInfo, airport_id: str, icao: str):
+    record = airport_info.get_airport_record(airport_id)
+    assert record is not None
+    assert record["code_icao"] == icao
+
+
+def test_get_airport_record_schema(airport_info: DMAirportInfo):
+    record = airport_info.get_airport_record("KLAX")
+    assert record is not None
+    assert record["city"] == "Los Angeles"
+    assert record["state"] == "CA"
+    assert record["elevation"] == 125
+    assert record["airport_flights_url"] == "/airports/KLAX/flights"
+
+
+def test_country_code_na_is_not_missing(airport_info: DMAirportInfo):
+    record = airport_info.get_airport_record("WDH")
+    assert record is not None
+    assert record["country_code"] == "NA"
+
+
+def test_unknown_airport(airport_info: DMAirportInfo):
+    assert airport_info.get_airport_record("ZZZZ") is None
+    assert isinstance(airport_info.get_airport_information("ZZZZ"), pd.DataFrame)
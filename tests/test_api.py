@@ -1,12 +1,23 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
 import pandas as pd
 import pytest
+from pytest_mock import MockerFixture
 
+from zc_flightplan_toolkit.airports import DM_PROVIDED_COLUMNS
 from zc_flightplan_toolkit.api import (
+    BaseAPI,
     CheckWxAPI,
     ClowdIoDATISAPI,
     FlightAwareAPI,
     FlightInfoAPI,
+    make_response_cache,
 )
+from zc_flightplan_toolkit.constants import FlightAwareAirportColumns
 
 
 @pytest.fixture
@@ -31,6 +42,47 @@ def test_get_airport_info(
     assert airport_info["country_code"].iloc[0] == country_code
 
 
+def test_get_airport_info_from_local_source(mocker: MockerFixture):
+    local_source = mocker.Mock(provided_columns=DM_PROVIDED_COLUMNS)
+    local_source.get_airport_record.return_value = {
+        "code_icao": "WSSS",
+        "name": "Singapore Changi Airport",
+    }
+    api = FlightAwareAPI(airport_info_source=local_source)
+    api_call_mock = mocker.patch.object(api, "_make_api_call")
+    api_call_mock.return_value.text = '{"timezone": "Asia/Singapore"}'
+
+    airport_info = api.get_airport_information("WSSS")
+    assert airport_info["name"].iloc[0] == "Singapore Changi Airport"
+    assert api.current_airport_icao == "WSSS"
+    api_call_mock.assert_not_called()
+
+    airport_info = api.get_airport_information(
+        "WSSS", columns=[FlightAwareAirportColumns.TIMEZONE]
+    )
+    assert airport_info["timezone"].iloc[0] == "Asia/Singapore"
+    api_call_mock.assert_called_once()
+
+
+def test_airport_getters_prefer_the_icao_passed_in(mocker: MockerFixture):
+    local_source = mocker.Mock(provided_columns=DM_PROVIDED_COLUMNS)
+    local_source.get_airport_record.return_value = {"code_icao": "KLAX"}
+    datis_api = mocker.Mock()
+    api = FlightAwareAPI(airport_info_source=local_source, datis_api=datis_api)
+    api.current_airport_icao = "WSSS"
+
+    airport_info = api.lookup_airport_information("KLAX")
+    api.get_datis("KLAX")
+    api.get_datis()
+
+    assert airport_info["code_icao"].iloc[0] == "KLAX"
+    assert api.current_airport_icao == "WSSS"
+    assert [call.args for call in datis_api.request_datis.call_args_list] == [
+        ("KLAX",),
+        ("WSSS",),
+    ]
+
+
 def test_get_route_info(flightaware_api: FlightInfoAPI):
     api = flightaware_api
     route_info = api.get_route_info("KLAX", "KJFK")
@@ -38,6 +90,68 @@ def test_get_route_info(flightaware_api: FlightInfoAPI):
     assert "route" in route_info.columns
 
 
+@pytest.fixture
+def raw_route_info() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "aircraft_types": [["B738", "A320", "B738"], [], ["A320", "B738"]],
+            "filed_altitude_max": [350, 370, 390],
+            "filed_altitude_min": [310, None, 330],
+            "last_departure_time": [
+                "2024-01-01T00:00:00Z",
+                "2024-01-02T10:00:05Z",
+                "2024-01-03T12:30:00Z",
+            ],
+            "route": ["DOTSS2 DOTSS", "J501", "ROBER2"],
+        }
+    )
+
+
+def test_process_route_info_keeps_types(raw_route_info: pd.DataFrame):
+    route_info = FlightAwareAPI()._process_route_info(
+        raw_route_info, display_format=False
+    )
+    assert route_info["aircraft_types"].tolist() == ["A320, B738", "", "A320, B738"]
+    assert route_info["filed_altitude_max"].dtype == "Int64"
+    assert pd.api.types.is_datetime64_any_dtype(route_info["last_departure_time"])
+
+
+def test_process_route_info_display_format(raw_route_info: pd.DataFrame):
+    route_info = FlightAwareAPI()._process_route_info(raw_route_info)
+    assert route_info["filed_altitude_max"].tolist() == ["FL350", "FL370", "FL390"]
+    assert route_info["last_departure_time"].iloc[1] == "2024-01-02 10:00:05"
+
+
+def test_get_route_info_with_distances(mocker: MockerFixture):
+    responses = {
+        "airports/KLAX/routes/KJFK": {
+            "routes": [
+                {
+                    "aircraft_types": ["B738"],
+                    "filed_altitude_max": 350,
+                    "filed_altitude_min": 310,
+                    "last_departure_time": "2024-01-01T00:00:00Z",
+                    "route": "DOTSS2 DOTSS",
+                }
+            ]
+        },
+        "airports/KLAX": {"latitude": 33.94, "longitude": -118.41},
+        "airports/KJFK": {"latitude": 40.64, "longitude": -73.78},
+    }
+    api = FlightAwareAPI()
+    mocker.patch.object(
+        api,
+        "_make_api_call",
+        side_effect=lambda endpoint, *args, **kwargs: mocker.Mock(
+            text=json.dumps(responses[endpoint])
+        ),
+    )
+    route_info = api.get_route_info("KLAX", "KJFK", with_distances=True)
+    assert route_info["great_circle_distance_nm"].iloc[0] == pytest.approx(
+        2145.5, abs=1
+    )
+
+
 @pytest.mark.parametrize(
     "airport_icao",
     [
@@ -75,3 +189,186 @@ def test_weather_api_decoded_metar(icao):
     api = CheckWxAPI()
     metar = api.get_metar(icao, decoded=True)
     assert isinstance(metar, pd.DataFrame)
+
+
+def test_iter_route_info_follows_cursor(
+    mocker: MockerFixture, raw_route_info: pd.DataFrame
+):
+    routes = raw_route_info.to_dict(orient="records")
+    pages = [
+        {
+            "routes": routes[:2],
+            "links": {"next": "/airports/WSSS/routes/WMKK?cursor=abc"},
+        },
+        {"routes": routes[2:], "links": None},
+    ]
+    api = FlightAwareAPI()
+    api_call_mock = mocker.patch.object(api, "_make_api_call")
+    api_call_mock.side_effect = [mocker.Mock(text=json.dumps(page)) for page in pages]
+
+    route_pages = api.iter_route_info("WSSS", "WMKK")
+    assert len(next(route_pages)) == 2
+    api_call_mock.assert_called_once()
+
+    assert next(route_pages)["route"].tolist() == ["ROBER2"]
+    assert api_call_mock.call_args.args == (
+        "airports/WSSS/routes/WMKK",
+        {"cursor": "abc"},
+    )
+    assert next(route_pages, None) is None
+
+
+def test_concurrent_api_calls_are_coalesced(mocker: MockerFixture):
+    release = threading.Event()
+
+    def slow_get(*args, **kwargs):
+        release.wait(timeout=5)
+        return mocker.Mock(status_code=200, text="{}")
+
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request", side_effect=slow_get
+    )
+    api = FlightAwareAPI(api_key="test")
+    stats_before = BaseAPI.get_coalescing_stats()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [
+            executor.submit(api._make_api_call, "airports/WSSS", cache=False)
+            for _ in range(4)
+        ]
+        while BaseAPI.get_coalescing_stats().coalesced < stats_before.coalesced + 3:
+            time.sleep(0.01)
+        release.set()
+        responses = {id(future.result(timeout=5)) for future in futures}
+
+    assert len(responses) == 1
+    get_mock.assert_called_once()
+
+
+def test_metar_served_from_response_cache(mocker: MockerFixture):
+    metar = {"data": [{"raw_text": "WSSS 190000Z 01005KT 9999 FEW018 28/24 Q1010"}]}
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=mocker.Mock(status_code=200, ok=True, text=json.dumps(metar)),
+    )
+    weather_api = CheckWxAPI(
+        api_key="test",
+        response_cache=make_response_cache(timedelta(minutes=5), timedelta(minutes=30)),
+    )
+
+    assert weather_api.get_metar("WSSS") == metar["data"][0]["raw_text"]
+    assert weather_api.get_metar("WSSS") == metar["data"][0]["raw_text"]
+    get_mock.assert_called_once()
+
+
+def test_shared_response_cache_is_keyed_by_api_key(mocker: MockerFixture):
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=mocker.Mock(status_code=200, ok=True, text="{}"),
+    )
+    response_cache = make_response_cache(timedelta(minutes=5), timedelta(minutes=30))
+    apis = [
+        CheckWxAPI(api_key=api_key, response_cache=response_cache)
+        for api_key in ["key a", "key b", "key a"]
+    ]
+
+    for api in apis:
+        api._make_api_call("metar/WSSS")
+
+    assert [call.kwargs["headers"] for call in get_mock.call_args_list] == [
+        {"X-API-Key": "key a"},
+        {"X-API-Key": "key b"},
+    ]
+
+
+def test_get_metars_batches_stations(mocker: MockerFixture):
+    weather_api = CheckWxAPI(api_key="test")
+    api_call_mock = mocker.patch.object(
+        weather_api,
+        "_make_api_call",
+        return_value=mocker.Mock(
+            text=json.dumps({"data": [{"icao": "WSSS", "raw_text": "WSSS 190000Z"}]})
+        ),
+    )
+
+    stations = [f"K{index:03d}" for index in range(25)] + ["wsss"]
+    metars = weather_api.get_metars(stations)
+
+    assert metars == {"WSSS": "WSSS 190000Z"}
+    assert api_call_mock.call_count == 2
+    first_endpoint = api_call_mock.call_args_list[0].args[0]
+    assert first_endpoint.startswith("metar/K000,K001,")
+    assert first_endpoint.count(",") == 19
+
+
+@pytest.mark.parametrize(
+    "data, expected_taf",
+    [
+        ([{"raw_text": "TAF WSSS 190500Z 1906/2012 VRB05KT 9999 FEW018"}], "TAF WSSS"),
+        ([], "no taf found"),
+    ],
+)
+def test_get_taf(data: list, expected_taf: str, mocker: MockerFixture):
+    weather_api = CheckWxAPI(api_key="test")
+    api_call_mock = mocker.patch.object(
+        weather_api,
+        "_make_api_call",
+        return_value=mocker.Mock(text=json.dumps({"data": data})),
+    )
+
+    assert weather_api.get_taf("WSSS").startswith(expected_taf)
+    assert api_call_mock.call_args.args[0] == "taf/WSSS/decoded"
+
+
+def test_request_all_datis(mocker: MockerFixture):
+    all_datis = [
+        {"airport": "KJFK", "type": "arr", "code": "A", "datis": "JFK ATIS INFO A"},
+        {"airport": "KJFK", "type": "dep", "code": "B", "datis": "JFK ATIS INFO B"},
+    ]
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=mocker.Mock(text=json.dumps(all_datis)),
+    )
+
+    datis = ClowdIoDATISAPI(api_endpoint="http://datis.test/api/").request_all_datis()
+
+    get_mock.assert_called_once_with(
+        "GET",
+        "http://datis.test/api/all",
+        params=None,
+        data=None,
+        headers=None,
+        timeout=5,
+    )
+    assert datis["code"].tolist() == ["A", "B"]
+
+
+def test_update_credentials_swaps_key_in_place(mocker: MockerFixture):
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=mocker.Mock(status_code=401, ok=False, text="{}"),
+    )
+    weather_api = CheckWxAPI(api_key="old weather key")
+    api = FlightAwareAPI(api_key="old key", weather_api=weather_api)
+    runway_info_source = api._runway_info_source
+
+    api._make_api_call("airports/WSSS")
+    api._make_api_call("airports/WSSS")
+    api.update_credentials(api_key="new key", weather_api_key="new weather key")
+    api._make_api_call("airports/WSSS")
+
+    assert [call.kwargs["headers"] for call in get_mock.call_args_list] == [
+        {"x-apikey": "old key"},
+        {"x-apikey": "new key"},
+    ]
+    assert weather_api._credentials.request_header == {"X-API-Key": "new weather key"}
+    assert api._runway_info_source is runway_info_source
+
+
+def test_update_credentials_keeps_unchanged_key():
+    api = FlightAwareAPI(api_key="key")
+    credentials = api._credentials
+
+    api.update_credentials(api_key="key")
+
+    assert api._credentials is credentials
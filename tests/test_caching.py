@@ -0,0 +1,277 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import List
+
+import pytest
+
+from zc_flightplan_toolkit.caching import (
+    CacheStats,
+    PrefetchScheduler,
+    SingleFlight,
+    SingleFlightStats,
+    StaleWhileRevalidateCache,
+)
+
+
+def test_single_flight_coalesces_concurrent_calls():
+    single_flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+    callers = 5
+    calls = []
+
+    def slow_call() -> int:
+        calls.append(1)
+        release.wait(timeout=5)
+        return 42
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        futures = [
+            executor.submit(single_flight.call, "KLAX", slow_call)
+            for _ in range(callers)
+        ]
+        while single_flight.stats.coalesced < callers - 1:
+            time.sleep(0.01)
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+
+    assert results == [42] * callers
+    assert len(calls) == 1
+    assert single_flight.stats == SingleFlightStats(calls=1, coalesced=callers - 1)
+
+
+def test_single_flight_does_not_cache_completed_calls():
+    single_flight: SingleFlight[int] = SingleFlight()
+    results = iter([1, 2])
+
+    assert single_flight.call("WSSS", lambda: next(results)) == 1
+    assert single_flight.call("WSSS", lambda: next(results)) == 2
+    assert single_flight.stats == SingleFlightStats(calls=2, coalesced=0)
+
+
+def test_single_flight_shares_errors():
+    single_flight: SingleFlight[int] = SingleFlight()
+    release = threading.Event()
+
+    def failing_call() -> int:
+        release.wait(timeout=5)
+        raise ConnectionError("no route to host")
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+            executor.submit(single_flight.call, "EGLL", failing_call) for _ in range(2)
+        ]
+        while single_flight.stats.coalesced < 1:
+            time.sleep(0.01)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError):
+                future.result(timeout=5)
+
+    assert single_flight.call("EGLL", lambda: 3) == 3
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def metar_cache(clock: FakeClock) -> StaleWhileRevalidateCache[str]:
+    return StaleWhileRevalidateCache(
+        soft_ttl=timedelta(minutes=1), hard_ttl=timedelta(minutes=10), clock=clock
+    )
+
+
+def wait_for_refreshes(cache: StaleWhileRevalidateCache, attempts: int) -> None:
+    while cache.stats.refreshes + cache.stats.refresh_errors < attempts:
+        time.sleep(0.01)
+
+
+def test_swr_serves_fresh_entries_from_cache(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    fetched: List[str] = []
+
+    def fetch() -> str:
+        fetched.append("WSSS")
+        return f"METAR {len(fetched)}"
+
+    assert metar_cache.get("WSSS", fetch) == "METAR 1"
+    clock.now = 59
+    assert metar_cache.get("WSSS", fetch) == "METAR 1"
+    assert len(fetched) == 1
+    assert metar_cache.stats == CacheStats(
+        hits=1, stale_hits=0, misses=1, refreshes=0, refresh_errors=0, evictions=0
+    )
+
+
+def test_swr_serves_stale_entry_while_refreshing(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    release = threading.Event()
+    versions = iter(["METAR old", "METAR new"])
+
+    def fetch() -> str:
+        version = next(versions)
+        if version == "METAR new":
+            release.wait(timeout=5)
+        return version
+
+    metar_cache.get("WSSS", fetch)
+    clock.now = 120
+    assert metar_cache.get("WSSS", fetch) == "METAR old"
+    assert metar_cache.get("WSSS", fetch) == "METAR old"
+    release.set()
+    wait_for_refreshes(metar_cache, 1)
+
+    assert metar_cache.get("WSSS", fetch) == "METAR new"
+    assert metar_cache.stats.stale_hits == 2
+    assert metar_cache.stats.refreshes == 1
+
+
+def test_swr_blocks_after_hard_ttl(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    versions = iter(["METAR old", "METAR new"])
+    metar_cache.get("WSSS", lambda: next(versions))
+    clock.now = 600
+    assert metar_cache.get("WSSS", lambda: next(versions)) == "METAR new"
+    assert metar_cache.stats.misses == 2
+
+
+def test_swr_keeps_stale_entry_when_refresh_fails(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    metar_cache.get("WSSS", lambda: "METAR old")
+    clock.now = 120
+
+    def failing_fetch() -> str:
+        raise ConnectionError("no route to host")
+
+    assert metar_cache.get("WSSS", failing_fetch) == "METAR old"
+    wait_for_refreshes(metar_cache, 1)
+    assert metar_cache.stats.refresh_errors == 1
+    assert metar_cache.get("WSSS", failing_fetch) == "METAR old"
+
+
+def test_swr_does_not_store_uncacheable_values(clock: FakeClock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(
+        timedelta(minutes=1),
+        timedelta(minutes=10),
+        is_cacheable=lambda value: value != "error",
+        clock=clock,
+    )
+    assert cache.get("WSSS", lambda: "error") == "error"
+    assert len(cache) == 0
+    assert cache.get("WSSS", lambda: "METAR") == "METAR"
+    assert len(cache) == 1
+
+
+def test_swr_evicts_entries_past_hard_ttl(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    metar_cache.get("WSSS", lambda: "METAR WSSS")
+    metar_cache.get("KLAX", lambda: "METAR KLAX")
+    clock.now = 300
+    metar_cache.get("EGLL", lambda: "METAR EGLL")
+    clock.now = 600
+
+    assert metar_cache.evict_expired() == 2
+    assert len(metar_cache) == 1
+    assert metar_cache.get_expiring_keys(timedelta(minutes=10)) == [("EGLL", 1.0)]
+    assert metar_cache.stats.evictions == 2
+
+
+def test_swr_evicts_least_recently_used_entries(clock: FakeClock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(
+        timedelta(minutes=1), timedelta(minutes=10), clock=clock, max_entries=2
+    )
+    cache.get("WSSS", lambda: "METAR WSSS")
+    cache.get("KLAX", lambda: "METAR KLAX")
+    cache.get("WSSS", lambda: "METAR WSSS")
+    cache.get("EGLL", lambda: "METAR EGLL")
+
+    assert len(cache) == 2
+    assert cache.get("WSSS", lambda: "METAR WSSS new") == "METAR WSSS"
+    assert cache.get("KLAX", lambda: "METAR KLAX new") == "METAR KLAX new"
+    assert cache.stats.evictions == 2
+
+
+def test_swr_access_counts_stay_bounded_without_prefetch(clock: FakeClock):
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(
+        timedelta(minutes=1),
+        timedelta(minutes=10),
+        is_cacheable=lambda value: value != "error",
+        clock=clock,
+        max_entries=10,
+    )
+    for request in range(1000):
+        clock.now = request
+        cache.get(f"error {request}", lambda: "error")
+        cache.get(f"METAR {request}", lambda: "METAR")
+        cache.get("WSSS", lambda: "METAR WSSS")
+
+    assert len(cache) == 10
+    assert len(cache._access_counts) <= 10
+    assert cache._access_counts["WSSS"] == 1000
+
+
+def test_swr_rejects_hard_ttl_shorter_than_soft_ttl():
+    with pytest.raises(ValueError):
+        StaleWhileRevalidateCache(timedelta(minutes=10), timedelta(minutes=1))
+
+
+def test_prefetch_refreshes_hottest_expiring_keys(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    fetch_counts = {"WSSS": 0, "KLAX": 0, "EGLL": 0}
+
+    def make_fetch(icao: str):
+        def fetch() -> str:
+            fetch_counts[icao] += 1
+            return f"METAR {icao} {fetch_counts[icao]}"
+
+        return fetch
+
+    for icao, accesses in [("WSSS", 5), ("KLAX", 3), ("EGLL", 1)]:
+        for _ in range(accesses):
+            metar_cache.get(icao, make_fetch(icao))
+
+    scheduler = PrefetchScheduler(
+        [metar_cache], lead_time=timedelta(seconds=10), request_budget=1
+    )
+    assert scheduler.run_once() == 0
+
+    clock.now = 55
+    assert scheduler.run_once() == 1
+    wait_for_refreshes(metar_cache, 1)
+    assert fetch_counts == {"WSSS": 2, "KLAX": 1, "EGLL": 1}
+    assert metar_cache.get("WSSS", make_fetch("WSSS")) == "METAR WSSS 2"
+    assert scheduler.prefetches == 1
+
+
+def test_prefetch_skips_rarely_used_keys(
+    metar_cache: StaleWhileRevalidateCache[str], clock: FakeClock
+):
+    metar_cache.get("EGLL", lambda: "METAR EGLL")
+    clock.now = 55
+    scheduler = PrefetchScheduler([metar_cache], lead_time=timedelta(seconds=10))
+    assert scheduler.run_once() == 0
+
+
+def test_prefetch_scheduler_start_stop(metar_cache: StaleWhileRevalidateCache[str]):
+    scheduler = PrefetchScheduler([metar_cache], interval=timedelta(milliseconds=10))
+    scheduler.start()
+    assert scheduler.is_running
+    scheduler.stop()
+    assert not scheduler.is_running
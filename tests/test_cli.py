@@ -0,0 +1,182 @@
+import io
+import json
+import threading
+import time
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pytest_mock import MockerFixture
+
+from zc_flightplan_toolkit.api import CheckWxAPI, FlightAwareAPI
+from zc_flightplan_toolkit.cli import (
+    ERROR_COLUMN,
+    QUERY_COLUMN,
+    OutputFormat,
+    ResultWriter,
+    main,
+    read_queries,
+    run_queries,
+)
+
+
+def test_run_queries_keeps_query_order_and_reports_errors():
+    def lookup(query: str) -> pd.DataFrame:
+        if query == "BAD":
+            raise ValueError("unknown airport")
+        # later queries finish first
+        time.sleep(0.01 * (3 - len(query)))
+        return pd.DataFrame({"name": [query.lower()]})
+
+    results = list(run_queries(lookup, ["A", "BAD", "CC", "D"], workers=4))
+
+    assert [result[QUERY_COLUMN][0] for result in results] == ["A", "BAD", "CC", "D"]
+    assert results[1][ERROR_COLUMN][0] == "unknown airport"
+    assert results[2]["name"][0] == "cc"
+
+
+def test_run_queries_runs_concurrently():
+    started = threading.Barrier(3, timeout=5)
+
+    def lookup(query: str) -> pd.DataFrame:
+        started.wait()
+        return pd.DataFrame({"name": [query]})
+
+    assert len(list(run_queries(lookup, ["A", "B", "C"], workers=3))) == 3
+
+
+def test_result_writer_csv_aligns_columns():
+    output = io.BytesIO()
+    writer = ResultWriter(output, OutputFormat.CSV)
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["A"], "name": ["alpha"]}))
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["B"], ERROR_COLUMN: ["failed"]}))
+    writer.close()
+
+    assert not output.closed
+    assert output.getvalue().decode().splitlines() == ["query,name", "A,alpha", "B,"]
+    assert writer.rows == 2
+
+
+def test_result_writer_csv_columns_are_not_fixed_by_errors():
+    output = io.BytesIO()
+    writer = ResultWriter(output, OutputFormat.CSV)
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["XXXX"], ERROR_COLUMN: ["boom"]}))
+    writer.write(pd.DataFrame())
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["WSSS"], "name": ["changi"]}))
+    writer.close()
+
+    assert output.getvalue().decode().splitlines() == [
+        "query,name,error",
+        "XXXX,,boom",
+        "WSSS,changi,",
+    ]
+
+
+def test_result_writer_csv_with_only_errors():
+    output = io.BytesIO()
+    writer = ResultWriter(output, OutputFormat.CSV)
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["XXXX"], ERROR_COLUMN: ["boom"]}))
+    writer.close()
+
+    assert output.getvalue().decode().splitlines() == ["query,error", "XXXX,boom"]
+
+
+def test_result_writer_jsonl():
+    output = io.BytesIO()
+    writer = ResultWriter(output, OutputFormat.JSONL)
+    writer.write(pd.DataFrame({QUERY_COLUMN: ["A", "A"], "name": ["x", "y"]}))
+    writer.write(pd.DataFrame())
+    writer.close()
+
+    records = [json.loads(line) for line in output.getvalue().decode().splitlines()]
+    assert records == [{"query": "A", "name": "x"}, {"query": "A", "name": "y"}]
+
+
+def test_read_queries(tmp_path: Path):
+    queries_file = tmp_path / "airports.txt"
+    queries_file.write_text("# hubs\nWSSS\n\n  KIAH \n", encoding="utf-8")
+
+    assert read_queries(["WMKK"], [str(queries_file)]) == ["WMKK", "WSSS", "KIAH"]
+
+
+def test_main_writes_airports_and_fails_on_errors(
+    tmp_path: Path, mocker: MockerFixture
+):
+    def get_airport_information(_, airport_id: str) -> pd.DataFrame:
+        if airport_id == "XXXX":
+            raise ValueError("not found")
+        return pd.DataFrame({"airport_code": [airport_id], "name": ["test"]})
+
+    mocker.patch.object(
+        FlightAwareAPI, "get_airport_information", get_airport_information
+    )
+    output = tmp_path / "airports.jsonl"
+
+    exit_code = main(["airports", "WSSS", "XXXX", "-o", str(output)])
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert exit_code == 1
+    assert [record["query"] for record in records] == ["WSSS", "XXXX"]
+    assert records[0]["airport_code"] == "WSSS"
+    assert records[1]["error"] == "not found"
+
+
+def test_main_routes_splits_city_pairs(tmp_path: Path, mocker: MockerFixture):
+    get_route_info_mock = mocker.patch.object(
+        FlightAwareAPI, "get_route_info", return_value=pd.DataFrame({"route": ["R"]})
+    )
+    output = tmp_path / "routes.csv"
+
+    exit_code = main(["routes", "WSSS WMKK", "--max-pages", "2", "-o", str(output)])
+
+    assert exit_code == 0
+    get_route_info_mock.assert_called_once_with("WSSS", "WMKK", max_pages=2)
+    assert output.read_text().splitlines() == ["query,route", "WSSS WMKK,R"]
+
+
+def test_main_batches_raw_metars(tmp_path: Path, mocker: MockerFixture):
+    get_metars_mock = mocker.patch.object(
+        CheckWxAPI, "get_metars", return_value={"WSSS": "WSSS 190000Z"}
+    )
+    output = tmp_path / "metars.csv"
+
+    exit_code = main(["metar", "WSSS", "wmkk", "-o", str(output)])
+
+    assert exit_code == 0
+    get_metars_mock.assert_called_once_with(["WSSS", "wmkk"])
+    assert output.read_text().splitlines() == [
+        "query,metar",
+        "WSSS,WSSS 190000Z",
+        "wmkk,no metar found",
+    ]
+
+
+def test_main_without_queries():
+    assert main(["taf"]) == 2
+
+
+@pytest.mark.parametrize(
+    "output_name, expected_format",
+    [("out.jsonl", "jsonl"), ("out.ndjson", "jsonl"), ("out.txt", "csv")],
+)
+def test_main_infers_format_from_extension(
+    output_name: str, expected_format: str, tmp_path: Path, mocker: MockerFixture
+):
+    writer_mock = mocker.patch("zc_flightplan_toolkit.cli.ResultWriter")
+    mocker.patch.object(CheckWxAPI, "get_taf", return_value="TAF WSSS")
+
+    main(["taf", "WSSS", "-o", str(tmp_path / output_name)])
+
+    assert writer_mock.call_args.args[1] is OutputFormat(expected_format)
+
+
+def test_main_parquet_without_engine_runs_no_queries(
+    tmp_path: Path, mocker: MockerFixture
+):
+    mocker.patch("zc_flightplan_toolkit.cli._has_parquet_engine", return_value=False)
+    get_taf_mock = mocker.patch.object(CheckWxAPI, "get_taf")
+
+    exit_code = main(["taf", "WSSS", "-o", str(tmp_path / "tafs.parquet")])
+
+    assert exit_code == 2
+    get_taf_mock.assert_not_called()
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.geodesy import (
+    airport_distance_matrix,
+    distance_matrix,
+    haversine_distance,
+    vincenty_distance,
+)
+
+
+def test_haversine_distance_broadcasts():
+    distances = haversine_distance(0, 0, [0, 1], [1, 0])
+    np.testing.assert_allclose(distances, [60.04, 60.04], rtol=1e-3)
+
+
+def test_vincenty_distance():
+    # Land's End to John o' Groats, reference value from geographiclib
+    distance = vincenty_distance(50.06639, -5.71472, 58.64389, -3.07)
+    assert distance == pytest.approx(523.72190154, rel=1e-9)
+
+
+def test_vincenty_distance_handles_coincident_and_antipodal_points():
+    distances = vincenty_distance([10, 0], [10, 0], [10, 0.5], [10, 179.7])
+    assert distances[0] == 0
+    assert np.isfinite(distances[1])
+
+
+def test_distance_matrix_shape():
+    distances = distance_matrix([0, 10, 20], [0, 0, 0], [0, 5], [0, 0])
+    assert distances.shape == (3, 2)
+    assert distances[0, 0] == 0
+
+
+def test_airport_distance_matrix():
+    airports = pd.DataFrame(
+        {
+            "code_icao": ["WSSS", "WMKK"],
+            "latitude": [1.35019, 2.74558],
+            "longitude": [103.994003, 101.709999],
+        }
+    )
+    distances = airport_distance_matrix(airports, method="vincenty")
+    assert distances.loc["WSSS", "WMKK"] == pytest.approx(distances.loc["WMKK", "WSSS"])
+    assert 150 < distances.to_numpy()[0, 1] < 170
@@ -1,4 +1,5 @@
 import sys
+import threading
 
 import pytest
 
@@ -7,12 +8,25 @@ if not sys.platform.startswith("win"):
 
 import pandas as pd
 from pandas.testing import assert_frame_equal
-from PySide6.QtCore import Qt
+from PySide6.QtCore import QPersistentModelIndex, Qt
 from pytest_mock import MockerFixture
 from pytest_mock.plugin import MockType
 from pytestqt.qtbot import QtBot  # type: ignore
 
+from zc_flightplan_toolkit.airport_search import AirportSearchIndex
+from zc_flightplan_toolkit.api import CheckWxAPI, FlightAwareAPI
+from zc_flightplan_toolkit.gui_classes import (
+    IncrementalPandasModel,
+    PandasModel,
+    RequestRunner,
+)
 from zc_flightplan_toolkit.gui_window import FlightPlanToolkit
+from zc_flightplan_toolkit.runway_diagram import (
+    RunwayDiagramCache,
+    build_runway_scene,
+    project_runway_ends,
+)
+from zc_flightplan_toolkit.watch import AirportWatchScheduler
 
 
 @pytest.fixture(autouse=True)
@@ -32,7 +46,8 @@ def mock_fetch_metar(mocker: MockerFixture) -> MockType:
 )
 def test_get_airport_button(qtbot: QtBot, mocker: MockerFixture, airport_id: str):
     get_airport_info_mock = mocker.patch(
-        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_information"
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.lookup_airport_information",
+        return_value=pd.DataFrame([{"name": airport_id}]),
     )
 
     toolkit = FlightPlanToolkit()
@@ -42,6 +57,7 @@ def test_get_airport_button(qtbot: QtBot, mocker: MockerFixture, airport_id: str
     toolkit.ui.airport_id_lineedit.setText(airport_id)
     qtbot.mouseClick(toolkit.ui.get_airport_info_button, Qt.MouseButton.LeftButton)
 
+    qtbot.waitUntil(lambda: get_airport_info_mock.called)
     get_airport_info_mock.assert_called_once_with(airport_id)
 
 
@@ -56,8 +72,10 @@ def test_get_airport_button(qtbot: QtBot, mocker: MockerFixture, airport_id: str
 def test_get_route_button(
     qtbot: QtBot, mocker: MockerFixture, start_id: str, end_id: str
 ):
-    get_route_info_mock = mocker.patch(
-        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_route_info"
+    route_page = pd.DataFrame([{"route": "DOTSS J501 ROBER", "count": 1}])
+    iter_route_info_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.iter_route_info",
+        return_value=iter([route_page]),
     )
 
     toolkit = FlightPlanToolkit()
@@ -68,7 +86,45 @@ def test_get_route_button(
     toolkit.ui.end_airport_lineedit.setText(end_id)
     qtbot.mouseClick(toolkit.ui.get_route_info_button, Qt.MouseButton.LeftButton)
 
-    get_route_info_mock.assert_called_once_with(start_id, end_id)
+    iter_route_info_mock.assert_called_once_with(start_id, end_id)
+    qtbot.waitUntil(lambda: toolkit.ui.route_info_table.model().rowCount() == 1)
+    assert_frame_equal(toolkit.ui.route_info_table.model().get_data(), route_page)  # type: ignore
+
+
+class FlakyPages:
+    """Route pages whose first request times out"""
+
+    def __init__(self, *pages: pd.DataFrame):
+        self.requests = 0
+        self._pages = iter(pages)
+
+    def __iter__(self) -> "FlakyPages":
+        return self
+
+    def __next__(self) -> pd.DataFrame:
+        self.requests += 1
+        if self.requests == 1:
+            raise ConnectionError("timed out")
+        return next(self._pages)
+
+
+def test_failed_route_page_can_be_requested_again(qtbot: QtBot, mocker: MockerFixture):
+    route_page = pd.DataFrame([{"route": "DOTSS J501 ROBER", "count": 1}])
+    pages = FlakyPages(route_page)
+    mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.iter_route_info",
+        return_value=pages,
+    )
+
+    toolkit = FlightPlanToolkit()
+    qtbot.addWidget(toolkit)
+    qtbot.mouseClick(toolkit.ui.get_route_info_button, Qt.MouseButton.LeftButton)
+
+    qtbot.waitUntil(lambda: pages.requests >= 1 and toolkit._requests.pending == 0)
+    # the view may already have asked again by itself
+    if toolkit._route_model.canFetchMore():
+        toolkit._route_model.fetchMore()
+    qtbot.waitUntil(lambda: toolkit._route_model.rowCount() == 1)
 
 
 def test_get_north_atlantic_tracks_button(qtbot: QtBot, mocker: MockerFixture):
@@ -85,7 +141,9 @@ def test_get_north_atlantic_tracks_button(qtbot: QtBot, mocker: MockerFixture):
         toolkit.ui.get_north_atlantic_tracks_button, Qt.MouseButton.LeftButton
     )
 
-    assert toolkit.ui.north_atlantic_text_display.toPlainText() == "mock_tracks"
+    qtbot.waitUntil(
+        lambda: toolkit.ui.north_atlantic_text_display.toPlainText() == "mock_tracks"
+    )
 
 
 def test_get_pacific_tracks_button(qtbot: QtBot, mocker: MockerFixture):
@@ -100,7 +158,9 @@ def test_get_pacific_tracks_button(qtbot: QtBot, mocker: MockerFixture):
 
     qtbot.mouseClick(toolkit.ui.get_pacific_tracks_button, Qt.MouseButton.LeftButton)
 
-    assert toolkit.ui.pacific_tracks_display.toPlainText() == "mock_tracks"
+    qtbot.waitUntil(
+        lambda: toolkit.ui.pacific_tracks_display.toPlainText() == "mock_tracks"
+    )
 
 
 def test_settings_dialog_opens(qtbot: QtBot, mocker: MockerFixture):
@@ -109,8 +169,8 @@ def test_settings_dialog_opens(qtbot: QtBot, mocker: MockerFixture):
     preferences_mock = mocker.patch(
         "zc_flightplan_toolkit.gui_window.ToolkitPreferences"
     )
-    preferences_mock.get_setting.return_value = ""
-    preferences_mock.set_setting.return_value = False
+    preferences_mock.return_value.get_setting.return_value = ""
+    preferences_mock.return_value.set_setting.return_value = False
 
     toolkit = FlightPlanToolkit()
     toolkit.show()
@@ -121,9 +181,46 @@ def test_settings_dialog_opens(qtbot: QtBot, mocker: MockerFixture):
     dialog_mock.assert_called_once()
 
 
+def test_settings_change_updates_credentials_in_place(
+    qtbot: QtBot, mocker: MockerFixture
+):
+    dialog_mock = mocker.patch("zc_flightplan_toolkit.gui_window.PreferencesDialog")
+    dialog_mock.return_value.exec.return_value = True
+    dialog_mock.return_value.aero_api_key = "new key"
+    dialog_mock.return_value.checkwx_api_key = ""
+    mocker.patch(
+        "zc_flightplan_toolkit.gui_window.ToolkitPreferences.get_setting",
+        return_value="",
+    )
+    mocker.patch(
+        "zc_flightplan_toolkit.gui_window.ToolkitPreferences.set_setting",
+        side_effect=lambda setting, value: value != "",
+    )
+    update_credentials_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.update_credentials"
+    )
+
+    toolkit = FlightPlanToolkit()
+    qtbot.addWidget(toolkit)
+    api = toolkit._api
+    toolkit.ui.toolbar_preferences_button.trigger()
+
+    assert toolkit._api is api
+    update_credentials_mock.assert_called_with(api_key="new key", weather_api_key=None)
+
+
+def test_injected_api_keeps_its_weather_client(qtbot: QtBot):
+    weather_api = CheckWxAPI(api_key="weather key")
+    toolkit = FlightPlanToolkit(api=FlightAwareAPI(weather_api=weather_api))
+    qtbot.addWidget(toolkit)
+
+    assert toolkit._weather_api is weather_api
+
+
 def test_datis_display_gets_populated(qtbot: QtBot, mocker: MockerFixture):
     mocker.patch(
-        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_information"
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.lookup_airport_information",
+        return_value=pd.DataFrame([{"name": "Singapore Changi"}]),
     )
     datis_mock = mocker.patch(
         "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_datis"
@@ -137,12 +234,39 @@ def test_datis_display_gets_populated(qtbot: QtBot, mocker: MockerFixture):
     toolkit.ui.airport_id_lineedit.setText("wsss")
     qtbot.mouseClick(toolkit.ui.get_airport_info_button, Qt.MouseButton.LeftButton)
 
-    assert toolkit.ui.atis_display.toPlainText() == "mock_datis"
+    qtbot.waitUntil(lambda: toolkit.ui.atis_display.toPlainText() == "mock_datis")
+
+
+def test_follow_up_requests_use_the_displayed_airport(
+    qtbot: QtBot, mocker: MockerFixture, mock_fetch_metar: MockType
+):
+    datis_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_datis", return_value=""
+    )
+    runways_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_runways",
+        return_value=pd.DataFrame(),
+    )
+    mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_runway_segments",
+        return_value=pd.DataFrame(),
+    )
+    toolkit = FlightPlanToolkit()
+    qtbot.addWidget(toolkit)
+    toolkit._api.current_airport_icao = "KLAX"
+
+    toolkit._display_airport_info(pd.DataFrame([{"code_icao": "WSSS"}]))
+
+    qtbot.waitUntil(lambda: datis_mock.called and runways_mock.called)
+    datis_mock.assert_called_once_with("WSSS")
+    runways_mock.assert_called_once_with("WSSS")
+    mock_fetch_metar.assert_called_once_with("WSSS")
 
 
 def test_airport_runways_table_gets_populated(qtbot: QtBot, mocker: MockerFixture):
     mocker.patch(
-        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_information"
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.lookup_airport_information",
+        return_value=pd.DataFrame([{"name": "Singapore Changi"}]),
     )
     mocker.patch(
         "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_datis", return_value=""
@@ -160,5 +284,337 @@ def test_airport_runways_table_gets_populated(qtbot: QtBot, mocker: MockerFixtur
     toolkit.ui.airport_id_lineedit.setText("wsss")
     qtbot.mouseClick(toolkit.ui.get_airport_info_button, Qt.MouseButton.LeftButton)
 
+    qtbot.waitUntil(lambda: toolkit.ui.runway_info_table.model() is not None)
     assert_frame_equal(toolkit.ui.runway_info_table.model().get_data(), mock_data)  # type: ignore
     # self defined function
+
+
+def test_superseded_request_result_is_dropped(qtbot: QtBot):
+    runner = RequestRunner(max_threads=2)
+    release = threading.Event()
+    results = []
+
+    def slow_request() -> str:
+        release.wait(timeout=5)
+        return "KLAX"
+
+    runner.submit("airport info", slow_request, results.append)
+    runner.submit("airport info", lambda: "WSSS", results.append)
+    release.set()
+
+    qtbot.waitUntil(lambda: runner.pending == 0)
+    assert runner.wait_for_done(5000)
+    qtbot.wait(50)
+    assert results == ["WSSS"]
+
+
+@pytest.fixture
+def route_model() -> PandasModel:
+    return PandasModel(
+        pd.DataFrame(
+            {
+                "route": ["DOTSS J501 ROBER", "AAAAA J502 BBBBB", "CCCCC J503 DDDDD"],
+                "count": [12, 40, None],
+            },
+            index=["a", "b", "c"],
+        ),
+        show_index=True,
+    )
+
+
+def get_column(model: PandasModel, column: int):
+    return [model.index(row, column).data() for row in range(model.rowCount())]
+
+
+def test_pandas_model_display_strings(route_model: PandasModel):
+    assert get_column(route_model, 1) == ["12.0", "40.0", "nan"]
+    assert (
+        route_model.headerData(
+            1, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole
+        )
+        == "count"
+    )
+    assert (
+        route_model.headerData(2, Qt.Orientation.Vertical, Qt.ItemDataRole.DisplayRole)
+        == "c"
+    )
+
+
+def test_pandas_model_sort(route_model: PandasModel):
+    route_model.sort(1, Qt.SortOrder.DescendingOrder)
+    assert get_column(route_model, 1) == ["40.0", "12.0", "nan"]
+    assert (
+        route_model.headerData(0, Qt.Orientation.Vertical, Qt.ItemDataRole.DisplayRole)
+        == "b"
+    )
+
+    route_model.sort(-1)
+    assert get_column(route_model, 1) == ["12.0", "40.0", "nan"]
+
+
+def test_pandas_model_filter(route_model: PandasModel):
+    route_model.sort(1, Qt.SortOrder.DescendingOrder)
+    route_model.set_filter("j50")
+    assert route_model.rowCount() == 3
+
+    route_model.set_filter("dotss")
+    assert get_column(route_model, 0) == ["DOTSS J501 ROBER"]
+
+    route_model.set_filter("40", column=0)
+    assert route_model.rowCount() == 0
+
+    route_model.set_filter("")
+    assert get_column(route_model, 1) == ["40.0", "12.0", "nan"]
+
+
+def test_incremental_model_requests_pages_in_batches(qtbot: QtBot):
+    model = IncrementalPandasModel(batch_rows=2)
+    requests = []
+    model.more_rows_requested.connect(lambda: requests.append(1))
+
+    assert model.canFetchMore()
+    model.fetchMore()
+    model.fetchMore()
+    assert len(requests) == 1
+    assert not model.canFetchMore()
+
+    model.append_rows(pd.DataFrame({"route": ["A", "B", "C"]}))
+    assert model.rowCount() == 2
+    assert model.loaded_rows == 3
+
+    model.fetchMore()
+    assert model.rowCount() == 3
+    assert len(requests) == 1
+
+    model.fetchMore()
+    assert len(requests) == 2
+    model.append_rows(pd.DataFrame({"route": ["D"]}))
+    assert [model.index(row, 0).data() for row in range(4)] == ["A", "B", "C", "D"]
+
+    model.set_source_exhausted()
+    assert not model.canFetchMore()
+
+
+def test_incremental_model_fetch_can_be_cancelled(qtbot: QtBot):
+    model = IncrementalPandasModel()
+    requests = []
+    model.more_rows_requested.connect(lambda: requests.append(1))
+
+    model.fetchMore()
+    assert not model.canFetchMore()
+    model.cancel_fetch()
+    assert model.canFetchMore()
+    model.fetchMore()
+    assert len(requests) == 2
+
+
+def test_incremental_model_keeps_sort_on_append(qtbot: QtBot):
+    model = IncrementalPandasModel()
+    model.append_rows(pd.DataFrame({"count": [5, 1]}))
+    model.sort(0, Qt.SortOrder.AscendingOrder)
+    model.fetchMore()
+    model.append_rows(pd.DataFrame({"count": [3]}))
+    assert [model.index(row, 0).data() for row in range(3)] == ["1", "3", "5"]
+
+
+@pytest.fixture
+def runway_model() -> PandasModel:
+    return PandasModel(
+        pd.DataFrame(
+            {"ident": ["02L", "02C", "20R"], "heading": [23, 23, 203]},
+        )
+    )
+
+
+def record_model_signals(model: PandasModel):
+    signals = {"changed": [], "removed": [], "inserted": [], "reset": []}
+    model.dataChanged.connect(
+        lambda top_left, bottom_right: signals["changed"].append(
+            (top_left.row(), top_left.column(), bottom_right.column())
+        )
+    )
+    model.rowsRemoved.connect(
+        lambda _, first, last: signals["removed"].append((first, last))
+    )
+    model.rowsInserted.connect(
+        lambda _, first, last: signals["inserted"].append((first, last))
+    )
+    model.modelReset.connect(lambda: signals["reset"].append(True))
+    return signals
+
+
+def test_update_dataframe_signals_changed_cells(runway_model: PandasModel):
+    signals = record_model_signals(runway_model)
+    runway_model.update_dataframe(
+        pd.DataFrame({"ident": ["02L", "02C", "20R"], "heading": [23, 24, 203]}),
+        key_columns=["ident"],
+    )
+    assert signals == {
+        "changed": [(1, 1, 1)],
+        "removed": [],
+        "inserted": [],
+        "reset": [],
+    }
+    assert get_column(runway_model, 1) == ["23", "24", "203"]
+
+
+def test_update_dataframe_inserts_and_removes_rows(runway_model: PandasModel):
+    persistent_index = QPersistentModelIndex(runway_model.index(2, 0))
+    signals = record_model_signals(runway_model)
+    runway_model.update_dataframe(
+        pd.DataFrame({"ident": ["02L", "02R", "20R"], "heading": [23, 23, 203]}),
+        key_columns=["ident"],
+    )
+    assert signals["removed"] == [(1, 1)]
+    assert signals["inserted"] == [(1, 1)]
+    assert signals["changed"] == []
+    assert get_column(runway_model, 0) == ["02L", "02R", "20R"]
+    assert persistent_index.row() == 2
+
+
+def test_update_dataframe_follows_reordered_rows(runway_model: PandasModel):
+    persistent_index = QPersistentModelIndex(runway_model.index(0, 0))
+    runway_model.update_dataframe(
+        pd.DataFrame({"ident": ["20R", "02C", "02L"], "heading": [203, 23, 23]}),
+        key_columns=["ident"],
+    )
+    assert get_column(runway_model, 0) == ["20R", "02C", "02L"]
+    assert persistent_index.row() == 2
+
+
+def test_update_dataframe_resets_on_new_columns(runway_model: PandasModel):
+    signals = record_model_signals(runway_model)
+    runway_model.update_dataframe(pd.DataFrame({"ident": ["02L"]}))
+    assert signals["reset"] == [True]
+    assert runway_model.columnCount() == 1
+
+
+@pytest.fixture
+def runway_segments() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "LEFT_END_IDENT": ["02L", "02C"],
+            "LEFT_END_LATITUDE": [1.33, 1.33],
+            "LEFT_END_LONGITUDE": [103.98, 103.99],
+            "RIGHT_END_IDENT": ["20R", "20C"],
+            "RIGHT_END_LATITUDE": [1.37, 1.37],
+            "RIGHT_END_LONGITUDE": [104.0, 104.01],
+            "WIDTH": [200, 200],
+            "CLOSED": [0, 0],
+        }
+    )
+
+
+def test_build_runway_scene_draws_runways_and_labels(runway_segments: pd.DataFrame):
+    scene = build_runway_scene(project_runway_ends(runway_segments))
+
+    labels = sorted(
+        item.text() for item in scene.items() if hasattr(item, "text")  # type: ignore
+    )
+    assert labels == ["02C", "02L", "20C", "20R"]
+    assert scene.itemsBoundingRect().height() > scene.itemsBoundingRect().width()
+
+
+def test_runway_diagram_cache_evicts_least_recently_used(
+    runway_segments: pd.DataFrame,
+):
+    cache = RunwayDiagramCache(max_airports=2)
+    diagram = project_runway_ends(runway_segments)
+    for icao in ("WSSS", "WMKK"):
+        cache.put(icao, build_runway_scene(diagram))
+    cache.get("wsss")
+    cache.put("KLAX", build_runway_scene(diagram))
+
+    assert len(cache) == 2
+    assert cache.get("WMKK") is None
+    assert cache.get("WSSS") is not None
+
+
+def test_runway_diagram_is_cached_for_the_requested_airport(
+    qtbot: QtBot, mocker: MockerFixture, runway_segments: pd.DataFrame
+):
+    release = threading.Event()
+
+    def get_segments(icao: str) -> pd.DataFrame:
+        release.wait(timeout=5)
+        return runway_segments
+
+    segments_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_runway_segments",
+        side_effect=get_segments,
+    )
+    toolkit = FlightPlanToolkit()
+    qtbot.addWidget(toolkit)
+
+    toolkit._api.current_airport_icao = "WSSS"
+    toolkit._update_runway_diagram("WSSS")
+    toolkit._api.current_airport_icao = "KLAX"
+    release.set()
+
+    qtbot.waitUntil(lambda: toolkit.ui.runway_map_view.scene() is not None)
+    segments_mock.assert_called_once_with("WSSS")
+    assert toolkit._runway_diagrams.get("WSSS") is toolkit.ui.runway_map_view.scene()
+    assert toolkit._runway_diagrams.get("KLAX") is None
+
+
+def test_runway_diagram_is_reused_for_cached_airport(
+    qtbot: QtBot, mocker: MockerFixture, runway_segments: pd.DataFrame
+):
+    segments_mock = mocker.patch(
+        "zc_flightplan_toolkit.gui_window.FlightAwareAPI.get_airport_runway_segments",
+        return_value=runway_segments,
+    )
+    toolkit = FlightPlanToolkit()
+    qtbot.addWidget(toolkit)
+
+    toolkit._update_runway_diagram("WSSS")
+    qtbot.waitUntil(lambda: toolkit.ui.runway_map_view.scene() is not None)
+    first_scene = toolkit.ui.runway_map_view.scene()
+    toolkit._update_runway_diagram("WSSS")
+
+    assert toolkit.ui.runway_map_view.scene() is first_scene
+    segments_mock.assert_called_once()
+
+
+def test_watch_panels_share_scheduler(qtbot: QtBot, mocker: MockerFixture):
+    weather_api = mocker.Mock()
+    weather_api.get_metars.return_value = {"KJFK": "KJFK 191751Z 31012KT"}
+    datis_api = mocker.Mock()
+    datis_api.request_all_datis.return_value = pd.DataFrame(
+        [{"airport": "KJFK", "type": "combined", "code": "C", "datis": "RWY 31L"}]
+    )
+    scheduler = AirportWatchScheduler(weather_api, datis_api)
+    mocker.patch.object(scheduler, "start")
+    mocker.patch(
+        "zc_flightplan_toolkit.gui_window.ToolkitPreferences.get_setting",
+        return_value="KJFK",
+    )
+
+    toolkit = FlightPlanToolkit(watch_scheduler=scheduler)
+    qtbot.addWidget(toolkit)
+    panels = [toolkit._open_watch_panel() for _ in range(3)]
+    scheduler.run_once()
+
+    qtbot.waitUntil(
+        lambda: all(
+            panel.table.model().index(0, 1).data() == "KJFK 191751Z 31012KT"
+            for panel in panels
+        )
+    )
+    assert panels[0].table.model().index(0, 3).data() == "31L"
+    weather_api.get_metars.assert_called_once_with(["KJFK"])
+    datis_api.request_all_datis.assert_called_once()
+
+
+def test_tabs_are_set_up_when_first_shown(qtbot: QtBot, mocker: MockerFixture):
+    search_index = AirportSearchIndex(
+        pd.DataFrame({"code_icao": ["WSSS"], "name": ["Singapore Changi Airport"]})
+    )
+    toolkit = FlightPlanToolkit(airport_search_index=search_index)
+    qtbot.addWidget(toolkit)
+    assert toolkit.ui.airport_id_lineedit.completer() is None
+
+    toolkit.ui.main_tabs.setCurrentWidget(toolkit.ui.airport_info_tab)
+
+    assert toolkit.ui.airport_id_lineedit.completer() is not None
+    assert toolkit.ui.start_airport_lineedit.completer() is not None
@@ -0,0 +1,143 @@
+import socket
+from datetime import timedelta
+from typing import Iterator
+
+import pytest
+
+from zc_flightplan_toolkit.caching import StaleWhileRevalidateCache
+from zc_flightplan_toolkit.metrics import (
+    MetricSample,
+    MetricsRegistry,
+    MetricType,
+    StatsdExporter,
+    cache_collector,
+    format_prometheus,
+    get_metrics,
+    timed,
+)
+
+
+@pytest.fixture
+def registry() -> MetricsRegistry:
+    return MetricsRegistry(buckets=(0.1, 1.0))
+
+
+@pytest.fixture
+def statsd_socket() -> Iterator[socket.socket]:
+    receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    receiver.bind(("127.0.0.1", 0))
+    receiver.settimeout(5)
+    yield receiver
+    receiver.close()
+
+
+def test_counters_are_keyed_by_labels(registry: MetricsRegistry):
+    registry.increment("requests_total", host="a", status="200")
+    registry.increment("requests_total", 2, status="200", host="a")
+    registry.increment("requests_total", host="b", status="200")
+
+    assert registry.counters() == {
+        ("requests_total", (("host", "a"), ("status", "200"))): 3,
+        ("requests_total", (("host", "b"), ("status", "200"))): 1,
+    }
+
+
+def test_histogram_buckets_and_quantiles(registry: MetricsRegistry):
+    for seconds in [0.05, 0.05, 0.5, 5]:
+        registry.observe("request_seconds", seconds)
+
+    histogram = registry.histograms()[("request_seconds", ())]
+
+    assert histogram.bucket_counts == (2, 1, 1)
+    assert histogram.observations == 4
+    assert histogram.mean == pytest.approx(1.4)
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.75) == 1.0
+    assert histogram.quantile(0.99) == float("inf")
+
+
+def test_format_prometheus(registry: MetricsRegistry):
+    registry.increment("requests_total", endpoint='/a"b')
+    registry.observe("request_seconds", 0.5, endpoint="/a")
+    registry.register_collector(
+        "entries", lambda: [MetricSample("entries", (), 3, MetricType.GAUGE)]
+    )
+
+    assert format_prometheus(registry, prefix="zc").splitlines() == [
+        "# TYPE zc_entries gauge",
+        "zc_entries 3",
+        "# TYPE zc_request_seconds histogram",
+        'zc_request_seconds_bucket{endpoint="/a",le="0.1"} 0',
+        'zc_request_seconds_bucket{endpoint="/a",le="1"} 1',
+        'zc_request_seconds_bucket{endpoint="/a",le="+Inf"} 1',
+        'zc_request_seconds_sum{endpoint="/a"} 0.5',
+        'zc_request_seconds_count{endpoint="/a"} 1',
+        "# TYPE zc_requests_total counter",
+        'zc_requests_total{endpoint="/a\\"b"} 1',
+    ]
+
+
+def test_failing_collector_is_skipped(registry: MetricsRegistry):
+    def failing_collector():
+        raise RuntimeError("gone")
+
+    registry.register_collector("failing", failing_collector)
+    registry.register_collector(
+        "working", lambda: [MetricSample("entries", (), 1, MetricType.GAUGE)]
+    )
+
+    assert [sample.name for sample in registry.collect()] == ["entries"]
+
+
+def test_cache_collector_reports_hit_ratio():
+    cache: StaleWhileRevalidateCache[str] = StaleWhileRevalidateCache(
+        timedelta(minutes=1), timedelta(minutes=5)
+    )
+    for _ in range(4):
+        cache.get("key", lambda: "value")
+
+    samples = {
+        (sample.name, sample.labels): sample.value
+        for sample in cache_collector("response", cache)()
+    }
+
+    assert samples[("cache_hit_ratio", (("cache", "response"),))] == 0.75
+    assert samples[("cache_entries", (("cache", "response"),))] == 1
+    lookups = ("cache_lookups_total", (("cache", "response"), ("result", "miss")))
+    assert samples[lookups] == 1
+
+
+def test_timed_observes_failed_calls():
+    @timed("test_timed_seconds", operation="failing")
+    def fail():
+        raise ValueError("failed")
+
+    key = ("test_timed_seconds", (("operation", "failing"),))
+    before = get_metrics().histograms().get(key)
+
+    with pytest.raises(ValueError):
+        fail()
+
+    observations = get_metrics().histograms()[key].observations
+    assert observations == (before.observations if before else 0) + 1
+
+
+def test_statsd_exporter_pushes_events_and_gauges(
+    registry: MetricsRegistry, statsd_socket: socket.socket
+):
+    registry.register_collector(
+        "entries", lambda: [MetricSample("entries", (), 3, MetricType.GAUGE)]
+    )
+    port = statsd_socket.getsockname()[1]
+
+    with StatsdExporter(port=port, prefix="zc", registry=registry) as exporter:
+        registry.increment("requests_total", host="a")
+        registry.observe("request_seconds", 0.25)
+    registry.increment("requests_total", host="a")
+
+    lines = [statsd_socket.recv(1024).decode() for _ in range(exporter.sent)]
+    assert lines == [
+        "zc.requests_total:1|c|#host:a",
+        "zc.request:250.000|ms",
+        "zc.entries:3|g",
+    ]
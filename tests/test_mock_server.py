@@ -0,0 +1,107 @@
+from typing import Iterator
+
+import pytest
+import requests
+
+from zc_flightplan_toolkit.api import CheckWxAPI, ClowdIoDATISAPI, FlightAwareAPI
+from zc_flightplan_toolkit.mock_server import (
+    MockUpstreamServer,
+    Upstream,
+    UpstreamBehaviour,
+)
+from zc_flightplan_toolkit.tracks import (
+    clear_track_cache,
+    get_north_atlantic_track_records,
+    get_pacific_track_records,
+)
+
+
+@pytest.fixture
+def server() -> Iterator[MockUpstreamServer]:
+    with MockUpstreamServer(routes_per_page=2, route_pages=3) as mock_server:
+        yield mock_server
+
+
+def test_route_pages_follow_cursor(server: MockUpstreamServer):
+    flightaware_api = FlightAwareAPI(api_url=server.urls.aeroapi, api_key="key")
+
+    pages = list(flightaware_api.iter_route_info("WSSS", "WMKK", max_pages=3))
+
+    assert [len(page) for page in pages] == [2, 2, 2]
+    assert server.responses[Upstream.AEROAPI] == {200: 3}
+
+
+def test_routes_in_one_call(server: MockUpstreamServer):
+    flightaware_api = FlightAwareAPI(api_url=server.urls.aeroapi, api_key="key")
+
+    route_info = flightaware_api.get_route_info("WSSS", "WMKK", max_pages=2)
+
+    assert len(route_info) == 4
+    assert server.responses[Upstream.AEROAPI] == {200: 1}
+
+
+def test_weather_and_datis(server: MockUpstreamServer):
+    weather_api = CheckWxAPI(server.urls.checkwx, api_key="key")
+    datis_api = ClowdIoDATISAPI(server.urls.datis)
+
+    metars = weather_api.get_metars(["WSSS", "KJFK"])
+
+    assert sorted(metars) == ["KJFK", "WSSS"]
+    assert metars["KJFK"].startswith("KJFK ")
+    assert weather_api.get_taf("WSSS").startswith("TAF WSSS")
+    assert "ATIS Code" in datis_api.request_datis("KJFK")
+    assert set(datis_api.request_all_datis()["type"]) == {"arr", "dep"}
+
+
+def test_tracks_are_currently_valid(server: MockUpstreamServer):
+    clear_track_cache()
+    try:
+        nat_tracks = get_north_atlantic_track_records(
+            server.urls.nat_tracks, refresh=True
+        )
+        pacific_tracks = get_pacific_track_records(
+            server.urls.pacific_tracks, refresh=True
+        )
+    finally:
+        clear_track_cache()
+
+    assert [track.letter for track in nat_tracks] == list("ABCDEF")
+    assert [track.track_id for track in pacific_tracks] == list("ABCDE")
+
+
+@pytest.mark.parametrize(
+    "path, expected_status",
+    [
+        ("/checkwx/metar/WSSS/decoded", 401),
+        ("/aeroapi/airports/WSSS", 401),
+        ("/unknown", 404),
+    ],
+)
+def test_rejects_requests(path: str, expected_status: int, server: MockUpstreamServer):
+    response = requests.get(f"{server.base_url}{path}", timeout=5)
+
+    assert response.status_code == expected_status
+
+
+def test_rate_limit_answers_429():
+    behaviours = {Upstream.DATIS: UpstreamBehaviour(rate_limit=1, burst=2)}
+    with MockUpstreamServer(behaviours=behaviours, clock=lambda: 0.0) as server:
+        statuses = [
+            requests.get(f"{server.urls.datis}KJFK", timeout=5) for _ in range(3)
+        ]
+
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert statuses[-1].headers["Retry-After"] == "1"
+
+
+def test_error_rate_answers_503():
+    behaviours = {Upstream.CHECKWX: UpstreamBehaviour(error_rate=1)}
+    with MockUpstreamServer(behaviours=behaviours) as server:
+        response = requests.get(
+            f"{server.urls.checkwx}/taf/WSSS/decoded",
+            headers={"X-API-Key": "key"},
+            timeout=5,
+        )
+
+    assert response.status_code == 503
+    assert server.responses[Upstream.CHECKWX] == {503: 1}
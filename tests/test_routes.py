@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.geodesy import haversine_distance
+from zc_flightplan_toolkit.routes import (
+    NavDataStore,
+    add_leg_distances,
+    compute_route_lengths,
+    expand_routes,
+    tokenize_routes,
+)
+from zc_flightplan_toolkit.track_geometry import FixDatabase
+
+
+@pytest.fixture
+def navdata() -> NavDataStore:
+    fixes = pd.DataFrame(
+        {
+            "ident": ["DOTSS", "AAAAA", "BBBBB", "CCCCC", "DDDDD", "RWY01"],
+            "latitude": [33.0, 34.0, 35.0, 36.0, 37.0, 38.0],
+            "longitude": [-118.0, -110.0, -100.0, -90.0, -80.0, -74.0],
+        }
+    )
+    airways = pd.DataFrame(
+        {
+            "name": ["J501"] * 4,
+            "sequence": [1, 2, 3, 4],
+            "ident": ["AAAAA", "BBBBB", "CCCCC", "DDDDD"],
+        }
+    )
+    procedures = pd.DataFrame(
+        {"name": ["ROBER2", "ROBER2"], "sequence": [2, 1], "ident": ["RWY01", "DDDDD"]}
+    )
+    return NavDataStore(FixDatabase(fixes), airways, procedures)
+
+
+def test_tokenize_routes():
+    routes = pd.Series(
+        ["DOTSS2 DOTSS J501 DDDDD ROBER2", "KLAX SEAVU3 DCT 57/20 KJFK", None]
+    )
+    tokens = tokenize_routes(routes)
+
+    first_route = tokens[tokens["route_index"] == 0]
+    assert first_route["token_type"].tolist() == [
+        "sid",
+        "fix",
+        "airway",
+        "fix",
+        "star",
+    ]
+    second_route = tokens[tokens["route_index"] == 1]
+    assert second_route["token"].tolist() == ["KLAX", "SEAVU3", "57/20", "KJFK"]
+    assert second_route["token_type"].tolist() == [
+        "airport",
+        "sid",
+        "coordinate",
+        "airport",
+    ]
+    assert isinstance(tokens["token"].dtype, pd.CategoricalDtype)
+    assert 2 not in tokens["route_index"].tolist()
+
+
+def test_expand_routes(navdata: NavDataStore):
+    routes = pd.Series(
+        ["AAAAA J501 CCCCC ROBER2", "DDDDD J501 BBBBB", "DOTSS J999 AAAAA"],
+        index=[10, 11, 12],
+    )
+    waypoints = expand_routes(routes, navdata)
+
+    def route_waypoints(route_index: int):
+        return waypoints[waypoints["route_index"] == route_index]["ident"].tolist()
+
+    assert route_waypoints(11) == ["DDDDD", "CCCCC", "BBBBB"]
+    assert route_waypoints(12) == ["DOTSS", "J999", "AAAAA"]
+    first_route = waypoints[waypoints["route_index"] == 10]
+    assert first_route["ident"].tolist() == [
+        "AAAAA",
+        "BBBBB",
+        "CCCCC",
+        "DDDDD",
+        "RWY01",
+    ]
+    assert first_route["sequence"].tolist() == [0, 1, 2, 3, 4]
+    np.testing.assert_allclose(first_route["latitude"], [34, 35, 36, 37, 38])
+    assert np.isnan(waypoints[waypoints["ident"] == "J999"]["latitude"]).all()
+
+
+def test_add_leg_distances(navdata: NavDataStore):
+    waypoints = expand_routes(pd.Series(["AAAAA J501 CCCCC", "DOTSS"]), navdata)
+    legs = add_leg_distances(waypoints)
+
+    first_route_legs = legs[legs["route_index"] == 0]["leg_distance_nm"]
+    assert np.isnan(first_route_legs.iloc[0])
+    assert first_route_legs.iloc[1] == pytest.approx(
+        haversine_distance(34, -110, 35, -100)
+    )
+    assert legs[legs["route_index"] == 1]["leg_distance_nm"].isna().all()
+
+
+def test_compute_route_lengths(navdata: NavDataStore):
+    routes = pd.Series(["AAAAA J501 CCCCC", "UNKWN"], index=[5, 6])
+    lengths = compute_route_lengths(
+        routes, navdata, origin=(33.0, -118.0), destination=(38.0, -74.0)
+    )
+
+    expected = haversine_distance(
+        [33, 34, 35, 36],
+        [-118, -110, -100, -90],
+        [34, 35, 36, 38],
+        [-110, -100, -90, -74],
+    ).sum()
+    assert lengths.index.tolist() == [5, 6]
+    assert lengths.loc[5] == pytest.approx(expected)
+    assert lengths.loc[6] == pytest.approx(haversine_distance(33, -118, 38, -74))
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.runway_diagram import (
+    DEFAULT_RUNWAY_WIDTH_M,
+    project_runway_ends,
+)
+from zc_flightplan_toolkit.runways import DMColumns
+
+
+def _make_segments(*runways) -> pd.DataFrame:
+    return pd.DataFrame(
+        [
+            {
+                DMColumns.LEFT_END_IDENT.name: left_ident,
+                DMColumns.LEFT_END_LATITUDE.name: left_lat,
+                DMColumns.LEFT_END_LONGITUDE.name: left_lon,
+                DMColumns.RIGHT_END_IDENT.name: right_ident,
+                DMColumns.RIGHT_END_LATITUDE.name: right_lat,
+                DMColumns.RIGHT_END_LONGITUDE.name: right_lon,
+                DMColumns.WIDTH.name: width,
+                DMColumns.CLOSED.name: closed,
+            }
+            for (
+                left_ident,
+                left_lat,
+                left_lon,
+                right_ident,
+                right_lat,
+                right_lon,
+                width,
+                closed,
+            ) in runways
+        ]
+    )
+
+
+def test_project_runway_ends_preserves_runway_length():
+    # 0.03 degrees of latitude is about 3336 m
+    segments = _make_segments(("36", 1.0, 104.0, "18", 1.03, 104.0, 200, 0))
+    diagram = project_runway_ends(segments)
+
+    runway = diagram.ends[0]
+    assert np.linalg.norm(runway[1] - runway[0]) == pytest.approx(3336, rel=1e-3)
+    assert runway[1, 1] > runway[0, 1]
+    np.testing.assert_allclose(diagram.ends.mean(axis=(0, 1)), [0, 0], atol=1e-6)
+    assert diagram.widths[0] == pytest.approx(61, abs=0.1)
+
+
+def test_project_runway_ends_wraps_antimeridian():
+    segments = _make_segments(("09", 0.0, 179.99, "27", 0.0, -179.99, None, 0))
+    diagram = project_runway_ends(segments)
+
+    runway = diagram.ends[0]
+    assert runway[1, 0] - runway[0, 0] == pytest.approx(2224, rel=1e-3)
+    assert diagram.widths[0] == DEFAULT_RUNWAY_WIDTH_M
+
+
+def test_project_runway_ends_keeps_idents_and_closed_flags():
+    segments = _make_segments(
+        ("02L", 1.33, 103.98, "20R", 1.37, 104.0, 200, 0),
+        ("02C", 1.33, 103.99, "20C", 1.37, 104.01, 200, 1),
+    )
+    diagram = project_runway_ends(segments)
+
+    assert diagram.idents == (("02L", "20R"), ("02C", "20C"))
+    assert diagram.closed.tolist() == [False, True]
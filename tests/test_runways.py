@@ -1,7 +1,7 @@
 import pandas as pd
 import pytest
 
-from zc_flightplan_toolkit.runways import DMAirportRunwayInfo
+from zc_flightplan_toolkit.runways import DMAirportRunwayInfo, DMColumns
 
 
 @pytest.mark.parametrize(
@@ -23,3 +23,34 @@ def test_get_runway_info(icao: str, runway: str):
     info = DMAirportRunwayInfo()
     runway_info = info.get_runway_info(icao, runway)
     assert isinstance(runway_info.displaced_threshold, int)
+
+
+def test_get_runway_segments_drops_runways_without_coordinates(tmp_path):
+    runways = pd.DataFrame(
+        [
+            {"airport_ident": "WSSS", "le_ident": "02L", "he_ident": "20R"},
+            {"airport_ident": "WSSS", "le_ident": "02C", "he_ident": "20C"},
+            {"airport_ident": "WMKK", "le_ident": "14L", "he_ident": "32R"},
+        ]
+    ).reindex(columns=[col.value for col in DMColumns])
+    runways.loc[[0, 2], "le_latitude_deg"] = [1.33, 2.73]
+    runways.loc[[0, 2], "le_longitude_deg"] = [103.98, 101.70]
+    runways.loc[[0, 2], "he_latitude_deg"] = [1.37, 2.76]
+    runways.loc[[0, 2], "he_longitude_deg"] = [104.00, 101.72]
+    runways_csv = tmp_path / "runways.csv"
+    runways.to_csv(runways_csv, index=False)
+
+    segments = DMAirportRunwayInfo(str(runways_csv)).get_runway_segments("wsss")
+
+    assert segments[DMColumns.LEFT_END_IDENT.name].tolist() == ["02L"]
+    assert segments[DMColumns.RIGHT_END_LATITUDE.name].tolist() == [1.37]
+
+
+def test_runway_data_is_read_on_first_use(tmp_path):
+    runways_csv = tmp_path / "runways.csv"
+    info = DMAirportRunwayInfo(str(runways_csv))
+    pd.DataFrame(columns=[col.value for col in DMColumns]).to_csv(
+        runways_csv, index=False
+    )
+
+    assert info.get_runway_segments("WSSS").empty
@@ -0,0 +1,158 @@
+import json
+import threading
+from datetime import timedelta
+from typing import Iterator
+
+import pandas as pd
+import pytest
+import requests
+from pytest_mock import MockerFixture
+
+from zc_flightplan_toolkit.api import (
+    BaseAPI,
+    CheckWxAPI,
+    FlightAwareAPI,
+    make_response_cache,
+)
+from zc_flightplan_toolkit.cli import ToolkitClients
+from zc_flightplan_toolkit.service import ToolkitHTTPServer, ToolkitService
+
+
+@pytest.fixture
+def service() -> Iterator[ToolkitService]:
+    clients = ToolkitClients(
+        "aero-key",
+        "checkwx-key",
+        response_cache=make_response_cache(timedelta(minutes=1), timedelta(minutes=5)),
+    )
+    toolkit_service = ToolkitService(clients, workers=4, prefetch=False)
+    yield toolkit_service
+    toolkit_service.stop()
+
+
+@pytest.fixture
+def server_url(service: ToolkitService) -> Iterator[str]:
+    server = ToolkitHTTPServer(("127.0.0.1", 0), service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize(
+    "method, path, expected_status",
+    [
+        ("GET", "/health", 200),
+        ("GET", "/health/", 200),
+        ("GET", "/unknown", 404),
+        ("POST", "/health", 405),
+        ("GET", "/metars", 400),
+        ("POST", "/batch/unknown", 404),
+    ],
+)
+def test_handle_routes_requests(
+    method: str, path: str, expected_status: int, service: ToolkitService
+):
+    assert service.handle(method, path, {}).status == expected_status
+
+
+def test_handle_metrics(service: ToolkitService):
+    response = service.handle("GET", "/metrics", {})
+
+    assert response.status == 200
+    assert response.content_type.startswith("text/plain")
+    assert isinstance(response.body, bytes)
+    assert b'zc_flightplan_cache_hit_ratio{cache="response"}' in response.body
+
+
+def test_handle_airport(service: ToolkitService, mocker: MockerFixture):
+    mocker.patch.object(
+        FlightAwareAPI,
+        "get_airport_information",
+        return_value=pd.DataFrame({"code_icao": ["WSSS"], "elevation": [22]}),
+    )
+
+    response = service.handle("GET", "/airports/WSSS", {})
+
+    assert response.status == 200
+    assert isinstance(response.body, bytes)
+    assert json.loads(response.body) == [{"code_icao": "WSSS", "elevation": 22}]
+
+
+def test_handle_upstream_error(service: ToolkitService, mocker: MockerFixture):
+    mocker.patch.object(CheckWxAPI, "get_taf", side_effect=ConnectionError("down"))
+
+    response = service.handle("GET", "/taf/WSSS", {})
+
+    assert response.status == 502
+    assert isinstance(response.body, bytes)
+    assert json.loads(response.body) == {"error": "down"}
+
+
+def test_clients_share_warm_cache(service: ToolkitService, mocker: MockerFixture):
+    request_mock = mocker.patch.object(
+        BaseAPI,
+        "_request",
+        return_value=mocker.Mock(
+            ok=True,
+            text=json.dumps({"data": [{"icao": "WSSS", "raw_text": "WSSS 190000Z"}]}),
+        ),
+    )
+
+    responses = [service.handle("GET", "/metar/WSSS", {}) for _ in range(3)]
+
+    assert {response.body for response in responses} == {b'{"metar": "WSSS 190000Z"}'}
+    assert request_mock.call_count == 1
+
+
+def test_batch_streams_results_in_query_order(server_url: str, mocker: MockerFixture):
+    def get_taf(_, icao: str) -> str:
+        if icao == "XXXX":
+            raise ValueError("unknown station")
+        return f"TAF {icao}"
+
+    mocker.patch.object(CheckWxAPI, "get_taf", get_taf)
+
+    response = requests.post(
+        f"{server_url}/batch/taf",
+        json={"queries": ["WSSS", "XXXX", "WMKK"]},
+        stream=True,
+        timeout=5,
+    )
+
+    assert response.headers["Transfer-Encoding"] == "chunked"
+    lines = [json.loads(line) for line in response.iter_lines()]
+    assert lines == [
+        {"query": "WSSS", "records": [{"taf": "TAF WSSS"}]},
+        {"query": "XXXX", "error": "unknown station"},
+        {"query": "WMKK", "records": [{"taf": "TAF WMKK"}]},
+    ]
+
+
+def test_route_pages_stream_one_route_per_line(server_url: str, mocker: MockerFixture):
+    iter_route_info_mock = mocker.patch.object(
+        FlightAwareAPI,
+        "iter_route_info",
+        return_value=iter(
+            [pd.DataFrame({"route": ["A", "B"]}), pd.DataFrame({"route": ["C"]})]
+        ),
+    )
+
+    response = requests.get(
+        f"{server_url}/routes/WSSS/WMKK/pages?max_pages=2", stream=True, timeout=5
+    )
+
+    assert [json.loads(line)["route"] for line in response.iter_lines()] == [
+        "A",
+        "B",
+        "C",
+    ]
+    iter_route_info_mock.assert_called_once_with("WSSS", "WMKK", max_pages=2)
+
+
+def test_server_rejects_bad_batch_body(server_url: str):
+    response = requests.post(f"{server_url}/batch/taf", data=b"not json", timeout=5)
+
+    assert response.status_code == 400
+    assert "invalid json body" in response.json()["error"]
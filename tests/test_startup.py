@@ -0,0 +1,25 @@
+from zc_flightplan_toolkit.startup import StartupPhase, StartupTimer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_startup_timer_records_phases():
+    clock = FakeClock()
+    startup = StartupTimer(started_at=9.5, clock=clock)
+    startup.mark("imports")
+    clock.now = 10.25
+    startup.mark("window setup")
+
+    assert startup.phases == [
+        StartupPhase("imports", 0.5),
+        StartupPhase("window setup", 0.25),
+    ]
+    assert startup.total == 0.75
+    total_line = startup.report().splitlines()[-1]
+    assert total_line.startswith("total") and total_line.endswith(" 750.0 ms")
@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.geodesy import haversine_distance
+from zc_flightplan_toolkit.track_geometry import (
+    FixDatabase,
+    compute_track_distances,
+    parse_coordinate_waypoint,
+    resolve_waypoints,
+)
+from zc_flightplan_toolkit.tracks import NATTrack, PacificTrack
+
+VALID_FROM = datetime(2024, 1, 14, 11, 30, tzinfo=timezone.utc)
+VALID_TO = datetime(2024, 1, 14, 19, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def fix_database() -> FixDatabase:
+    fixes = pd.DataFrame(
+        {
+            "ident": ["CARPE", "DOGAL", "ORNAI"],
+            "latitude": [50.5, 54.0, 46.0],
+            "longitude": [-54.0, -15.0, -134.0],
+        }
+    )
+    return FixDatabase(fixes)
+
+
+@pytest.mark.parametrize(
+    "waypoint, coordinate",
+    [
+        ("57/20", (57.0, -20.0)),
+        ("5730/20", (57.5, -20.0)),
+        ("5720N", (57.0, -20.0)),
+        ("57N20", (57.0, -120.0)),
+        ("5720E", (57.0, 20.0)),
+        ("36N160E", (36.0, 160.0)),
+        ("4530N15000W", (45.5, -150.0)),
+        ("DOGAL", None),
+    ],
+)
+def test_parse_coordinate_waypoint(waypoint: str, coordinate):
+    assert parse_coordinate_waypoint(waypoint) == coordinate
+
+
+def test_resolve_waypoints(fix_database: FixDatabase):
+    coordinates = resolve_waypoints(["carpe", "51/50", "UNKWN"], fix_database)
+    np.testing.assert_allclose(coordinates[:2], [[50.5, -54.0], [51.0, -50.0]])
+    assert np.isnan(coordinates[2]).all()
+
+
+def test_compute_track_distances(fix_database: FixDatabase):
+    tracks = [
+        NATTrack(
+            "A",
+            ("CARPE", "51/50", "UNKWN", "54/20", "DOGAL"),
+            (),
+            (),
+            VALID_FROM,
+            VALID_TO,
+        ),
+        NATTrack("B", ("51/50", "52/40"), (), (), VALID_FROM, VALID_TO),
+        PacificTrack(
+            "1", ("36N160E", "40N170E", "43N180E", "ORNAI"), VALID_FROM, VALID_TO
+        ),
+    ]
+    distances = compute_track_distances(tracks, fix_database)
+
+    assert distances["track"].tolist() == ["A", "B", "1"]
+    assert distances["unresolved_waypoints"].tolist() == [1, 0, 0]
+    assert [len(legs) for legs in distances["leg_distances_nm"]] == [3, 1, 3]
+    expected_b = haversine_distance(51, -50, 52, -40)
+    assert distances["total_distance_nm"].iloc[1] == pytest.approx(expected_b)
+    np.testing.assert_allclose(
+        distances["total_distance_nm"],
+        [legs.sum() for legs in distances["leg_distances_nm"]],
+    )
+
+
+def test_compute_track_distances_with_city_pair():
+    track = NATTrack("B", ("51/50", "52/40"), (), (), VALID_FROM, VALID_TO)
+    distances = compute_track_distances(
+        [track], origin=(40.6, -73.8), destination=(51.5, -0.5)
+    )
+    assert len(distances["leg_distances_nm"].iloc[0]) == 3
@@ -1,4 +1,83 @@
-from zc_flightplan_toolkit.tracks import get_north_atlantic_tracks, get_pacific_tracks
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from pytest_mock import MockerFixture
+
+from zc_flightplan_toolkit.tracks import (
+    clear_track_cache,
+    get_north_atlantic_track_records,
+    get_north_atlantic_tracks,
+    get_pacific_track_records,
+    get_pacific_tracks,
+    get_pacific_tracks_for_city_pair,
+    parse_north_atlantic_tracks,
+    parse_pacific_tracks,
+)
+
+NAT_MESSAGE_HTML = """<html><body><table>
+<tr><td>North Atlantic Tracks</td></tr>
+<tr><td><pre>
+141452 CZQXZQZX
+(NAT-1/2 TRACKS FLS 310/390 INCLUSIVE
+JAN 14/1130Z TO JAN 14/1900Z
+PART ONE OF TWO PARTS-
+A CARPE REDBY 51/50 52/40 53/30 54/20 DOGAL BEXET
+EAST LVLS NIL
+WEST LVLS 310 320 330 340 350 360 370 380 390
+EUR RTS WEST NIL
+NAR NIL-
+B JOOPY 50/50 51/40 52/30 53/20 MALOT GISTI
+EAST LVLS NIL
+WEST LVLS 310 330 350 370 390
+EUR RTS WEST NIL
+NAR NIL-
+END OF PART ONE OF TWO PARTS)
+141453 CZQXZQZX
+(NAT-2/2 TRACKS FLS 310/390 INCLUSIVE
+JAN 14/1130Z TO JAN 14/1900Z
+PART TWO OF TWO PARTS-
+C MUSAK 49/50 50/40 51/30 52/20 LIMRI XETBO
+EAST LVLS 320 340
+WEST LVLS NIL
+EUR RTS WEST NIL
+NAR NIL-
+REMARKS:
+1.TMI IS 014 AND OPERATORS ARE REMINDED TO INCLUDE THE
+TMI NUMBER AS PART OF THE OCEANIC CLEARANCE READ BACK.
+END OF PART TWO OF TWO PARTS)
+</pre></td></tr>
+</table></body></html>"""
+
+PACIFIC_TRACKS_HTML = """<html><body>Data Current as of: Sat, 14 Oct 2023 12:00:00 GMT<br>
+PACOTS TRACK 1<pre>
+KZAK 141000
+(TDM TRK 1 231014130001
+2310141900 2310150800
+JEBBY 38N150E 41N160E 44N170E 46N180E 48N170W 49N160W 48N150W
+46N140W ORNAI SIMLU
+RTS/RJAA NATES R591 JEBBY
+ORNAI SIMLU KSEA
+RMK/0)</pre>
+PACOTS TRACK A<pre>
+RJJJ 141100
+(TDM TRK A 231014110001
+2310141100 2310142100
+DINTY 45N150W 43N160W 40N170W 37N180E 34N170E 31N160E SMOLT
+FLS 310-390
+RTS/KSFO OSI DINTY
+SMOLT OTR15 RJAA
+RMK/0)</pre>
+End of Report</body></html>"""
+
+
+@pytest.fixture(autouse=True)
+def empty_track_cache():
+    clear_track_cache()
+    yield
+    clear_track_cache()
 
 
 def test_get_north_atlantic_tracks():
@@ -10,3 +89,118 @@ def test_get_north_atlantic_tracks():
 def test_get_pacific_tracks():
     tracks = get_pacific_tracks()
     assert "PACOTS TRACK" in tracks
+
+
+def test_parse_north_atlantic_tracks():
+    reference_time = datetime(2024, 1, 14, 12, tzinfo=timezone.utc)
+    tracks = parse_north_atlantic_tracks(NAT_MESSAGE_HTML, reference_time)
+
+    assert [track.letter for track in tracks] == ["A", "B", "C"]
+    assert tracks[0].waypoints[:3] == ("CARPE", "REDBY", "51/50")
+    assert tracks[0].east_levels == ()
+    assert tracks[1].west_levels == (310, 330, 350, 370, 390)
+    assert tracks[2].east_levels == (320, 340)
+    assert tracks[2].valid_from == datetime(2024, 1, 14, 11, 30, tzinfo=timezone.utc)
+    assert tracks[2].valid_to == datetime(2024, 1, 14, 19, tzinfo=timezone.utc)
+    assert {track.tmi for track in tracks} == {"014"}
+
+
+def test_parse_north_atlantic_tracks_infers_year_across_new_year():
+    reference_time = datetime(2023, 12, 31, 23, tzinfo=timezone.utc)
+    tracks = parse_north_atlantic_tracks(NAT_MESSAGE_HTML, reference_time)
+    assert tracks[0].valid_from.year == 2024
+
+
+def test_north_atlantic_tracks_are_cached_until_expiry(mocker: MockerFixture):
+    now = datetime.now(timezone.utc)
+    validity = f"{(now - timedelta(hours=1)):%b %d/%H%MZ} TO {(now + timedelta(hours=6)):%b %d/%H%MZ}"
+    message = NAT_MESSAGE_HTML.replace("JAN 14/1130Z TO JAN 14/1900Z", validity.upper())
+    response = mocker.Mock(status_code=200, text=message)
+    get_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=response,
+    )
+    tracks = get_north_atlantic_track_records("mock_url")
+    display_html = get_north_atlantic_tracks("mock_url")
+
+    assert len(tracks) == 3
+    assert "EAST LVLS" in display_html
+    get_mock.assert_called_once()
+
+    get_north_atlantic_track_records("mock_url", refresh=True)
+    assert get_mock.call_count == 2
+
+
+def test_parse_pacific_tracks():
+    tracks = parse_pacific_tracks(PACIFIC_TRACKS_HTML)
+
+    assert [track.track_id for track in tracks] == ["1", "A"]
+    assert tracks[0].fixes[0] == "JEBBY"
+    assert tracks[0].fixes[-1] == "SIMLU"
+    assert len(tracks[0].fixes) == 11
+    assert tracks[0].valid_from == datetime(2023, 10, 14, 19, tzinfo=timezone.utc)
+    assert tracks[0].valid_to == datetime(2023, 10, 15, 8, tzinfo=timezone.utc)
+    assert tracks[0].airports == ("RJAA", "KSEA")
+    assert tracks[0].flight_levels == ()
+    assert tracks[1].flight_levels == (310, 390)
+    assert tracks[1].fixes[-1] == "SMOLT"
+
+
+def test_pacific_tracks_are_cached_and_filtered_by_city_pair(mocker: MockerFixture):
+    response = mocker.Mock(status_code=200, text=PACIFIC_TRACKS_HTML)
+    post_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        return_value=response,
+    )
+    mocker.patch(
+        "zc_flightplan_toolkit.tracks._get_cache_expiry",
+        return_value=datetime.max.replace(tzinfo=timezone.utc),
+    )
+
+    assert len(get_pacific_track_records("mock_url")) == 2
+    city_pair_tracks = get_pacific_tracks_for_city_pair("kseA", "RJAA", "mock_url")
+    display_html = get_pacific_tracks("mock_url")
+
+    assert [track.track_id for track in city_pair_tracks] == ["1"]
+    assert display_html.startswith("Data Current as of:")
+    post_mock.assert_called_once()
+    assert post_mock.call_args.args[0] == "POST"
+    assert post_mock.call_args.kwargs["timeout"] == 10
+
+
+def test_slow_pacific_fetch_does_not_block_north_atlantic_tracks(
+    mocker: MockerFixture,
+):
+    pacific_requested = threading.Event()
+    release_pacific = threading.Event()
+    pacific_released: List[bool] = []
+    nat_response = mocker.Mock(status_code=200, text=NAT_MESSAGE_HTML)
+    pacific_response = mocker.Mock(status_code=200, text=PACIFIC_TRACKS_HTML)
+
+    def request(method: str, *_, **__):
+        if method == "POST":
+            pacific_requested.set()
+            pacific_released.append(release_pacific.wait(5))
+            return pacific_response
+        return nat_response
+
+    request_mock = mocker.patch(
+        "zc_flightplan_toolkit.transport.requests.Session.request",
+        side_effect=request,
+    )
+    mocker.patch(
+        "zc_flightplan_toolkit.tracks._get_cache_expiry",
+        return_value=datetime.max.replace(tzinfo=timezone.utc),
+    )
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        pacific_calls = [
+            executor.submit(get_pacific_track_records, "pacific_url") for _ in range(2)
+        ]
+        assert pacific_requested.wait(5)
+
+        assert len(get_north_atlantic_track_records("nat_url")) == 3
+        release_pacific.set()
+
+        assert [len(call.result()) for call in pacific_calls] == [2, 2]
+    assert pacific_released == [True]
+    assert request_mock.call_count == 2
@@ -0,0 +1,225 @@
+import json
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Mapping, Optional
+
+import pytest
+import requests
+from requests import Response
+
+from zc_flightplan_toolkit.api import CheckWxAPI, ClowdIoDATISAPI
+from zc_flightplan_toolkit.metrics import MetricsRegistry
+from zc_flightplan_toolkit.tracks import clear_track_cache, get_pacific_track_records
+from zc_flightplan_toolkit.transport import (
+    MeteredTransport,
+    NotRecordedError,
+    RecordingTransport,
+    ReplayTransport,
+    RequestFields,
+    endpoint_labels,
+    fixed_latency,
+    read_archive,
+    set_default_transport,
+)
+
+PACIFIC_TRACKS_HTML = """<html><body>
+(TDM TRK A 231014110001
+2310141100 2310142100
+DINTY 45N150W 43N160W 40N170W 37N180E 34N170E 31N160E SMOLT
+RTS/KSFO OSI DINTY
+SMOLT OTR15 RJAA
+RMK/0)
+</body></html>"""
+
+
+class FakeTransport:
+    """Answers from a url to body map, counting requests"""
+
+    def __init__(self, bodies: Dict[str, bytes]):
+        self.bodies = bodies
+        self.requests: List[str] = []
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        self.requests.append(url)
+        response = Response()
+        response.status_code = 429 if url.endswith("/throttled") else 200
+        response._content = self.bodies[url]
+        return response
+
+
+@pytest.fixture
+def archive_path(tmp_path: Path) -> str:
+    return str(tmp_path / "traffic.jsonl.gz")
+
+
+@pytest.fixture
+def empty_track_cache() -> Iterator[None]:
+    clear_track_cache()
+    yield
+    clear_track_cache()
+
+
+def test_record_then_replay(archive_path: str):
+    metar = {"data": [{"raw_text": "WSSS 190000Z 01005KT 9999 FEW018 28/24 Q1010"}]}
+    fake_transport = FakeTransport(
+        {"https://checkwx.test/metar/WSSS/decoded": json.dumps(metar).encode()}
+    )
+    with RecordingTransport(archive_path, fake_transport) as recording:
+        recorded_metar = CheckWxAPI(
+            "https://checkwx.test", api_key="secret", transport=recording
+        ).get_metar("WSSS")
+
+    replayed_metar = CheckWxAPI(
+        "https://checkwx.test", api_key="other", transport=ReplayTransport(archive_path)
+    ).get_metar("WSSS")
+
+    assert replayed_metar == recorded_metar == metar["data"][0]["raw_text"]
+    assert len(fake_transport.requests) == 1
+
+
+def test_archive_keeps_no_request_headers(archive_path: str):
+    fake_transport = FakeTransport({"https://checkwx.test/metar/WSSS/decoded": b"{}"})
+    with RecordingTransport(archive_path, fake_transport) as recording:
+        recording.request(
+            "GET",
+            "https://checkwx.test/metar/WSSS/decoded",
+            params={"b": 2, "a": "1"},
+            headers={"X-API-Key": "secret"},
+        )
+
+    (exchange,) = read_archive(archive_path)
+    assert exchange.params == (("a", "1"), ("b", "2"))
+    assert "secret" not in json.dumps(exchange._asdict(), default=str)
+
+
+def test_replay_cycles_through_recordings(archive_path: str):
+    fake_transport = FakeTransport({"http://datis.test/api/KJFK": b"first"})
+    with RecordingTransport(archive_path, fake_transport) as recording:
+        recording.request("GET", "http://datis.test/api/KJFK")
+        fake_transport.bodies["http://datis.test/api/KJFK"] = b"second"
+        recording.request("GET", "http://datis.test/api/KJFK")
+
+    replay = ReplayTransport(archive_path)
+    replayed = [
+        replay.request("GET", "http://datis.test/api/KJFK").text for _ in range(3)
+    ]
+
+    assert replayed == ["first", "second", "first"]
+    with pytest.raises(NotRecordedError):
+        replay.request("GET", "http://datis.test/api/KLAX")
+
+
+def test_replay_simulates_latency_and_timeouts(archive_path: str):
+    fake_transport = FakeTransport({"http://datis.test/api/KJFK": b"[]"})
+    with RecordingTransport(archive_path, fake_transport) as recording:
+        recording.request("GET", "http://datis.test/api/KJFK")
+
+    started_at = time.perf_counter()
+    ReplayTransport(archive_path, fixed_latency(0.05)).request(
+        "GET", "http://datis.test/api/KJFK"
+    )
+    assert time.perf_counter() - started_at >= 0.05
+
+    with pytest.raises(requests.Timeout):
+        ReplayTransport(archive_path, fixed_latency(1)).request(
+            "GET", "http://datis.test/api/KJFK", timeout=0.01
+        )
+
+
+def test_default_transport_serves_datis_and_tracks(
+    archive_path: str, empty_track_cache: None
+):
+    datis = [{"airport": "KJFK", "type": "arr", "code": "A", "datis": "INFO A"}]
+    fake_transport = FakeTransport(
+        {
+            "http://datis.test/api/all": json.dumps(datis).encode(),
+            "http://tracks.test/pacific": PACIFIC_TRACKS_HTML.encode(),
+        }
+    )
+    with RecordingTransport(archive_path, fake_transport) as recording:
+        previous_transport = set_default_transport(recording)
+        try:
+            ClowdIoDATISAPI("http://datis.test/api/").request_all_datis()
+            get_pacific_track_records("http://tracks.test/pacific")
+        finally:
+            set_default_transport(previous_transport)
+    clear_track_cache()
+
+    previous_transport = set_default_transport(ReplayTransport(archive_path))
+    try:
+        all_datis = ClowdIoDATISAPI("http://datis.test/api/").request_all_datis()
+        tracks = get_pacific_track_records("http://tracks.test/pacific")
+    finally:
+        set_default_transport(previous_transport)
+
+    assert all_datis["code"].tolist() == ["A"]
+    assert [track.track_id for track in tracks] == ["A"]
+
+
+@pytest.mark.parametrize(
+    "url, expected_labels",
+    [
+        (
+            "https://aeroapi.flightaware.com/aeroapi/airports/WSSS/routes/KJFK",
+            ("aeroapi.flightaware.com", "/aeroapi/airports/{icao}/routes/{icao}"),
+        ),
+        (
+            "https://api.checkwx.com/metar/WSSS,wmkk,KJFK/decoded",
+            ("api.checkwx.com", "/metar/{icao}/decoded"),
+        ),
+        ("https://datis.clowd.io/api/all", ("datis.clowd.io", "/api/all")),
+        (
+            "https://www.notams.faa.gov/common/nat.html",
+            ("www.notams.faa.gov", "/common/nat.html"),
+        ),
+    ],
+)
+def test_endpoint_labels_collapse_airports(url: str, expected_labels: tuple):
+    assert endpoint_labels(url) == expected_labels
+
+
+def test_metered_transport_records_requests():
+    registry = MetricsRegistry()
+    fake_transport = FakeTransport(
+        {
+            "http://datis.test/api/KJFK": b"[]",
+            "http://datis.test/api/KLAX": b"[{}]",
+            "http://datis.test/throttled": b"",
+        }
+    )
+    metered_transport = MeteredTransport(fake_transport, registry)
+
+    for url in fake_transport.bodies:
+        metered_transport.request("GET", url)
+    with pytest.raises(KeyError):
+        metered_transport.request("GET", "http://datis.test/missing")
+
+    counters = registry.counters()
+    datis_labels = (("endpoint", "/api/{icao}"), ("host", "datis.test"))
+    ok_labels = (*datis_labels, ("status", "200"))
+    assert counters[("upstream_requests_total", ok_labels)] == 2
+    assert counters[("upstream_response_bytes_total", datis_labels)] == 6
+    throttled_labels = (("endpoint", "/throttled"), ("host", "datis.test"))
+    assert counters[("upstream_throttled_total", throttled_labels)] == 1
+    throttled_error_labels = (
+        ("endpoint", "/throttled"),
+        ("error", "429"),
+        ("host", "datis.test"),
+    )
+    assert counters[("upstream_errors_total", throttled_error_labels)] == 1
+    missing_error_labels = (
+        ("endpoint", "/missing"),
+        ("error", "KeyError"),
+        ("host", "datis.test"),
+    )
+    assert counters[("upstream_errors_total", missing_error_labels)] == 1
+    latencies = registry.histograms()
+    assert latencies[("upstream_request_seconds", datis_labels)].observations == 2
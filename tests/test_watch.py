@@ -0,0 +1,186 @@
+from datetime import timedelta
+from typing import Dict, List, Sequence, cast
+
+import pandas as pd
+import pytest
+
+from zc_flightplan_toolkit.api import DATISAPI, WeatherAPI
+from zc_flightplan_toolkit.watch import (
+    METAR_UNAVAILABLE,
+    NO_METAR,
+    AirportWatchScheduler,
+    WatchColumns,
+    WatchSource,
+    parse_runways_in_use,
+    summarize_datis,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeWeatherAPI:
+    def __init__(self):
+        self.metars = {"KJFK": "KJFK 191751Z 31012KT", "KLAX": "KLAX 191753Z 25008KT"}
+        self.requests: List[List[str]] = []
+        self.fail = False
+
+    def get_metars(self, icaos: Sequence[str]) -> Dict[str, str]:
+        self.requests.append(list(icaos))
+        if self.fail:
+            raise ConnectionError("checkwx down")
+        return {icao: self.metars[icao] for icao in icaos if icao in self.metars}
+
+
+class FakeDATISAPI:
+    def __init__(self):
+        self.records = [
+            {"airport": "KJFK", "type": "arr", "code": "A", "datis": "LDG RWY 4R."},
+            {"airport": "KJFK", "type": "dep", "code": "B", "datis": "DEPG RWY 4L."},
+        ]
+        self.requests = 0
+
+    def request_all_datis(self) -> pd.DataFrame:
+        self.requests += 1
+        return pd.DataFrame(self.records)
+
+
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture
+def weather_api() -> FakeWeatherAPI:
+    return FakeWeatherAPI()
+
+
+@pytest.fixture
+def datis_api() -> FakeDATISAPI:
+    return FakeDATISAPI()
+
+
+@pytest.fixture
+def scheduler(
+    weather_api: FakeWeatherAPI, datis_api: FakeDATISAPI, clock: FakeClock
+) -> AirportWatchScheduler:
+    return AirportWatchScheduler(
+        cast(WeatherAPI, weather_api),
+        cast(DATISAPI, datis_api),
+        refresh_intervals={
+            WatchSource.METAR: timedelta(minutes=5),
+            WatchSource.DATIS: timedelta(minutes=2),
+        },
+        clock=clock,
+    )
+
+
+@pytest.mark.parametrize(
+    "atis_text, runways",
+    [
+        ("SIMUL ILS RWY 4R AND RWY 4L APCHS. DEPG RWY 31L.", "04R, 04L, 31L"),
+        ("LANDING RUNWAYS 22L, 22R. RWY 13L/31R CLSD.", "22L, 22R"),
+        ("NOTAMS... BIRD ACTIVITY VICINITY OF ARPT.", ""),
+    ],
+)
+def test_parse_runways_in_use(atis_text: str, runways: str):
+    assert parse_runways_in_use(atis_text) == runways
+
+
+def test_summarize_datis_combines_arrival_and_departure(datis_api: FakeDATISAPI):
+    summary = summarize_datis(datis_api.request_all_datis())
+
+    assert summary.loc["KJFK", WatchColumns.ATIS_CODE.value] == "A/B"
+    assert summary.loc["KJFK", WatchColumns.RUNWAYS_IN_USE.value] == "04R, 04L"
+
+
+def test_sources_are_fetched_once_for_all_subscribers(
+    scheduler: AirportWatchScheduler,
+    weather_api: FakeWeatherAPI,
+    datis_api: FakeDATISAPI,
+):
+    for _ in range(5):
+        scheduler.subscribe(["KJFK", "klax"], lambda snapshot: None)
+
+    scheduler.run_once()
+    scheduler.run_once()
+
+    assert weather_api.requests == [["KJFK", "KLAX"]]
+    assert datis_api.requests == 1
+    snapshot = scheduler.get_snapshot(["KJFK"])
+    assert snapshot.loc[0, WatchColumns.ATIS_CODE.value] == "A/B"
+
+
+def test_sources_refresh_on_their_own_interval(
+    scheduler: AirportWatchScheduler,
+    weather_api: FakeWeatherAPI,
+    datis_api: FakeDATISAPI,
+    clock: FakeClock,
+):
+    scheduler.subscribe(["KJFK"], lambda snapshot: None)
+    scheduler.run_once()
+
+    clock.now = 150
+    assert scheduler.run_once() == [WatchSource.DATIS]
+    clock.now = 300
+    assert scheduler.run_once() == [WatchSource.METAR, WatchSource.DATIS]
+    assert len(weather_api.requests) == 2
+    assert datis_api.requests == 3
+
+
+def test_new_airport_is_fetched_without_waiting_for_interval(
+    scheduler: AirportWatchScheduler, weather_api: FakeWeatherAPI
+):
+    subscription_id = scheduler.subscribe(["KJFK"], lambda snapshot: None)
+    scheduler.run_once()
+    scheduler.update_subscription(subscription_id, ["KJFK", "KLAX"])
+    scheduler.run_once()
+
+    assert weather_api.requests == [["KJFK"], ["KLAX"]]
+    assert scheduler.get_snapshot(["KLAX"])["metar"].tolist() == [
+        weather_api.metars["KLAX"]
+    ]
+
+
+def test_subscribers_only_notified_of_changes(
+    scheduler: AirportWatchScheduler, weather_api: FakeWeatherAPI, clock: FakeClock
+):
+    jfk_snapshots: List[pd.DataFrame] = []
+    lax_snapshots: List[pd.DataFrame] = []
+    scheduler.subscribe(["KJFK"], jfk_snapshots.append)
+    scheduler.subscribe(["KLAX"], lax_snapshots.append)
+    scheduler.run_once()
+
+    weather_api.metars["KJFK"] = "KJFK 191851Z 30015KT"
+    clock.now = 300
+    scheduler.run_once()
+
+    assert len(jfk_snapshots) == 3
+    assert len(lax_snapshots) == 2
+    assert jfk_snapshots[-1].loc[0, "metar"] == "KJFK 191851Z 30015KT"
+
+
+def test_failed_refresh_keeps_previous_values(
+    scheduler: AirportWatchScheduler, weather_api: FakeWeatherAPI, clock: FakeClock
+):
+    subscription_id = scheduler.subscribe(["KJFK", "EGLL"], lambda snapshot: None)
+    scheduler.run_once()
+
+    weather_api.fail = True
+    scheduler.update_subscription(subscription_id, ["KJFK", "EGLL", "KLAX"])
+    clock.now = 300
+    scheduler.run_once()
+    scheduler.run_once()
+
+    snapshot = scheduler.get_snapshot(["KJFK", "EGLL", "KLAX"])
+    assert snapshot["metar"].tolist() == [
+        "KJFK 191751Z 31012KT",
+        NO_METAR,
+        METAR_UNAVAILABLE,
+    ]
+    assert len(weather_api.requests) == 2
@@ -0,0 +1,232 @@
+import re
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from zc_flightplan_toolkit.constants import FlightAwareAirportColumns
+
+SEARCH_STOPWORDS = frozenset(
+    {"AIRPORT", "INTERNATIONAL", "INTL", "AIRFIELD", "AERODROME", "FIELD", "THE"}
+)
+
+CODE_COLUMNS = (
+    FlightAwareAirportColumns.ICAO,
+    FlightAwareAirportColumns.IATA,
+    FlightAwareAirportColumns.LID,
+)
+
+MIN_WORD_SIMILARITY = 0.3
+
+WORD_PREFIX_SCORE = 0.85
+
+_NON_ALPHANUMERIC = re.compile(r"[^A-Z0-9]+")
+
+
+class AirportMatch(NamedTuple):
+    code_icao: str
+    code_iata: str
+    name: str
+    city: str
+    score: float
+
+
+class AirportSearchIndex:
+    """Ranked fuzzy search over airports in the FlightAwareAirportColumns schema
+
+    Codes (ICAO, IATA, LID) are matched by prefix on a sorted code list, names and
+    cities by trigram similarity of their words. Rows earlier in the frame win ties,
+    DMAirportInfo.data is already ordered from large to small airports.
+    """
+
+    def __init__(self, airports: pd.DataFrame):
+        self._airports = airports.reset_index(drop=True)
+        self._icao = self._get_text_column(FlightAwareAirportColumns.ICAO)
+        self._iata = self._get_text_column(FlightAwareAirportColumns.IATA)
+        self._names = self._get_text_column(FlightAwareAirportColumns.NAME)
+        self._cities = self._get_text_column(FlightAwareAirportColumns.CITY)
+
+        (
+            self._codes,
+            self._code_positions,
+            self._code_lengths,
+        ) = self._build_code_index()
+        (
+            self._words,
+            self._word_airport_offsets,
+            self._word_airports,
+            self._trigram_words,
+            self._word_trigram_counts,
+        ) = self._build_word_index()
+
+    def __len__(self) -> int:
+        return len(self._airports)
+
+    def search(self, query: str, limit: int = 10) -> List[AirportMatch]:
+        scores = self._score_airports(query)
+        if limit <= 0 or not scores.any():
+            return []
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > limit:
+            top = np.argpartition(-scores[candidates], limit - 1)[:limit]
+            candidates = candidates[top]
+        ranked = candidates[np.lexsort((candidates, -scores[candidates]))]
+        return [
+            AirportMatch(
+                code_icao=self._icao[position],
+                code_iata=self._iata[position],
+                name=self._names[position],
+                city=self._cities[position],
+                score=float(scores[position]),
+            )
+            for position in ranked
+        ]
+
+    def reconcile(self, queries: Iterable[str]) -> pd.DataFrame:
+        """Returns the best matching airport for each (possibly messy) airport string"""
+        rows = []
+        for query in queries:
+            matches = self.search(query, limit=1)
+            best_match = matches[0] if matches else AirportMatch("", "", "", "", 0.0)
+            rows.append({"query": query, **best_match._asdict()})
+        return pd.DataFrame(rows, columns=["query", *AirportMatch._fields])
+
+    def _score_airports(self, query: str) -> np.ndarray:
+        normalized_query = _normalize(query)
+        scores = np.zeros(len(self._airports))
+        if not normalized_query:
+            return scores
+
+        compact_query = normalized_query.replace(" ", "")
+        start = bisect_left(self._codes, compact_query)
+        end = bisect_right(self._codes, compact_query + "\uffff")
+        np.maximum.at(
+            scores,
+            self._code_positions[start:end],
+            1.0 + len(compact_query) / self._code_lengths[start:end],
+        )
+
+        query_words = [
+            word for word in normalized_query.split() if word not in SEARCH_STOPWORDS
+        ]
+        if query_words:
+            text_scores = sum(
+                self._score_word(query_word) for query_word in query_words
+            ) / len(query_words)
+            np.maximum(scores, text_scores, out=scores)
+        return scores
+
+    def _score_word(self, query_word: str) -> np.ndarray:
+        query_trigrams = _get_trigrams(query_word)
+        postings = [
+            self._trigram_words[trigram]
+            for trigram in query_trigrams
+            if trigram in self._trigram_words
+        ]
+        word_ids = np.empty(0, dtype=np.int64)
+        similarities = np.empty(0)
+        if postings:
+            word_ids, shared = np.unique(np.concatenate(postings), return_counts=True)
+            similarities = (
+                2 * shared / (len(query_trigrams) + self._word_trigram_counts[word_ids])
+            )
+            keep = similarities >= MIN_WORD_SIMILARITY
+            word_ids, similarities = word_ids[keep], similarities[keep]
+
+        start = bisect_left(self._words, query_word)
+        end = bisect_right(self._words, query_word + "\uffff")
+        prefix_scores = np.full(end - start, WORD_PREFIX_SCORE)
+        if start < end and self._words[start] == query_word:
+            prefix_scores[0] = 1.0
+        word_ids = np.concatenate([word_ids, np.arange(start, end)])
+        similarities = np.concatenate([similarities, prefix_scores])
+
+        # gather the airport postings of all matched words in one go
+        offsets = self._word_airport_offsets
+        airport_counts = offsets[word_ids + 1] - offsets[word_ids]
+        group_starts = np.cumsum(airport_counts) - airport_counts
+        postings_positions = np.repeat(
+            offsets[word_ids] - group_starts, airport_counts
+        ) + np.arange(airport_counts.sum())
+        airport_scores = np.zeros(len(self._airports))
+        np.maximum.at(
+            airport_scores,
+            self._word_airports[postings_positions],
+            np.repeat(similarities, airport_counts),
+        )
+        return airport_scores
+
+    def _build_code_index(self) -> Tuple[List[str], np.ndarray, np.ndarray]:
+        code_entries: Set[Tuple[str, int]] = set()
+        for code_col in CODE_COLUMNS:
+            for position, code in enumerate(self._get_text_column(code_col)):
+                if code:
+                    code_entries.add((code.upper(), position))
+        sorted_entries = sorted(code_entries)
+        codes = [code for code, _ in sorted_entries]
+        return (
+            codes,
+            np.asarray([position for _, position in sorted_entries], dtype=np.int64),
+            np.asarray([len(code) for code in codes], dtype=np.float64),
+        )
+
+    def _build_word_index(
+        self,
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, Dict[str, np.ndarray], np.ndarray]:
+        airports_by_word: Dict[str, List[int]] = defaultdict(list)
+        for position, (name, city) in enumerate(zip(self._names, self._cities)):
+            words = set(_normalize(f"{name} {city}").split()) - SEARCH_STOPWORDS
+            for word in words:
+                airports_by_word[word].append(position)
+
+        words = sorted(airports_by_word)
+        word_airport_offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum(
+            [len(airports_by_word[word]) for word in words],
+            out=word_airport_offsets[1:],
+        )
+        word_airports = np.fromiter(
+            (position for word in words for position in airports_by_word[word]),
+            dtype=np.int64,
+            count=word_airport_offsets[-1],
+        )
+
+        words_by_trigram: Dict[str, List[int]] = defaultdict(list)
+        trigram_counts = np.zeros(len(words), dtype=np.int64)
+        for word_id, word in enumerate(words):
+            trigrams = _get_trigrams(word)
+            trigram_counts[word_id] = len(trigrams)
+            for trigram in trigrams:
+                words_by_trigram[trigram].append(word_id)
+
+        trigram_words = {
+            trigram: np.asarray(word_ids, dtype=np.int64)
+            for trigram, word_ids in words_by_trigram.items()
+        }
+        return (
+            words,
+            word_airport_offsets,
+            word_airports,
+            trigram_words,
+            trigram_counts,
+        )
+
+    def _get_text_column(self, column: FlightAwareAirportColumns) -> List[str]:
+        if column.value not in self._airports.columns:
+            return [""] * len(self._airports)
+        return self._airports[column.value].fillna("").astype(str).tolist()
+
+
+def _normalize(text: str) -> str:
+    ascii_text = (
+        unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    )
+    return _NON_ALPHANUMERIC.sub(" ", ascii_text.upper()).strip()
+
+
+def _get_trigrams(word: str) -> Set[str]:
+    padded_word = f"  {word} "
+    return {padded_word[index : index + 3] for index in range(len(padded_word) - 2)}
@@ -0,0 +1,173 @@
+from enum import Enum
+from typing import Any, Dict, FrozenSet, Optional, Protocol, Union
+
+import numpy as np
+import pandas as pd
+
+from zc_flightplan_toolkit.constants import FlightAwareAirportColumns
+
+
+class AirportInfoSource(Protocol):
+    provided_columns: FrozenSet[FlightAwareAirportColumns]
+
+    def get_airport_record(self, airport_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+
+class DMAirportColumns(Enum):
+    IDENT = "ident"
+    TYPE = "type"
+    NAME = "name"
+    LATITUDE = "latitude_deg"
+    LONGITUDE = "longitude_deg"
+    ELEVATION = "elevation_ft"
+    COUNTRY = "iso_country"
+    REGION = "iso_region"
+    MUNICIPALITY = "municipality"
+    GPS_CODE = "gps_code"
+    ICAO_CODE = "icao_code"
+    IATA_CODE = "iata_code"
+    LOCAL_CODE = "local_code"
+    WIKIPEDIA = "wikipedia_link"
+
+
+DM_AIRPORT_TYPE_PRIORITY = [
+    "large_airport",
+    "medium_airport",
+    "small_airport",
+    "seaplane_base",
+    "heliport",
+    "balloonport",
+    "closed",
+]
+
+DM_PROVIDED_COLUMNS = frozenset(
+    {
+        FlightAwareAirportColumns.ICAO,
+        FlightAwareAirportColumns.IATA,
+        FlightAwareAirportColumns.LID,
+        FlightAwareAirportColumns.NAME,
+        FlightAwareAirportColumns.ELEVATION,
+        FlightAwareAirportColumns.CITY,
+        FlightAwareAirportColumns.STATE,
+        FlightAwareAirportColumns.LONGITUDE,
+        FlightAwareAirportColumns.LATITUDE,
+        FlightAwareAirportColumns.COUNTRY_CODE,
+        FlightAwareAirportColumns.WIKI_URL,
+        FlightAwareAirportColumns.FLIGHTS_API_ENDPOINT,
+    }
+)
+
+
+class DMAirportInfo:
+    """Static airport metadata from the OurAirports airports.csv
+
+    Airports are indexed by ICAO, IATA and LID code and returned in the
+    FlightAwareAirportColumns schema, timezone is not part of the dataset.
+    """
+
+    provided_columns = DM_PROVIDED_COLUMNS
+
+    def __init__(
+        self,
+        info_source: Union[
+            str, pd.DataFrame
+        ] = "https://davidmegginson.github.io/ourairports-data/airports.csv",
+    ):
+        raw_data = (
+            info_source
+            if isinstance(info_source, pd.DataFrame)
+            else pd.read_csv(info_source, keep_default_na=False, na_values=[""])
+        )
+        self.data = self._convert_to_flightaware_schema(raw_data)
+        self._columns = {
+            col.value: self.data[col.value].to_numpy(dtype=object)
+            for col in FlightAwareAirportColumns
+        }
+        self._index = self._build_code_index(self.data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def get_airport_record(self, airport_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the airport matching an ICAO, IATA or LID code, None if unknown"""
+        position = self._index.get(airport_id.strip().upper())
+        if position is None:
+            return None
+        return {col: values[position] for col, values in self._columns.items()}
+
+    def get_airport_information(self, airport_id: str) -> pd.DataFrame:
+        record = self.get_airport_record(airport_id)
+        return pd.DataFrame([record] if record is not None else [])
+
+    def _build_code_index(self, data: pd.DataFrame) -> Dict[str, int]:
+        index: Dict[str, int] = {}
+        for code_col in (
+            FlightAwareAirportColumns.ICAO,
+            FlightAwareAirportColumns.IATA,
+            FlightAwareAirportColumns.LID,
+        ):
+            codes = data[code_col.value]
+            has_code = codes.notna().to_numpy()
+            for code, position in zip(
+                codes[has_code].str.upper(), np.flatnonzero(has_code)
+            ):
+                index.setdefault(code, int(position))
+        return index
+
+    def _convert_to_flightaware_schema(self, raw_data: pd.DataFrame) -> pd.DataFrame:
+        raw_data = raw_data.reindex(columns=[col.value for col in DMAirportColumns])
+        type_rank = (
+            raw_data[DMAirportColumns.TYPE.value]
+            .map({value: rank for rank, value in enumerate(DM_AIRPORT_TYPE_PRIORITY)})
+            .fillna(len(DM_AIRPORT_TYPE_PRIORITY))
+        )
+        raw_data = raw_data.iloc[np.argsort(type_rank.to_numpy(), kind="stable")]
+
+        icao = (
+            raw_data[DMAirportColumns.ICAO_CODE.value]
+            .fillna(raw_data[DMAirportColumns.GPS_CODE.value])
+            .fillna(raw_data[DMAirportColumns.IDENT.value])
+        )
+        data = pd.DataFrame(
+            {
+                FlightAwareAirportColumns.ICAO.value: icao,
+                FlightAwareAirportColumns.IATA.value: raw_data[
+                    DMAirportColumns.IATA_CODE.value
+                ],
+                FlightAwareAirportColumns.LID.value: raw_data[
+                    DMAirportColumns.LOCAL_CODE.value
+                ],
+                FlightAwareAirportColumns.NAME.value: raw_data[
+                    DMAirportColumns.NAME.value
+                ],
+                FlightAwareAirportColumns.ELEVATION.value: raw_data[
+                    DMAirportColumns.ELEVATION.value
+                ],
+                FlightAwareAirportColumns.CITY.value: raw_data[
+                    DMAirportColumns.MUNICIPALITY.value
+                ],
+                FlightAwareAirportColumns.STATE.value: raw_data[
+                    DMAirportColumns.REGION.value
+                ]
+                .str.split("-", n=1)
+                .str[-1],
+                FlightAwareAirportColumns.LONGITUDE.value: raw_data[
+                    DMAirportColumns.LONGITUDE.value
+                ],
+                FlightAwareAirportColumns.LATITUDE.value: raw_data[
+                    DMAirportColumns.LATITUDE.value
+                ],
+                FlightAwareAirportColumns.TIMEZONE.value: None,
+                FlightAwareAirportColumns.COUNTRY_CODE.value: raw_data[
+                    DMAirportColumns.COUNTRY.value
+                ],
+                FlightAwareAirportColumns.WIKI_URL.value: raw_data[
+                    DMAirportColumns.WIKIPEDIA.value
+                ],
+                FlightAwareAirportColumns.FLIGHTS_API_ENDPOINT.value: "/airports/"
+                + icao
+                + "/flights",
+            }
+        )
+        return data.reset_index(drop=True)
@@ -1,36 +1,108 @@
 from __future__ import annotations
 
+import hashlib
 import json
 from abc import ABC
+from datetime import timedelta
 from functools import cache
-from typing import Any, Dict, List, Literal, Optional, Protocol, Union, overload
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    overload,
+)
+from urllib.parse import parse_qsl, urlsplit
 
 import pandas as pd
-import requests
 from frozendict import frozendict
 from loguru import logger
 from requests import Response
 
+from zc_flightplan_toolkit.airports import AirportInfoSource
+from zc_flightplan_toolkit.caching import (
+    SingleFlight,
+    SingleFlightStats,
+    StaleWhileRevalidateCache,
+)
 from zc_flightplan_toolkit.constants import (
     AERO_API_KEY,
     CHECKWX_API_KEY,
     CHECKWX_API_URL,
+    CHECKWX_MAX_STATIONS,
     DATIS_ENDPOINT,
     FLIGHTAWARE_API_URL,
     DATISInfo,
     FlightAwareAirportColumns,
 )
+from zc_flightplan_toolkit.geodesy import great_circle_distance
+from zc_flightplan_toolkit.metrics import (
+    get_metrics,
+    lru_cache_collector,
+    single_flight_collector,
+)
+from zc_flightplan_toolkit.routes import (
+    NavDataStore,
+    RouteDistanceColumns,
+    compute_route_lengths,
+)
 from zc_flightplan_toolkit.runways import (
     AirportRunwayInfo,
     DMAirportRunwayInfo,
     RunwayInfo,
 )
-from zc_flightplan_toolkit.utils import get_unique_value
+from zc_flightplan_toolkit.transport import Transport, get_default_transport, metered
+from zc_flightplan_toolkit.utils import get_unique_value, join_unique_values
+
+
+class _Credentials(NamedTuple):
+    version: int
+    request_header: frozendict[str, str]
+    # identifies the key in shared cache keys without putting the key itself there
+    fingerprint: str = ""
 
 
 class BaseAPI(ABC):
     _api_url: str
-    _request_header: Dict[str, str]
+    _api_key_header: str
+    _credentials: _Credentials = _Credentials(0, frozendict())
+    _in_flight_requests: SingleFlight[Response] = SingleFlight()
+    _response_cache: Optional[StaleWhileRevalidateCache[Response]] = None
+    _transport: Optional[Transport] = None
+
+    @property
+    def transport(self) -> Transport:
+        return self._transport or get_default_transport()
+
+    @classmethod
+    def get_coalescing_stats(cls) -> SingleFlightStats:
+        """Counts network calls and the identical concurrent calls that shared them"""
+        return cls._in_flight_requests.stats
+
+    def update_credentials(self, api_key: str) -> None:
+        """Swaps the api key in place, keeping the object and everything it holds
+
+        Requests already in flight finish with the old key. Responses cached under
+        another key are never served, caches not tied to the key are kept.
+        """
+        if self._credentials.request_header == {self._api_key_header: api_key}:
+            return
+        self._set_credentials(api_key)
+        logger.info(f"{type(self).__name__} credentials updated")
+
+    def _set_credentials(self, api_key: str) -> None:
+        self._credentials = _Credentials(
+            self._credentials.version + 1,
+            frozendict({self._api_key_header: api_key}),
+            hashlib.sha256(api_key.encode()).hexdigest()[:16],
+        )
 
     def _make_api_call(
         self,
@@ -38,20 +110,59 @@ class BaseAPI(ABC):
         params: Optional[Dict[str, str | int]] = None,
         timeout: int = 5,
         cache: bool = True,
+        credentials: Optional[_Credentials] = None,
     ) -> Response:
         params = params or {}
+        # one snapshot per call so a concurrent key swap cannot mix credentials
+        credentials = credentials or self._credentials
+
+        if cache and self._response_cache is not None:
+            return self._response_cache.get(
+                (
+                    self._api_url,
+                    credentials.fingerprint,
+                    api_endpoint,
+                    frozendict(params),
+                    timeout,
+                ),
+                lambda: self._make_api_call(
+                    api_endpoint, params, timeout, cache=False, credentials=credentials
+                ),
+            )
 
         if cache:
             frozen_params = frozendict(params)
-            return self._cached_api_call(api_endpoint, frozen_params, timeout)
+            return self._cached_api_call(
+                api_endpoint, frozen_params, timeout, credentials
+            )
+
+        request_key = (
+            self,
+            credentials.version,
+            api_endpoint,
+            frozendict(params),
+            timeout,
+        )
+        return self._in_flight_requests.call(
+            request_key,
+            lambda: self._request(api_endpoint, params, timeout, credentials),
+        )
 
+    def _request(
+        self,
+        api_endpoint: str,
+        params: Dict[str, str | int],
+        timeout: int,
+        credentials: _Credentials,
+    ) -> Response:
         logger.info(
             f"making 1 api call to {self._api_url}/{api_endpoint} with params: {params}"
         )
-        response = requests.get(
+        response = self.transport.request(
+            "GET",
             f"{self._api_url}/{api_endpoint}",
             params=params,
-            headers=self._request_header,
+            headers=dict(credentials.request_header),
             timeout=timeout,
         )
         if response.status_code != 200:
@@ -65,10 +176,30 @@ class BaseAPI(ABC):
         api_endpoint: str,
         frozen_params: Optional[frozendict[str, str | int]] = None,
         timeout: int = 5,
+        credentials: Optional[_Credentials] = None,
     ) -> Response:
         frozen_params = frozen_params or frozendict()
         params = dict(frozen_params)
-        return self._make_api_call(api_endpoint, params, timeout, cache=False)
+        return self._make_api_call(
+            api_endpoint, params, timeout, cache=False, credentials=credentials
+        )
+
+
+get_metrics().register_collector(
+    "api_coalescing", single_flight_collector("api", BaseAPI._in_flight_requests)
+)
+get_metrics().register_collector(
+    "api_memo_cache", lru_cache_collector("api_memo", BaseAPI._cached_api_call)
+)
+
+
+def make_response_cache(
+    soft_ttl: timedelta, hard_ttl: timedelta
+) -> StaleWhileRevalidateCache[Response]:
+    """Stale-while-revalidate cache for API responses, failed responses are not kept"""
+    return StaleWhileRevalidateCache(
+        soft_ttl, hard_ttl, is_cacheable=lambda response: response.ok
+    )
 
 
 class WeatherAPI(Protocol):
@@ -83,16 +214,34 @@ class WeatherAPI(Protocol):
     def get_metar(self, icao: str, decoded: bool = False) -> Union[str, pd.DataFrame]:
         ...
 
+    def get_metars(self, icaos: Sequence[str]) -> Dict[str, str]:
+        ...
+
     def get_taf(self, icao: str) -> str:
         ...
 
+    def update_credentials(self, api_key: str) -> None:
+        ...
+
 
 class CheckWxAPI(BaseAPI):
-    def __init__(self, api_url: str = CHECKWX_API_URL, api_key: str = ""):
+    """METARs are fetched fresh unless a response_cache serves them within its TTLs"""
+
+    _api_key_header = "X-API-Key"
+
+    def __init__(
+        self,
+        api_url: str = CHECKWX_API_URL,
+        api_key: str = "",
+        response_cache: Optional[StaleWhileRevalidateCache[Response]] = None,
+        transport: Optional[Transport] = None,
+    ):
         if not api_key:
             api_key = CHECKWX_API_KEY
-        self._request_header = {"X-API-Key": api_key}
         self._api_url = api_url
+        self._set_credentials(api_key)
+        self._response_cache = response_cache
+        self._transport = metered(transport) if transport is not None else None
 
         self._retrieved_icao: str = ""
         self._decoded_metar: Dict[str, Any] = {}
@@ -113,7 +262,9 @@ class CheckWxAPI(BaseAPI):
             return self._decoded_metar["raw_text"]
 
         api_endpoint = f"metar/{icao}/decoded"
-        response = self._make_api_call(api_endpoint, cache=False)
+        response = self._make_api_call(
+            api_endpoint, cache=self._response_cache is not None
+        )
         response_dict = json.loads(response.text)
 
         if "data" in response_dict:
@@ -121,6 +272,25 @@ class CheckWxAPI(BaseAPI):
             return self._decoded_metar["raw_text"]
         return "no metar found"
 
+    def get_metars(self, icaos: Sequence[str]) -> Dict[str, str]:
+        """Raw METARs of several stations, CHECKWX_MAX_STATIONS per api call
+
+        Stations without a current METAR are left out."""
+        stations = sorted({icao.upper() for icao in icaos})
+        metars: Dict[str, str] = {}
+        for start in range(0, len(stations), CHECKWX_MAX_STATIONS):
+            api_endpoint = (
+                f"metar/{','.join(stations[start : start + CHECKWX_MAX_STATIONS])}"
+                "/decoded"
+            )
+            response = self._make_api_call(
+                api_endpoint, cache=self._response_cache is not None
+            )
+            for decoded_metar in json.loads(response.text).get("data", []):
+                if isinstance(decoded_metar, dict) and "icao" in decoded_metar:
+                    metars[decoded_metar["icao"]] = decoded_metar["raw_text"]
+        return metars
+
     def _get_decoded_metar(self, icao: str) -> pd.DataFrame:
         if not self._decoded_metar or icao != self._retrieved_icao:
             self.get_metar(icao)
@@ -140,22 +310,46 @@ class CheckWxAPI(BaseAPI):
         return pd.DataFrame(exploded_decoded, index=[0]).T
 
     def get_taf(self, icao: str) -> str:
-        raise NotImplementedError
+        response = self._make_api_call(
+            f"taf/{icao}/decoded", cache=self._response_cache is not None
+        )
+        response_dict = json.loads(response.text)
+
+        if response_dict.get("data"):
+            return response_dict["data"][0]["raw_text"]
+        return "no taf found"
 
 
 class DATISAPI(Protocol):
     def request_datis(self, airport_icao: str, **kwargs) -> str:
         ...
 
+    def request_all_datis(self, **kwargs) -> pd.DataFrame:
+        ...
+
 
 class ClowdIoDATISAPI:
-    def __init__(self, api_endpoint: str = DATIS_ENDPOINT):
+    def __init__(
+        self,
+        api_endpoint: str = DATIS_ENDPOINT,
+        response_cache: Optional[StaleWhileRevalidateCache[Response]] = None,
+        transport: Optional[Transport] = None,
+    ):
         self._api_endpoint = api_endpoint
+        self._response_cache = response_cache
+        self._transport = metered(transport) if transport is not None else None
+        self._in_flight_requests: SingleFlight[Response] = SingleFlight()
+
+    @property
+    def transport(self) -> Transport:
+        return self._transport or get_default_transport()
 
     def request_datis(self, airport_icao: str, timeout: int = 5, **kwargs) -> str:
         if len(airport_icao) != 4:
             raise ValueError(f"invalid icao {airport_icao}")
-        response = requests.get(f"{self._api_endpoint}{airport_icao}", timeout=timeout)
+        response = self._get_datis_response(
+            f"{self._api_endpoint}{airport_icao}", timeout
+        )
         if DATISInfo.ATIS.value in response.text:
             return self._process_datis(response.text)
         error_msg = (
@@ -164,6 +358,31 @@ class ClowdIoDATISAPI:
         logger.warning(error_msg)
         return error_msg
 
+    def request_all_datis(self, timeout: int = 5, **kwargs) -> pd.DataFrame:
+        """Every published DATIS in one call, one row per airport and ATIS type"""
+        response = self._get_datis_response(f"{self._api_endpoint}all", timeout)
+        try:
+            datis_records = json.loads(response.text)
+        except json.JSONDecodeError:
+            datis_records = None
+        if not isinstance(datis_records, list):
+            logger.warning(f"failed to retrieve all datis with error: {response.text}")
+            datis_records = []
+        return pd.DataFrame(datis_records).reindex(
+            columns=[info.value for info in DATISInfo]
+        )
+
+    def _get_datis_response(self, datis_url: str, timeout: int) -> Response:
+        def fetch_datis() -> Response:
+            return self._in_flight_requests.call(
+                datis_url,
+                lambda: self.transport.request("GET", datis_url, timeout=timeout),
+            )
+
+        if self._response_cache is not None:
+            return self._response_cache.get(datis_url, fetch_datis)
+        return fetch_datis()
+
     def _process_datis(self, datis_text: str) -> str:
         datis_list = eval(datis_text)
 
@@ -183,32 +402,58 @@ class ClowdIoDATISAPI:
 
 
 class FlightInfoAPI(Protocol):
+    current_airport_icao: Optional[str]
+
+    @property
+    def weather_api(self) -> WeatherAPI:
+        ...
+
     def get_route_info(
         self, start_airport: str, end_airport: str, **kwargs
     ) -> pd.DataFrame:
         ...
 
+    def iter_route_info(
+        self, start_airport: str, end_airport: str, **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        ...
+
     def get_airport_information(self, airport_id: str) -> pd.DataFrame:
         ...
 
-    def get_datis(self) -> str:
+    def lookup_airport_information(self, airport_id: str) -> pd.DataFrame:
+        ...
+
+    def get_datis(self, icao: Optional[str] = None) -> str:
+        ...
+
+    def get_airport_runways(self, icao: Optional[str] = None) -> pd.DataFrame:
         ...
 
-    def get_airport_runways(self) -> pd.DataFrame:
+    def get_airport_runway_segments(self, icao: Optional[str] = None) -> pd.DataFrame:
         ...
 
-    def get_runway_info(self, runway_ident: str) -> RunwayInfo:
+    def get_runway_info(
+        self, runway_ident: str, icao: Optional[str] = None
+    ) -> RunwayInfo:
         ...
 
     @overload
-    def get_metar(self) -> str:
+    def get_metar(self, *, icao: Optional[str] = None) -> str:
         ...
 
     @overload
-    def get_metar(self, decoded: bool) -> pd.DataFrame:
+    def get_metar(self, decoded: bool, icao: Optional[str] = None) -> pd.DataFrame:
         ...
 
-    def get_metar(self, decoded: bool = False) -> Union[str, pd.DataFrame]:
+    def get_metar(
+        self, decoded: bool = False, icao: Optional[str] = None
+    ) -> Union[str, pd.DataFrame]:
+        ...
+
+    def update_credentials(
+        self, api_key: Optional[str] = None, weather_api_key: Optional[str] = None
+    ) -> None:
         ...
 
     @classmethod
@@ -219,7 +464,11 @@ class FlightInfoAPI(Protocol):
 class FlightAwareAPI(BaseAPI):
     """Class to interface with Flight Aware's API to retrieve information
 
-    Contains code that interfaces with another API to fetch DATIS"""
+    Contains code that interfaces with another API to fetch DATIS.
+    With a response_cache, responses are served stale-while-revalidate instead of
+    being cached for the lifetime of the instance"""
+
+    _api_key_header = "x-apikey"
 
     def __init__(
         self,
@@ -228,41 +477,61 @@ class FlightAwareAPI(BaseAPI):
         datis_api: DATISAPI = ClowdIoDATISAPI(),
         runway_info_source: AirportRunwayInfo = DMAirportRunwayInfo(),
         weather_api: WeatherAPI = CheckWxAPI(),
+        navdata: Optional[NavDataStore] = None,
+        airport_info_source: Optional[AirportInfoSource] = None,
+        response_cache: Optional[StaleWhileRevalidateCache[Response]] = None,
+        transport: Optional[Transport] = None,
     ):
         self._api_url = api_url
+        self._transport = metered(transport) if transport is not None else None
         self._datis_api = datis_api
         self._weather_api = weather_api
         self._runway_info_source = runway_info_source
+        self._navdata = navdata
+        self._airport_info_source = airport_info_source
+        self._response_cache = response_cache
 
         if not api_key:
             api_key = AERO_API_KEY
-
-        self._request_header = {"x-apikey": api_key}
+        self._set_credentials(api_key)
 
         self.current_airport_icao: Optional[str] = None
 
-    def get_airport_information(self, airport_id: str) -> pd.DataFrame:
+    @property
+    def weather_api(self) -> WeatherAPI:
+        return self._weather_api
+
+    def get_airport_information(
+        self,
+        airport_id: str,
+        columns: Optional[Sequence[FlightAwareAirportColumns]] = None,
+    ) -> pd.DataFrame:
         """Accepts airport ID in the form of ICAO or LID airport code
 
         Data returned includes airport name, city, state (when known), latitude, longitude, and timezone.
+        With a local airport_info_source, airports it knows are answered locally and
+        FlightAware is only called for requested columns the source lacks
+        (columns defaults to everything the source provides).
+        The airport becomes the current one for the getters called without an icao.
         """
-
-        airport_info_endpoint = f"airports/{airport_id}"
-        response = self._make_api_call(airport_info_endpoint)
-
-        full_airport_info: Dict[str, Any] = json.loads(response.text)
-        try:
-            final_airport_info = self._process_airport_info(full_airport_info)
-        except KeyError:
-            final_airport_info = [full_airport_info]
-
-        airport_info = pd.DataFrame(final_airport_info)
-
+        airport_info = self.lookup_airport_information(airport_id, columns)
         self.current_airport_icao = get_unique_value(
             airport_info, FlightAwareAirportColumns.ICAO.value, str
         )
         return airport_info
 
+    def lookup_airport_information(
+        self,
+        airport_id: str,
+        columns: Optional[Sequence[FlightAwareAirportColumns]] = None,
+    ) -> pd.DataFrame:
+        """get_airport_information without changing the current airport, for callers
+        on other threads that pass the icao on to the getters themselves"""
+        airport_info = self._get_local_airport_information(airport_id, columns)
+        if airport_info is None:
+            airport_info = pd.DataFrame(self._get_flightaware_airport_info(airport_id))
+        return airport_info
+
     def get_route_info(
         self,
         start_airport: str,
@@ -270,11 +539,17 @@ class FlightAwareAPI(BaseAPI):
         sort_by: Literal["count", "last_departure_time"] = "count",
         max_route_age_days: int = 6,
         max_pages: int = 1,
+        with_distances: bool = False,
+        display_format: bool = True,
         **kwargs,
     ) -> pd.DataFrame:
         """Accepts airport ID in the form of ICAO or LID airport code
 
-        Returns information about assigned IFR routings between two airports."""
+        Returns information about assigned IFR routings between two airports.
+        with_distances adds the great circle distance between the airports and, when
+        navdata is available, the flown length of every route (nm).
+        display_format=False keeps altitudes as integers and departure times as
+        datetime64, format_route_info converts them for display later."""
 
         params = {
             "sort_by": sort_by,
@@ -287,53 +562,109 @@ class FlightAwareAPI(BaseAPI):
 
         route_info_df = pd.DataFrame(json.loads(response.text)["routes"])
 
-        return self._process_route_info(route_info_df)
+        route_info = self._process_route_info(route_info_df, display_format)
+        if with_distances and "route" in route_info.columns:
+            route_info = self._add_route_distances(
+                route_info, start_airport, end_airport
+            )
+        return route_info
+
+    def iter_route_info(
+        self,
+        start_airport: str,
+        end_airport: str,
+        sort_by: Literal["count", "last_departure_time"] = "count",
+        max_route_age_days: int = 6,
+        max_pages: int = 10,
+        display_format: bool = True,
+        **kwargs,
+    ) -> Iterator[pd.DataFrame]:
+        """Yields route info one FlightAware result page at a time
+
+        A page is only requested when the iterator is advanced, following the
+        cursor link of the previous page for at most max_pages pages."""
+        route_info_endpoint = f"airports/{start_airport}/routes/{end_airport}"
+        params: Dict[str, str | int] = {
+            "sort_by": sort_by,
+            "max_file_age": f"{max_route_age_days} days",
+            "max_pages": 1,
+        }
 
-    def get_datis(self) -> str:  # sourcery skip: class-extract-method
-        if self.current_airport_icao is not None:
-            return self._datis_api.request_datis(self.current_airport_icao)
+        for _ in range(max_pages):
+            response = self._make_api_call(route_info_endpoint, params)
+            route_page = json.loads(response.text)
+            if not route_page.get("routes"):
+                return
+            yield self._process_route_info(
+                pd.DataFrame(route_page["routes"]), display_format
+            )
+
+            next_page = (route_page.get("links") or {}).get("next")
+            if not next_page:
+                return
+            next_page_url = urlsplit(next_page)
+            route_info_endpoint = next_page_url.path.lstrip("/")
+            params = dict(parse_qsl(next_page_url.query))
+
+    def get_datis(self, icao: Optional[str] = None) -> str:
+        # sourcery skip: class-extract-method
+        icao = self._airport_icao(icao)
+        if icao:
+            return self._datis_api.request_datis(icao)
         error_msg = "invalid or missing airport data, no datis"
         logger.warning(error_msg)
         return error_msg
 
-    def get_airport_runways(self) -> pd.DataFrame:
-        if self.current_airport_icao is not None:
-            return self._runway_info_source.get_airport_runways(
-                self.current_airport_icao
-            )
+    def get_airport_runways(self, icao: Optional[str] = None) -> pd.DataFrame:
+        icao = self._airport_icao(icao)
+        if icao:
+            return self._runway_info_source.get_airport_runways(icao)
         error_msg = "invalid or missing airport data, unable to fetch runway info"
         logger.warning(error_msg)
         return pd.DataFrame([{"error": error_msg}])
 
-    def get_runway_info(self, runway_ident: str) -> RunwayInfo:
-        if self.current_airport_icao is not None:
-            return self._runway_info_source.get_runway_info(
-                self.current_airport_icao, runway_ident
-            )
+    def get_airport_runway_segments(self, icao: Optional[str] = None) -> pd.DataFrame:
+        icao = self._airport_icao(icao)
+        if icao:
+            return self._runway_info_source.get_runway_segments(icao)
+        logger.warning("invalid or missing airport data, unable to fetch runways")
+        return pd.DataFrame()
+
+    def get_runway_info(
+        self, runway_ident: str, icao: Optional[str] = None
+    ) -> RunwayInfo:
+        icao = self._airport_icao(icao)
+        if icao:
+            return self._runway_info_source.get_runway_info(icao, runway_ident)
         error_msg = "invalid or missing airport data, unable to fetch runway info"
         logger.warning(error_msg)
         return RunwayInfo()
 
     @overload
-    def get_metar(self) -> str:
+    def get_metar(self, *, icao: Optional[str] = None) -> str:
         ...
 
     @overload
-    def get_metar(self, decoded: bool) -> pd.DataFrame:
+    def get_metar(self, decoded: bool, icao: Optional[str] = None) -> pd.DataFrame:
         ...
 
-    def get_metar(self, decoded: bool = False) -> Union[str, pd.DataFrame]:
-        if self.current_airport_icao is not None:
+    def get_metar(
+        self, decoded: bool = False, icao: Optional[str] = None
+    ) -> Union[str, pd.DataFrame]:
+        icao = self._airport_icao(icao)
+        if icao:
             if decoded:
-                return self._weather_api.get_metar(
-                    self.current_airport_icao, decoded=True
-                )
+                return self._weather_api.get_metar(icao, decoded=True)
             else:
-                return self._weather_api.get_metar(self.current_airport_icao)
+                return self._weather_api.get_metar(icao)
         error_msg = "invalid or missing airport data, unable to fetch metar"
         logger.warning(error_msg)
         return error_msg
 
+    def _airport_icao(self, icao: Optional[str]) -> Optional[str]:
+        """The icao passed in, the current airport's when there is none"""
+        return icao if icao is not None else self.current_airport_icao
+
     def _process_airport_info(
         self, airport_info: Dict[str, Any]
     ) -> List[Dict[str, Any]]:
@@ -343,24 +674,129 @@ class FlightAwareAPI(BaseAPI):
         alternative_airport_info: List[Dict[str, Any]] = airport_info["alternatives"]
         return [best_match_info] + alternative_airport_info
 
-    def _process_route_info(self, route_info: pd.DataFrame) -> pd.DataFrame:
+    def _get_flightaware_airport_info(self, airport_id: str) -> List[Dict[str, Any]]:
+        airport_info_endpoint = f"airports/{airport_id}"
+        response = self._make_api_call(airport_info_endpoint)
+
+        full_airport_info: Dict[str, Any] = json.loads(response.text)
+        try:
+            return self._process_airport_info(full_airport_info)
+        except KeyError:
+            return [full_airport_info]
+
+    def _get_local_airport_information(
+        self,
+        airport_id: str,
+        columns: Optional[Sequence[FlightAwareAirportColumns]] = None,
+    ) -> Optional[pd.DataFrame]:
+        if self._airport_info_source is None:
+            return None
+        airport_record = self._airport_info_source.get_airport_record(airport_id)
+        if airport_record is None:
+            return None
+
+        missing_columns = (
+            set(columns or []) - self._airport_info_source.provided_columns
+        )
+        if missing_columns:
+            flightaware_record = self._get_flightaware_airport_info(airport_id)[0]
+            for col in missing_columns:
+                airport_record[col.value] = flightaware_record.get(col.value)
+        return pd.DataFrame(
+            [airport_record], columns=[col.value for col in FlightAwareAirportColumns]
+        )
+
+    def _get_airport_coordinates(
+        self, airport_id: str
+    ) -> Optional[Tuple[float, float]]:
+        airport_info: Dict[str, Any] = {}
+        if self._airport_info_source is not None:
+            airport_info = (
+                self._airport_info_source.get_airport_record(airport_id) or {}
+            )
+        if not airport_info:
+            response = self._make_api_call(f"airports/{airport_id}")
+            airport_info = json.loads(response.text)
         try:
-            route_info["aircraft_types"] = route_info["aircraft_types"].apply(
-                lambda aircrafts: ", ".join(set(aircrafts))
+            return (
+                float(airport_info[FlightAwareAirportColumns.LATITUDE.value]),
+                float(airport_info[FlightAwareAirportColumns.LONGITUDE.value]),
             )
-            route_info["filed_altitude_max"] = "FL" + route_info[
-                "filed_altitude_max"
-            ].astype(str)
-            route_info["filed_altitude_min"] = "FL" + route_info[
-                "filed_altitude_min"
-            ].astype(str)
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"no coordinates found for airport {airport_id}")
+            return None
+
+    def _add_route_distances(
+        self, route_info: pd.DataFrame, start_airport: str, end_airport: str
+    ) -> pd.DataFrame:
+        origin = self._get_airport_coordinates(start_airport)
+        destination = self._get_airport_coordinates(end_airport)
+
+        great_circle_distance_nm = (
+            float(great_circle_distance(*origin, *destination))
+            if origin is not None and destination is not None
+            else float("nan")
+        )
+        route_info[
+            RouteDistanceColumns.GREAT_CIRCLE_DISTANCE.value
+        ] = great_circle_distance_nm
+
+        if self._navdata is not None:
+            route_info[RouteDistanceColumns.ROUTE_LENGTH.value] = compute_route_lengths(
+                route_info["route"], self._navdata, origin, destination
+            ).to_numpy()
+        return route_info
+
+    @staticmethod
+    def format_route_info(route_info: pd.DataFrame) -> pd.DataFrame:
+        """Formats typed route info for display, altitudes as FL and times as text"""
+        route_info = route_info.copy()
+        for altitude_col in ("filed_altitude_max", "filed_altitude_min"):
+            if altitude_col in route_info.columns:
+                altitudes = route_info[altitude_col].astype("category")
+                route_info[altitude_col] = altitudes.cat.rename_categories(
+                    [f"FL{altitude}" for altitude in altitudes.cat.categories]
+                )
+        if "last_departure_time" in route_info.columns:
+            departure_times = route_info["last_departure_time"].dt.floor("s")
+            if departure_times.dt.tz is not None:
+                departure_times = departure_times.dt.tz_convert(None)
+            route_info["last_departure_time"] = departure_times.astype(str)
+        return route_info
+
+    def _process_route_info(
+        self, route_info: pd.DataFrame, display_format: bool = True
+    ) -> pd.DataFrame:
+        try:
+            route_info["aircraft_types"] = join_unique_values(
+                route_info["aircraft_types"]
+            )
+            for altitude_col in ("filed_altitude_max", "filed_altitude_min"):
+                route_info[altitude_col] = pd.to_numeric(
+                    route_info[altitude_col], errors="coerce"
+                ).astype("Int64")
             route_info["last_departure_time"] = pd.to_datetime(
-                route_info["last_departure_time"]
-            ).dt.strftime("%Y-%m-%d %H:%M:%S")
+                route_info["last_departure_time"], utc=True, format="ISO8601"
+            )
         except KeyError:
-            route_info = pd.DataFrame({"error": "invalid or missing data"}, index=[0])
+            return pd.DataFrame({"error": "invalid or missing data"}, index=[0])
+        if display_format:
+            return self.format_route_info(route_info)
         return route_info
 
+    def update_credentials(
+        self, api_key: Optional[str] = None, weather_api_key: Optional[str] = None
+    ) -> None:
+        """Hot-swaps the FlightAware and/or weather api key, see BaseAPI
+
+        Unlike reinitialize, runway data, DATIS and airport sources, navdata and
+        the current airport are kept.
+        """
+        if api_key is not None:
+            super().update_credentials(api_key)
+        if weather_api_key is not None:
+            self._weather_api.update_credentials(weather_api_key)
+
     @classmethod
     def reinitialize(
         cls,
@@ -369,11 +805,22 @@ class FlightAwareAPI(BaseAPI):
         datis_api: DATISAPI = ClowdIoDATISAPI(),
         runway_info_source: AirportRunwayInfo = DMAirportRunwayInfo(),
         weather_api: WeatherAPI = CheckWxAPI(),
+        navdata: Optional[NavDataStore] = None,
+        airport_info_source: Optional[AirportInfoSource] = None,
+        response_cache: Optional[StaleWhileRevalidateCache[Response]] = None,
         **kwargs,
     ) -> FlightInfoAPI:
         logger.info(
             f"api reinitialized with api_url: {api_url}, api_key: {api_key}, datis_api: {datis_api}, runway_info_source: {runway_info_source}, weather_api: {weather_api}"
         )
         return cls(
-            api_url, api_key, datis_api, runway_info_source, weather_api, **kwargs
+            api_url,
+            api_key,
+            datis_api,
+            runway_info_source,
+            weather_api,
+            navdata,
+            airport_info_source,
+            response_cache,
+            **kwargs,
         )
@@ -0,0 +1,364 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from loguru import logger
+
+ResultType = TypeVar("ResultType")
+
+MIN_ACCESS_COUNT = 0.01
+
+
+class SingleFlightStats(NamedTuple):
+    calls: int
+    coalesced: int
+
+
+class _InFlightCall(Generic[ResultType]):
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[ResultType] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[ResultType]):
+    """Deduplicates concurrent calls with the same key
+
+    The first caller of a key runs the function, callers arriving while it is in
+    flight wait and receive the same result (or exception). Nothing is kept once the
+    call completes, caching is left to the caller.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, _InFlightCall[ResultType]] = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    @property
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(calls=self._calls, coalesced=self._coalesced)
+
+    def call(self, key: Hashable, function: Callable[[], ResultType]) -> ResultType:
+        with self._lock:
+            in_flight_call = self._in_flight.get(key)
+            is_leader = in_flight_call is None
+            if in_flight_call is None:
+                in_flight_call = self._in_flight[key] = _InFlightCall()
+                self._calls += 1
+            else:
+                self._coalesced += 1
+
+        if not is_leader:
+            logger.debug(f"waiting on in-flight call for {key}")
+            return self._wait(in_flight_call)
+
+        try:
+            result = in_flight_call.result = function()
+        except BaseException as error:
+            in_flight_call.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            in_flight_call.done.set()
+        return result
+
+    def _wait(self, in_flight_call: _InFlightCall[ResultType]) -> ResultType:
+        in_flight_call.done.wait()
+        if in_flight_call.error is not None:
+            raise in_flight_call.error
+        return in_flight_call.result  # type: ignore[return-value]
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    stale_hits: int
+    misses: int
+    refreshes: int
+    refresh_errors: int
+    evictions: int
+
+
+class _CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float
+    fetch: Callable[[], Any]
+
+
+class StaleWhileRevalidateCache(Generic[ResultType]):
+    """Serves cached values and refreshes them in the background once they go stale
+
+    Entries younger than soft_ttl are served as is. Between soft_ttl and hard_ttl the
+    stale value is returned immediately while a single background refresh runs, past
+    hard_ttl callers block on a fresh fetch. Failed refreshes keep the stale entry and
+    values rejected by is_cacheable are returned without being stored.
+
+    Entries past hard_ttl are dropped when accessed or by evict_expired, and once more
+    than max_entries are stored the least recently used ones are evicted.
+    """
+
+    def __init__(
+        self,
+        soft_ttl: timedelta,
+        hard_ttl: timedelta,
+        is_cacheable: Optional[Callable[[ResultType], bool]] = None,
+        refresh_workers: int = 4,
+        clock: Callable[[], float] = time.monotonic,
+        max_entries: int = 1024,
+    ):
+        if hard_ttl < soft_ttl:
+            raise ValueError(f"hard_ttl {hard_ttl} is shorter than soft_ttl {soft_ttl}")
+        if max_entries < 1:
+            raise ValueError(f"max_entries {max_entries} is less than 1")
+        self._soft_ttl = soft_ttl.total_seconds()
+        self._hard_ttl = hard_ttl.total_seconds()
+        self._is_cacheable = is_cacheable or (lambda _: True)
+        self._clock = clock
+        self._max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, _CacheEntry]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        self._access_counts: Dict[Hashable, float] = {}
+        self._in_flight: SingleFlight[ResultType] = SingleFlight()
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="cache-refresh"
+        )
+        self._stats = CacheStats(0, 0, 0, 0, 0, 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return self._stats
+
+    def get(self, key: Hashable, fetch: Callable[[], ResultType]) -> ResultType:
+        # access counts are only kept for stored keys, a miss is counted once the
+        # fetched value is stored, so uncacheable keys never pile up counts
+        accesses = 1.0
+        with self._lock:
+            entry = self._entries.get(key)
+            age = self._clock() - entry.stored_at if entry is not None else None
+            if entry is None or age is None or age >= self._hard_ttl:
+                self._count(misses=1)
+                accesses += self._access_counts.pop(key, 0.0)
+                if entry is not None:
+                    del self._entries[key]
+                    self._count(evictions=1)
+                stale_entry = None
+            elif age < self._soft_ttl:
+                self._count(hits=1)
+                self._touch(key)
+                return entry.value
+            else:
+                self._count(stale_hits=1)
+                self._touch(key)
+                stale_entry = entry
+                if key in self._refreshing:
+                    return entry.value
+                self._refreshing.add(key)
+
+        if stale_entry is None:
+            return self._fetch_and_store(key, fetch, accesses)
+        logger.debug(f"serving stale {key}, refreshing in background")
+        self._refresh_executor.submit(self._refresh, key, fetch)
+        return stale_entry.value
+
+    def get_expiring_keys(self, lead_time: timedelta) -> List[Tuple[Hashable, float]]:
+        """Not yet refreshing keys that go stale within lead_time, with access counts"""
+        stored_before = self._clock() - self._soft_ttl + lead_time.total_seconds()
+        with self._lock:
+            return [
+                (key, self._access_counts.get(key, 0.0))
+                for key, entry in self._entries.items()
+                if entry.stored_at <= stored_before and key not in self._refreshing
+            ]
+
+    def refresh_in_background(self, key: Hashable) -> bool:
+        """Refreshes a cached key with the fetch that stored it, False if not possible"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+        self._refresh_executor.submit(self._refresh, key, entry.fetch)
+        return True
+
+    def decay_access_counts(self, factor: float) -> None:
+        with self._lock:
+            self._access_counts = {
+                key: count * factor
+                for key, count in self._access_counts.items()
+                if count * factor >= MIN_ACCESS_COUNT
+            }
+
+    def evict_expired(self) -> int:
+        """Drops entries past hard_ttl and stray access counts, returns entries dropped"""
+        expired_before = self._clock() - self._hard_ttl
+        with self._lock:
+            expired = [
+                key
+                for key, entry in self._entries.items()
+                if entry.stored_at <= expired_before
+            ]
+            for key in expired:
+                del self._entries[key]
+            self._access_counts = {
+                key: count
+                for key, count in self._access_counts.items()
+                if key in self._entries
+            }
+            self._count(evictions=len(expired))
+        return len(expired)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._access_counts.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._access_counts.clear()
+
+    def _fetch_and_store(
+        self, key: Hashable, fetch: Callable[[], ResultType], accesses: float = 0.0
+    ) -> ResultType:
+        value = self._in_flight.call(key, fetch)
+        if self._is_cacheable(value):
+            with self._lock:
+                self._entries[key] = _CacheEntry(value, self._clock(), fetch)
+                self._entries.move_to_end(key)
+                if accesses:
+                    self._touch(key, accesses)
+                while len(self._entries) > self._max_entries:
+                    evicted_key, _ = self._entries.popitem(last=False)
+                    self._access_counts.pop(evicted_key, None)
+                    self._count(evictions=1)
+        return value
+
+    def _refresh(self, key: Hashable, fetch: Callable[[], ResultType]) -> None:
+        try:
+            self._fetch_and_store(key, fetch)
+            with self._lock:
+                self._count(refreshes=1)
+        except Exception as error:
+            logger.warning(f"background refresh of {key} failed: {error}")
+            with self._lock:
+                self._count(refresh_errors=1)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _touch(self, key: Hashable, accesses: float = 1.0) -> None:
+        """Counts accesses to a stored key and marks it most recently used"""
+        self._access_counts[key] = self._access_counts.get(key, 0.0) + accesses
+        self._entries.move_to_end(key)
+
+    def _count(self, **increments: int) -> None:
+        self._stats = self._stats._replace(
+            **{
+                field: getattr(self._stats, field) + increment
+                for field, increment in increments.items()
+            }
+        )
+
+
+class PrefetchScheduler:
+    """Keeps the most requested cache entries warm
+
+    Every interval, entries of the given caches that go stale within lead_time are
+    ranked by access count and at most request_budget of them are refreshed in the
+    background. Access counts then decay so the ranking follows recent traffic, and
+    entries past their hard ttl are evicted.
+    """
+
+    def __init__(
+        self,
+        caches: Sequence[StaleWhileRevalidateCache],
+        interval: timedelta = timedelta(seconds=30),
+        lead_time: timedelta = timedelta(seconds=60),
+        request_budget: int = 20,
+        min_access_count: float = 2.0,
+        access_decay: float = 0.5,
+    ):
+        self._caches = list(caches)
+        self._interval = interval.total_seconds()
+        self._lead_time = lead_time
+        self._request_budget = request_budget
+        self._min_access_count = min_access_count
+        self._access_decay = access_decay
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.prefetches = 0
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="prefetch-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> int:
+        """Schedules refreshes of the hottest expiring keys, returns how many"""
+        candidates = [
+            (access_count, cache_index, key)
+            for cache_index, cache in enumerate(self._caches)
+            for key, access_count in cache.get_expiring_keys(self._lead_time)
+            if access_count >= self._min_access_count
+        ]
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+
+        scheduled = 0
+        for _, cache_index, key in candidates:
+            if scheduled >= self._request_budget:
+                break
+            scheduled += self._caches[cache_index].refresh_in_background(key)
+
+        for cache in self._caches:
+            cache.decay_access_counts(self._access_decay)
+            cache.evict_expired()
+        if scheduled:
+            logger.debug(f"prefetching {scheduled} of {len(candidates)} hot keys")
+        self.prefetches += scheduled
+        return scheduled
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                self.run_once()
+            except Exception as error:
+                logger.warning(f"prefetch run failed: {error}")
@@ -0,0 +1,539 @@
+import argparse
+import importlib.util
+import io
+import sys
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from enum import Enum
+from functools import partial
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+)
+
+import pandas as pd
+from loguru import logger
+from requests import Response
+
+from zc_flightplan_toolkit.api import CheckWxAPI, ClowdIoDATISAPI, FlightAwareAPI
+from zc_flightplan_toolkit.caching import StaleWhileRevalidateCache
+from zc_flightplan_toolkit.metrics import (
+    StatsdExporter,
+    cache_collector,
+    format_prometheus,
+    get_metrics,
+)
+from zc_flightplan_toolkit.runways import DMAirportRunwayInfo
+from zc_flightplan_toolkit.tracks import (
+    get_north_atlantic_track_records,
+    get_pacific_track_records,
+    get_pacific_tracks_for_city_pair,
+)
+from zc_flightplan_toolkit.transport import (
+    RecordingTransport,
+    ReplayTransport,
+    Transport,
+    recorded_latency,
+    set_default_transport,
+)
+
+QUERY_COLUMN = "query"
+
+ERROR_COLUMN = "error"
+
+DEFAULT_WORKERS = 8
+
+
+class OutputFormat(Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+    PARQUET = "parquet"
+
+
+class ResultWriter:
+    """Writes result frames as they arrive, parquet is written once on close
+
+    CSV columns are fixed by the first frame with more than query and error columns,
+    error-only frames before it are held back until then (keeping an error column),
+    later frames are aligned to them.
+    """
+
+    def __init__(self, output: IO[bytes], output_format: OutputFormat):
+        self._output = output
+        self._text_output = io.TextIOWrapper(
+            output, encoding="utf-8", newline="", write_through=True
+        )
+        self._format = output_format
+        self._columns: Optional[List[str]] = None
+        self._frames: List[pd.DataFrame] = []
+        self.rows = 0
+
+    def write(self, frame: pd.DataFrame) -> None:
+        self.rows += len(frame)
+        if self._format is OutputFormat.PARQUET:
+            self._frames.append(frame)
+        elif self._format is OutputFormat.JSONL:
+            if len(frame):
+                records = frame.to_json(
+                    orient="records", lines=True, date_format="iso"
+                ).rstrip("\n")
+                self._text_output.write(f"{records}\n")
+        else:
+            self._write_csv(frame)
+
+    def close(self) -> None:
+        try:
+            if self._format is OutputFormat.CSV and self._columns is None:
+                # nothing but errors, the error frames set the columns after all
+                self._write_csv_header(
+                    pd.concat(self._frames).columns if self._frames else []
+                )
+                self._write_held_back_csv_frames()
+            if self._format is OutputFormat.PARQUET:
+                frames = [frame for frame in self._frames if len(frame)]
+                results = (
+                    pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+                )
+                results.to_parquet(self._output, index=False)
+        finally:
+            # leave the underlying output (possibly stdout) open for the caller
+            self._text_output.flush()
+            self._text_output.detach()
+
+    def _write_csv(self, frame: pd.DataFrame) -> None:
+        if self._columns is None:
+            if set(frame.columns) <= {QUERY_COLUMN, ERROR_COLUMN}:
+                self._frames.append(frame)
+                return
+            columns = frame.columns.tolist()
+            if self._frames and ERROR_COLUMN not in columns:
+                columns.append(ERROR_COLUMN)
+            self._write_csv_header(columns)
+            self._write_held_back_csv_frames()
+        self._write_csv_rows(frame)
+
+    def _write_csv_header(self, columns: Iterable[str]) -> None:
+        self._columns = list(columns)
+        if self._columns:
+            pd.DataFrame(columns=self._columns).to_csv(self._text_output, index=False)
+
+    def _write_held_back_csv_frames(self) -> None:
+        for frame in self._frames:
+            self._write_csv_rows(frame)
+        self._frames.clear()
+
+    def _write_csv_rows(self, frame: pd.DataFrame) -> None:
+        columns = self._columns or []
+        dropped_columns = set(frame.columns) - set(columns)
+        if dropped_columns:
+            logger.warning(f"csv output drops columns {sorted(dropped_columns)}")
+        frame.reindex(columns=columns).to_csv(
+            self._text_output, index=False, header=False
+        )
+
+
+class ToolkitClients:
+    """API clients shared by every query of a run, created on first use"""
+
+    def __init__(
+        self,
+        aero_api_key: str = "",
+        checkwx_api_key: str = "",
+        response_cache: Optional[StaleWhileRevalidateCache[Response]] = None,
+    ):
+        self._aero_api_key = aero_api_key
+        self._checkwx_api_key = checkwx_api_key
+        self.response_cache = response_cache
+        if response_cache is not None:
+            get_metrics().register_collector(
+                "response_cache", cache_collector("response", response_cache)
+            )
+        self._flightaware_api: Optional[FlightAwareAPI] = None
+        self._weather_api: Optional[CheckWxAPI] = None
+        self._datis_api: Optional[ClowdIoDATISAPI] = None
+        self._runway_info: Optional[DMAirportRunwayInfo] = None
+
+    @property
+    def flightaware_api(self) -> FlightAwareAPI:
+        if self._flightaware_api is None:
+            self._flightaware_api = FlightAwareAPI(
+                api_key=self._aero_api_key,
+                weather_api=self.weather_api,
+                datis_api=self.datis_api,
+                runway_info_source=self.runway_info,
+                response_cache=self.response_cache,
+            )
+        return self._flightaware_api
+
+    @property
+    def weather_api(self) -> CheckWxAPI:
+        if self._weather_api is None:
+            self._weather_api = self.make_weather_api()
+        return self._weather_api
+
+    @property
+    def datis_api(self) -> ClowdIoDATISAPI:
+        if self._datis_api is None:
+            self._datis_api = ClowdIoDATISAPI(response_cache=self.response_cache)
+        return self._datis_api
+
+    @property
+    def runway_info(self) -> DMAirportRunwayInfo:
+        if self._runway_info is None:
+            self._runway_info = DMAirportRunwayInfo()
+        return self._runway_info
+
+    def make_weather_api(self) -> CheckWxAPI:
+        """CheckWxAPI keeps the last decoded METAR, concurrent decodes need their own"""
+        return CheckWxAPI(
+            api_key=self._checkwx_api_key, response_cache=self.response_cache
+        )
+
+
+def get_airports(clients: ToolkitClients, airport_id: str) -> pd.DataFrame:
+    return clients.flightaware_api.get_airport_information(airport_id)
+
+
+def get_routes(
+    clients: ToolkitClients, city_pair: str, max_pages: int = 1
+) -> pd.DataFrame:
+    start_airport, end_airport = _split_city_pair(city_pair)
+    return clients.flightaware_api.get_route_info(
+        start_airport, end_airport, max_pages=max_pages
+    )
+
+
+def get_decoded_metar(clients: ToolkitClients, icao: str) -> pd.DataFrame:
+    decoded_metar = clients.make_weather_api().get_metar(icao, decoded=True)
+    return decoded_metar.T.reset_index(drop=True)
+
+
+def get_taf(clients: ToolkitClients, icao: str) -> pd.DataFrame:
+    return pd.DataFrame([{"taf": clients.weather_api.get_taf(icao)}])
+
+
+def get_datis(clients: ToolkitClients, icao: str) -> pd.DataFrame:
+    return pd.DataFrame([{"datis": clients.datis_api.request_datis(icao.upper())}])
+
+
+def get_runways(clients: ToolkitClients, icao: str) -> pd.DataFrame:
+    return clients.runway_info.get_airport_runways(icao)
+
+
+QUERY_LOOKUPS: Dict[str, Callable[..., pd.DataFrame]] = {
+    "airports": get_airports,
+    "routes": get_routes,
+    "metar": get_decoded_metar,
+    "taf": get_taf,
+    "datis": get_datis,
+    "runways": get_runways,
+}
+
+
+def run_queries(
+    lookup: Callable[[str], pd.DataFrame],
+    queries: Iterable[str],
+    workers: int = DEFAULT_WORKERS,
+    executor: Optional[Executor] = None,
+) -> Iterator[pd.DataFrame]:
+    """Runs lookups concurrently, yielding results in query order as they complete
+
+    Every frame starts with the query, failed lookups give a row with the error.
+    Without an executor, one with the given number of workers is used for the run.
+    """
+    if executor is not None:
+        yield from executor.map(partial(_run_query, lookup), queries)
+        return
+    with ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="cli-query"
+    ) as executor:
+        yield from executor.map(partial(_run_query, lookup), queries)
+
+
+def read_queries(queries: Sequence[str], input_files: Sequence[str]) -> List[str]:
+    """Queries from the command line then input files ("-" is stdin), one per line
+
+    Blank lines and lines starting with # are skipped.
+    """
+    lines = list(queries)
+    for input_file in input_files:
+        if input_file == "-":
+            lines += sys.stdin.read().splitlines()
+            continue
+        with open(input_file, encoding="utf-8") as queries_file:
+            lines += queries_file.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="zc-flightplan",
+        description="Batch airport, route, weather and track lookups without a GUI",
+    )
+    parser.add_argument("--aero-api-key", default="", help="defaults to AERO_API_KEY")
+    parser.add_argument(
+        "--checkwx-api-key", default="", help="defaults to CHECKWX_API_KEY"
+    )
+    parser.add_argument("--log-level", default="WARNING")
+    add_transport_arguments(parser)
+    add_metrics_arguments(parser)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    query_options = argparse.ArgumentParser(add_help=False)
+    query_options.add_argument("queries", nargs="*")
+    query_options.add_argument(
+        "-i",
+        "--input",
+        action="append",
+        default=[],
+        help="file with one query per line, - for stdin (repeatable)",
+    )
+    query_options.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS)
+
+    output_options = argparse.ArgumentParser(add_help=False)
+    output_options.add_argument(
+        "-o", "--output", default="-", help="output file, - for stdout (default)"
+    )
+    output_options.add_argument(
+        "-f",
+        "--format",
+        choices=[output_format.value for output_format in OutputFormat],
+        help="defaults to the output file extension, csv otherwise",
+    )
+
+    for command, help_text in (
+        ("airports", "airport information by ICAO, IATA or LID code"),
+        ("metar", "raw METARs (batched), --decoded for one row per station"),
+        ("taf", "raw TAFs"),
+        ("datis", "digital ATIS"),
+        ("runways", "runway ends of airports (ICAO)"),
+    ):
+        subparser = subparsers.add_parser(
+            command, help=help_text, parents=[query_options, output_options]
+        )
+        if command == "metar":
+            subparser.add_argument("--decoded", action="store_true")
+
+    routes_parser = subparsers.add_parser(
+        "routes",
+        help='filed IFR routes between airport pairs, each query "ORIGIN DESTINATION"',
+        parents=[query_options, output_options],
+    )
+    routes_parser.add_argument("--max-pages", type=int, default=1)
+
+    tracks_parser = subparsers.add_parser(
+        "tracks", help="published oceanic tracks", parents=[output_options]
+    )
+    tracks_parser.add_argument("system", choices=["nat", "pacific"])
+    tracks_parser.add_argument(
+        "--city-pair",
+        nargs=2,
+        metavar=("ORIGIN", "DESTINATION"),
+        help="pacific tracks serving both airports only",
+    )
+    return parser
+
+
+def add_transport_arguments(parser: argparse.ArgumentParser) -> None:
+    archive_options = parser.add_mutually_exclusive_group()
+    archive_options.add_argument(
+        "--record", metavar="ARCHIVE", help="also append upstream traffic to ARCHIVE"
+    )
+    archive_options.add_argument(
+        "--replay", metavar="ARCHIVE", help="answer upstream requests from ARCHIVE"
+    )
+    parser.add_argument(
+        "--replay-latency",
+        type=float,
+        default=0.0,
+        metavar="SCALE",
+        help="replay recorded upstream latency scaled by SCALE (default: none)",
+    )
+
+
+def add_metrics_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--statsd",
+        metavar="HOST:PORT",
+        help="push metrics to a StatsD daemon as they are recorded",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        metavar="PATH",
+        help="write metrics in the Prometheus text format to PATH on exit",
+    )
+
+
+@contextmanager
+def export_metrics(args: argparse.Namespace) -> Iterator[None]:
+    """Exports metrics recorded while the block runs, per --statsd/--metrics-file"""
+    exporter = None
+    if args.statsd:
+        host, _, port = args.statsd.rpartition(":")
+        exporter = StatsdExporter(host or "127.0.0.1", int(port)).start()
+    try:
+        yield
+    finally:
+        if exporter is not None:
+            exporter.stop()
+            logger.info(f"sent {exporter.sent} metrics to statsd at {args.statsd}")
+        if args.metrics_file:
+            with open(args.metrics_file, "w", encoding="utf-8") as metrics_file:
+                metrics_file.write(format_prometheus())
+
+
+@contextmanager
+def archive_transport(args: argparse.Namespace) -> Iterator[None]:
+    """Records or replays upstream traffic while the block runs, per --record/--replay"""
+    if args.record:
+        transport: Transport = RecordingTransport(args.record)
+    elif args.replay:
+        transport = ReplayTransport(
+            args.replay,
+            recorded_latency(args.replay_latency) if args.replay_latency else None,
+        )
+    else:
+        yield
+        return
+
+    previous_transport = set_default_transport(transport)
+    try:
+        yield
+    finally:
+        set_default_transport(previous_transport)
+        if isinstance(transport, RecordingTransport):
+            transport.close()
+            logger.info(f"recorded {transport.recorded} requests to {args.record}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    with archive_transport(args), export_metrics(args):
+        return _run_command(args)
+
+
+def _run_command(args: argparse.Namespace) -> int:
+    output_format = _get_output_format(args.format, args.output)
+    if output_format is OutputFormat.PARQUET and not _has_parquet_engine():
+        logger.error("parquet output needs pyarrow or fastparquet installed")
+        return 2
+    clients = ToolkitClients(args.aero_api_key, args.checkwx_api_key)
+    if args.command == "tracks":
+        results = iter([_get_tracks(args.system, args.city_pair)])
+    else:
+        queries = read_queries(args.queries, args.input)
+        if not queries:
+            logger.error("no queries given")
+            return 2
+        results = _get_query_results(args, clients, queries)
+
+    failed_queries = 0
+    with (
+        nullcontext(sys.stdout.buffer)
+        if args.output == "-"
+        else open(args.output, "wb")
+    ) as output:
+        writer = ResultWriter(output, output_format)
+        try:
+            for result in results:
+                writer.write(result)
+                if ERROR_COLUMN in result.columns:
+                    failed_queries += int(result[ERROR_COLUMN].notna().sum())
+        finally:
+            writer.close()
+
+    logger.info(f"wrote {writer.rows} rows, {failed_queries} queries failed")
+    return 1 if failed_queries else 0
+
+
+def _has_parquet_engine() -> bool:
+    return any(
+        importlib.util.find_spec(engine) is not None
+        for engine in ("pyarrow", "fastparquet")
+    )
+
+
+def _get_query_results(
+    args: argparse.Namespace, clients: ToolkitClients, queries: List[str]
+) -> Iterator[pd.DataFrame]:
+    if args.command == "metar" and not args.decoded:
+        # CheckWX answers many stations per call, no need for a worker per station
+        return iter([_get_raw_metars(clients, queries)])
+
+    lookup = partial(QUERY_LOOKUPS[args.command], clients)
+    if args.command == "routes":
+        lookup = partial(lookup, max_pages=args.max_pages)
+    return run_queries(lookup, queries, args.workers)
+
+
+def _get_raw_metars(clients: ToolkitClients, icaos: List[str]) -> pd.DataFrame:
+    metars = clients.weather_api.get_metars(icaos)
+    return pd.DataFrame(
+        {
+            QUERY_COLUMN: icaos,
+            "metar": [metars.get(icao.upper(), "no metar found") for icao in icaos],
+        }
+    )
+
+
+def _get_tracks(system: str, city_pair: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    if system == "nat":
+        tracks: Sequence[NamedTuple] = get_north_atlantic_track_records()
+    elif city_pair:
+        origin, destination = city_pair
+        tracks = get_pacific_tracks_for_city_pair(origin, destination)
+    else:
+        tracks = get_pacific_track_records()
+    # waypoint and airport tuples are joined so every format can hold them
+    return pd.DataFrame(
+        [
+            {
+                field: " ".join(map(str, value)) if isinstance(value, tuple) else value
+                for field, value in track._asdict().items()
+            }
+            for track in tracks
+        ]
+    )
+
+
+def _run_query(lookup: Callable[[str], pd.DataFrame], query: str) -> pd.DataFrame:
+    try:
+        result = lookup(query)
+    except Exception as error:
+        logger.warning(f"{query} failed: {error}")
+        return pd.DataFrame([{QUERY_COLUMN: query, ERROR_COLUMN: str(error)}])
+    result = result.reset_index(drop=True)
+    result.insert(0, QUERY_COLUMN, query)
+    return result
+
+
+def _split_city_pair(city_pair: str) -> List[str]:
+    airports = city_pair.replace(",", " ").split()
+    if len(airports) != 2:
+        raise ValueError(f'expected "ORIGIN DESTINATION", got "{city_pair}"')
+    return airports
+
+
+def _get_output_format(output_format: Optional[str], output: str) -> OutputFormat:
+    if output_format is not None:
+        return OutputFormat(output_format)
+    extension = output.rsplit(".", 1)[-1].lower() if "." in output else ""
+    if extension in ("json", "jsonl", "ndjson"):
+        return OutputFormat.JSONL
+    if extension in ("parquet", "pq"):
+        return OutputFormat.PARQUET
+    return OutputFormat.CSV
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,6 +17,8 @@ CHECKWX_API_KEY = os.environ.get("CHECKWX_API_KEY", "")
 
 CHECKWX_API_URL = "https://api.checkwx.com"
 
+CHECKWX_MAX_STATIONS = 20
+
 
 class FlightAwareAirportColumns(Enum):
     ICAO = "code_icao"
@@ -44,3 +46,4 @@ class DATISInfo(Enum):
 class Preferences(Enum):
     AERO_API_KEY = "aero_api_key"
     CHECKWX_API_KEY = "checkwx_api_key"
+    WATCHED_AIRPORTS = "watched_airports"
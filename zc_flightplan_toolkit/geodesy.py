@@ -0,0 +1,225 @@
+from typing import Literal, Optional, Tuple
+
+import numpy as np
+import numpy.typing as npt
+import pandas as pd
+
+from zc_flightplan_toolkit.constants import FlightAwareAirportColumns
+
+EARTH_RADIUS_NM = 3440.065
+
+METERS_PER_NM = 1852.0
+
+WGS84_SEMI_MAJOR_AXIS = 6378137.0
+
+WGS84_FLATTENING = 1 / 298.257223563
+
+ArrayLike = npt.ArrayLike
+
+DistanceMethod = Literal["haversine", "vincenty"]
+
+
+def haversine_distance(
+    latitude_1: ArrayLike,
+    longitude_1: ArrayLike,
+    latitude_2: ArrayLike,
+    longitude_2: ArrayLike,
+) -> np.ndarray:
+    """Great circle distance in nautical miles between points given in degrees
+
+    Inputs broadcast against each other, NaN coordinates give NaN distances.
+    """
+    latitude_1, longitude_1, latitude_2, longitude_2 = _to_radians(
+        latitude_1, longitude_1, latitude_2, longitude_2
+    )
+    half_chord = (
+        np.sin((latitude_2 - latitude_1) / 2) ** 2
+        + np.cos(latitude_1)
+        * np.cos(latitude_2)
+        * np.sin((longitude_2 - longitude_1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(half_chord, 0, 1)))
+
+
+def vincenty_distance(
+    latitude_1: ArrayLike,
+    longitude_1: ArrayLike,
+    latitude_2: ArrayLike,
+    longitude_2: ArrayLike,
+    max_iterations: int = 200,
+    tolerance: float = 1e-12,
+) -> np.ndarray:
+    """Distance on the WGS84 ellipsoid in nautical miles between points in degrees
+
+    Iterates on all points at once, nearly antipodal points that do not converge
+    fall back to the haversine distance.
+    """
+    latitude_1, longitude_1, latitude_2, longitude_2 = np.broadcast_arrays(
+        *_to_radians(latitude_1, longitude_1, latitude_2, longitude_2)
+    )
+    flattening = WGS84_FLATTENING
+    semi_minor_axis = (1 - flattening) * WGS84_SEMI_MAJOR_AXIS
+
+    longitude_difference = longitude_2 - longitude_1
+    reduced_latitude_1 = np.arctan((1 - flattening) * np.tan(latitude_1))
+    reduced_latitude_2 = np.arctan((1 - flattening) * np.tan(latitude_2))
+    sin_u1, cos_u1 = np.sin(reduced_latitude_1), np.cos(reduced_latitude_1)
+    sin_u2, cos_u2 = np.sin(reduced_latitude_2), np.cos(reduced_latitude_2)
+
+    lambda_ = longitude_difference
+    iterations = 0
+    with np.errstate(invalid="ignore", divide="ignore"):
+        while True:
+            sin_lambda, cos_lambda = np.sin(lambda_), np.cos(lambda_)
+            sin_sigma = np.hypot(
+                cos_u2 * sin_lambda, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lambda
+            )
+            cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lambda
+            sigma = np.arctan2(sin_sigma, cos_sigma)
+            sin_alpha = np.where(
+                sin_sigma == 0, 0.0, cos_u1 * cos_u2 * sin_lambda / sin_sigma
+            )
+            cos_sq_alpha = 1 - sin_alpha**2
+            cos_2sigma_m = np.where(
+                cos_sq_alpha == 0,
+                0.0,
+                cos_sigma - 2 * sin_u1 * sin_u2 / cos_sq_alpha,
+            )
+            c = (
+                flattening
+                / 16
+                * cos_sq_alpha
+                * (4 + flattening * (4 - 3 * cos_sq_alpha))
+            )
+            previous_lambda = lambda_
+            lambda_ = longitude_difference + (1 - c) * flattening * sin_alpha * (
+                sigma
+                + c
+                * sin_sigma
+                * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+            )
+            converged = np.abs(lambda_ - previous_lambda) <= tolerance
+            iterations += 1
+            if converged.all() or iterations >= max_iterations:
+                break
+
+        u_sq = (
+            cos_sq_alpha
+            * (WGS84_SEMI_MAJOR_AXIS**2 - semi_minor_axis**2)
+            / semi_minor_axis**2
+        )
+        a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+        b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+        delta_sigma = (
+            b
+            * sin_sigma
+            * (
+                cos_2sigma_m
+                + b
+                / 4
+                * (
+                    cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                    - b
+                    / 6
+                    * cos_2sigma_m
+                    * (-3 + 4 * sin_sigma**2)
+                    * (-3 + 4 * cos_2sigma_m**2)
+                )
+            )
+        )
+        distance = semi_minor_axis * a * (sigma - delta_sigma) / METERS_PER_NM
+
+    not_converged = ~converged & ~np.isnan(lambda_)
+    if not_converged.any():
+        distance = np.where(
+            not_converged,
+            haversine_distance(
+                *(
+                    np.degrees(coordinate)
+                    for coordinate in (latitude_1, longitude_1, latitude_2, longitude_2)
+                )
+            ),
+            distance,
+        )
+    return distance
+
+
+def great_circle_distance(
+    latitude_1: ArrayLike,
+    longitude_1: ArrayLike,
+    latitude_2: ArrayLike,
+    longitude_2: ArrayLike,
+    method: DistanceMethod = "haversine",
+) -> np.ndarray:
+    distance_function = (
+        vincenty_distance if method == "vincenty" else haversine_distance
+    )
+    return distance_function(latitude_1, longitude_1, latitude_2, longitude_2)
+
+
+def leg_distances(
+    coordinates: np.ndarray, method: DistanceMethod = "haversine"
+) -> np.ndarray:
+    """Distances between consecutive points along the second to last axis
+
+    coordinates has shape (..., points, 2) holding latitude and longitude in degrees,
+    the result has shape (..., points - 1).
+    """
+    return great_circle_distance(
+        coordinates[..., :-1, 0],
+        coordinates[..., :-1, 1],
+        coordinates[..., 1:, 0],
+        coordinates[..., 1:, 1],
+        method,
+    )
+
+
+def distance_matrix(
+    latitudes_1: ArrayLike,
+    longitudes_1: ArrayLike,
+    latitudes_2: ArrayLike,
+    longitudes_2: ArrayLike,
+    method: DistanceMethod = "haversine",
+) -> np.ndarray:
+    """Returns the N x M matrix of distances (nm) between two sets of points"""
+    return great_circle_distance(
+        np.asarray(latitudes_1, dtype=np.float64)[:, np.newaxis],
+        np.asarray(longitudes_1, dtype=np.float64)[:, np.newaxis],
+        np.asarray(latitudes_2, dtype=np.float64)[np.newaxis, :],
+        np.asarray(longitudes_2, dtype=np.float64)[np.newaxis, :],
+        method,
+    )
+
+
+def airport_distance_matrix(
+    airports: pd.DataFrame,
+    other_airports: Optional[pd.DataFrame] = None,
+    method: DistanceMethod = "haversine",
+) -> pd.DataFrame:
+    """Distances (nm) between airport frames in the FlightAwareAirportColumns schema
+
+    Rows and columns are labelled by ICAO code, other_airports defaults to airports.
+    """
+    other_airports = airports if other_airports is None else other_airports
+    latitude_col = FlightAwareAirportColumns.LATITUDE.value
+    longitude_col = FlightAwareAirportColumns.LONGITUDE.value
+    icao_col = FlightAwareAirportColumns.ICAO.value
+    distances = distance_matrix(
+        airports[latitude_col],
+        airports[longitude_col],
+        other_airports[latitude_col],
+        other_airports[longitude_col],
+        method,
+    )
+    return pd.DataFrame(
+        distances,
+        index=pd.Index(airports[icao_col]),
+        columns=pd.Index(other_airports[icao_col]),
+    )
+
+
+def _to_radians(*coordinates: ArrayLike) -> Tuple[np.ndarray, ...]:
+    return tuple(
+        np.radians(np.asarray(coordinate, dtype=np.float64))
+        for coordinate in coordinates
+    )
@@ -1,20 +1,37 @@
-from typing import Optional
+from functools import partial
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 from PySide6.QtCore import (
     QAbstractTableModel,
     QItemSelection,
     QModelIndex,
+    QObject,
+    QPersistentModelIndex,
+    QRunnable,
     QSettings,
     Qt,
+    QThreadPool,
     Signal,
+    Slot,
+)
+from PySide6.QtGui import QStandardItem, QStandardItemModel
+from PySide6.QtWidgets import (
+    QCompleter,
+    QDialog,
+    QLineEdit,
+    QTableView,
+    QVBoxLayout,
+    QWidget,
 )
-from PySide6.QtWidgets import QDialog, QTableView, QWidget
 
+from zc_flightplan_toolkit.airport_search import AirportSearchIndex
 from zc_flightplan_toolkit.qdesigner_generated_ui.generated_settings import (
     Ui_preferences_dialog,
 )
+from zc_flightplan_toolkit.watch import AirportWatchScheduler, WatchColumns
 
 
 class CustomQTableView(QTableView):
@@ -30,8 +47,154 @@ class CustomQTableView(QTableView):
         return super().selectionChanged(selected, deselected)
 
 
+class AirportCompleter(QCompleter):
+    """Type-ahead for airport line edits, completes the selected airport to its ICAO"""
+
+    def __init__(
+        self,
+        search_index: AirportSearchIndex,
+        line_edit: QLineEdit,
+        max_suggestions: int = 10,
+    ):
+        super().__init__(line_edit)
+        self._search_index = search_index
+        self._max_suggestions = max_suggestions
+        self._suggestions = QStandardItemModel(self)
+
+        self.setModel(self._suggestions)
+        self.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        line_edit.setCompleter(self)
+        line_edit.textEdited.connect(self.update_suggestions)
+
+    def update_suggestions(self, text: str) -> None:
+        self._suggestions.clear()
+        for match in self._search_index.search(text, limit=self._max_suggestions):
+            item = QStandardItem(f"{match.code_icao}  {match.name}, {match.city}")
+            item.setData(match.code_icao, Qt.ItemDataRole.UserRole)
+            self._suggestions.appendRow(item)
+        if self._suggestions.rowCount():
+            self.complete()
+
+    def pathFromIndex(self, index: Union[QModelIndex, QPersistentModelIndex]) -> str:
+        return index.data(Qt.ItemDataRole.UserRole)
+
+
+class RequestSignals(QObject):
+    finished = Signal(str, int, object)
+    failed = Signal(str, int, str)
+
+
+class RequestWorker(QRunnable):
+    def __init__(self, name: str, generation: int, request: Callable[[], Any]):
+        super().__init__()
+        self.signals = RequestSignals()
+        self._name = name
+        self._generation = generation
+        self._request = request
+
+    def run(self) -> None:
+        try:
+            result = self._request()
+        except Exception as error:
+            logger.exception(f"{self._name} request failed")
+            self.signals.failed.emit(self._name, self._generation, str(error))
+            return
+        self.signals.finished.emit(self._name, self._generation, result)
+
+
+class RequestRunner(QObject):
+    """Runs blocking requests on a thread pool and hands results back on the GUI thread
+
+    A request supersedes the pending request with the same name: it is removed from
+    the queue if it has not started, otherwise its result is discarded. Failures are
+    reported through request_failed and, when given, the request's on_error.
+    """
+
+    pending_changed = Signal(int)
+    request_failed = Signal(str, str)
+
+    def __init__(self, parent: Optional[QObject] = None, max_threads: int = 8):
+        super().__init__(parent)
+        self._thread_pool = QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(max_threads)
+        self._generations: Dict[str, int] = {}
+        self._pending: Dict[
+            str,
+            Tuple[
+                RequestWorker, Callable[[Any], None], Optional[Callable[[str], None]]
+            ],
+        ] = {}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def submit(
+        self,
+        name: str,
+        request: Callable[[], Any],
+        on_result: Callable[[Any], None],
+        on_error: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self._cancel_pending(name)
+        generation = self._generations.get(name, 0) + 1
+        self._generations[name] = generation
+
+        worker = RequestWorker(name, generation, request)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        self._pending[name] = (worker, on_result, on_error)
+        self._thread_pool.start(worker)
+        self.pending_changed.emit(self.pending)
+
+    def cancel_all(self) -> None:
+        for name in list(self._pending):
+            self._cancel_pending(name)
+        self.pending_changed.emit(self.pending)
+
+    def wait_for_done(self, timeout_ms: int = -1) -> bool:
+        return self._thread_pool.waitForDone(timeout_ms)
+
+    def _cancel_pending(self, name: str) -> None:
+        if name not in self._pending:
+            return
+        worker, _, _ = self._pending.pop(name)
+        self._generations[name] += 1
+        if not self._thread_pool.tryTake(worker):
+            logger.debug(f"{name} request superseded while running, result dropped")
+
+    @Slot(str, int, object)
+    def _on_finished(self, name: str, generation: int, result: Any) -> None:
+        if not self._is_current(name, generation):
+            return
+        _, on_result, _ = self._pending.pop(name)
+        self.pending_changed.emit(self.pending)
+        on_result(result)
+
+    @Slot(str, int, str)
+    def _on_failed(self, name: str, generation: int, error: str) -> None:
+        if not self._is_current(name, generation):
+            return
+        _, _, on_error = self._pending.pop(name)
+        self.pending_changed.emit(self.pending)
+        self.request_failed.emit(name, error)
+        if on_error is not None:
+            on_error(error)
+
+    def _is_current(self, name: str, generation: int) -> bool:
+        return self._generations.get(name) == generation and name in self._pending
+
+
+DISPLAY_BLOCK_ROWS = 256
+
+
 class PandasModel(QAbstractTableModel):
-    """A model to interface a Qt view with pandas dataframe"""
+    """A model to interface a Qt view with pandas dataframe
+
+    Cells are converted to display strings once, a block of visible rows at a time.
+    Sorting and filtering only reorder row positions, the dataframe itself is never
+    copied.
+    """
 
     def __init__(
         self,
@@ -41,23 +204,25 @@ class PandasModel(QAbstractTableModel):
         parent=None,
     ):
         QAbstractTableModel.__init__(self, parent)
-        self._dataframe = dataframe
         self._show_index = show_index
         self._show_headers = show_headers
+        self._sort_key: Tuple[int, Qt.SortOrder] = (-1, Qt.SortOrder.AscendingOrder)
+        self._filter_key: Tuple[str, Optional[int]] = ("", None)
+        self._load_dataframe(dataframe)
 
     def rowCount(self, parent=QModelIndex()) -> int:
         """Override method from QAbstractTableModel
 
-        Return row count of the pandas DataFrame
+        Return count of the visible (filtered) rows of the pandas DataFrame
         """
-        return len(self._dataframe) if parent == QModelIndex() else 0
+        return len(self._row_order) if parent == QModelIndex() else 0
 
     def columnCount(self, parent=QModelIndex()) -> int:
         """Override method from QAbstractTableModel
 
         Return column count of the pandas DataFrame
         """
-        return len(self._dataframe.columns) if parent == QModelIndex() else 0
+        return len(self._column_labels) if parent == QModelIndex() else 0
 
     def data(
         self, index: QModelIndex, role: Qt.ItemDataRole = Qt.ItemDataRole.DisplayRole
@@ -70,7 +235,16 @@ class PandasModel(QAbstractTableModel):
             return None
 
         if role == Qt.ItemDataRole.DisplayRole:
-            return str(self._dataframe.iloc[index.row(), index.column()])
+            row, column = index.row(), index.column()
+            display_value = self._display_columns[column][self._row_order[row]]
+            if display_value is None:
+                block_start = row - row % DISPLAY_BLOCK_ROWS
+                self._convert_rows(
+                    column,
+                    self._row_order[block_start : block_start + DISPLAY_BLOCK_ROWS],
+                )
+                display_value = self._display_columns[column][self._row_order[row]]
+            return display_value
 
         return None
 
@@ -83,20 +257,456 @@ class PandasModel(QAbstractTableModel):
         """
         if role == Qt.ItemDataRole.DisplayRole:
             if orientation == Qt.Orientation.Horizontal:
-                return (
-                    str(self._dataframe.columns[section])
-                    if self._show_headers
-                    else None
-                )
+                return self._column_labels[section] if self._show_headers else None
 
             if orientation == Qt.Orientation.Vertical:
-                return str(self._dataframe.index[section]) if self._show_index else None
+                if not self._show_index:
+                    return None
+                if self._index_labels is None:
+                    self._index_labels = self._dataframe.index.astype(str).to_numpy()
+                return self._index_labels[self._row_order[section]]
 
         return None
 
+    def sort(
+        self, column: int, order: Qt.SortOrder = Qt.SortOrder.AscendingOrder
+    ) -> None:
+        """Override method from QAbstractTableModel
+
+        Sorts rows by a column, a negative column restores the dataframe order
+        """
+        self.layoutAboutToBeChanged.emit()
+        previous_row_order = self._row_order
+        self._sort_key = (column, order)
+        self._apply_sort()
+        self._update_row_order()
+        self._remap_persistent_rows(previous_row_order, np.arange(len(self._dataframe)))
+        self.layoutChanged.emit()
+
+    def set_filter(self, text: str, column: Optional[int] = None) -> None:
+        """Only shows rows containing text (case insensitive), in column or any column"""
+        self.beginResetModel()
+        self._filter_key = (text, column)
+        self._apply_filter()
+        self._update_row_order()
+        self.endResetModel()
+
+    def update_dataframe(
+        self, dataframe: pd.DataFrame, key_columns: Optional[Sequence[str]] = None
+    ) -> None:
+        """Replaces the data, signalling only the rows removed, inserted and changed
+
+        Rows are matched on key_columns, or on the index when not given. Non-unique
+        keys fall back to matching by position, different columns or an active sort
+        or filter to a model reset.
+        """
+        if (
+            list(dataframe.columns) != list(self._dataframe.columns)
+            or self._sort_key[0] >= 0
+            or self._filter_key[0]
+        ):
+            self.beginResetModel()
+            self._load_dataframe(dataframe)
+            self._apply_sort()
+            self._apply_filter()
+            self._update_row_order()
+            self.endResetModel()
+            return
+
+        old_to_new = _match_rows(self._dataframe, dataframe, key_columns)
+        for first_row, last_row in reversed(_contiguous_runs(old_to_new < 0)):
+            self.beginRemoveRows(QModelIndex(), first_row, last_row)
+            self._row_order = np.delete(
+                self._row_order, np.s_[first_row : last_row + 1]
+            )
+            self.endRemoveRows()
+
+        kept_old_positions = self._row_order
+        kept_new_positions = old_to_new[kept_old_positions]
+        changed_cells = self._swap_dataframe(
+            dataframe, kept_old_positions, kept_new_positions
+        )
+        for row in np.flatnonzero(changed_cells.any(axis=1)).tolist():
+            changed_columns = np.flatnonzero(changed_cells[row]).tolist()
+            self.dataChanged.emit(
+                self.index(row, changed_columns[0]),
+                self.index(row, changed_columns[-1]),
+            )
+
+        added = np.ones(len(dataframe), dtype=bool)
+        added[kept_new_positions] = False
+        order_kept = bool(np.all(np.diff(kept_new_positions) > 0))
+        for first_position, last_position in _contiguous_runs(added):
+            first_row = (
+                int(np.searchsorted(self._row_order, first_position))
+                if order_kept
+                else len(self._row_order)
+            )
+            self.beginInsertRows(
+                QModelIndex(), first_row, first_row + last_position - first_position
+            )
+            self._row_order = np.insert(
+                self._row_order,
+                first_row,
+                np.arange(first_position, last_position + 1),
+            )
+            self.endInsertRows()
+
+        if not order_kept:
+            self.layoutAboutToBeChanged.emit()
+            previous_row_order = self._row_order
+            self._update_row_order()
+            self._remap_persistent_rows(previous_row_order, np.arange(len(dataframe)))
+            self.layoutChanged.emit()
+        self._row_order = self._sort_order
+
     def get_data(self, view: bool = True) -> pd.DataFrame:
         return self._dataframe if view else self._dataframe.copy()
 
+    def _load_dataframe(self, dataframe: pd.DataFrame) -> None:
+        self._dataframe = dataframe
+        self._column_labels = [str(column) for column in dataframe.columns]
+        self._index_labels: Optional[np.ndarray] = None
+        self._display_columns = [
+            np.full(len(dataframe), None, dtype=object) for _ in dataframe.columns
+        ]
+        self._sort_order = np.arange(len(dataframe))
+        self._row_order = self._sort_order
+        self._row_filter: Optional[np.ndarray] = None
+
+    def _get_display_column(self, column: int) -> np.ndarray:
+        self._convert_rows(column, np.arange(len(self._dataframe)))
+        return self._display_columns[column]
+
+    def _convert_rows(self, column: int, positions: np.ndarray) -> None:
+        display_column = self._display_columns[column]
+        positions = positions[pd.isna(display_column[positions])]
+        if len(positions):
+            display_column[positions] = (
+                self._dataframe.iloc[positions, column]
+                .to_numpy(dtype=object)
+                .astype(str)
+            )
+
+    def _swap_dataframe(
+        self,
+        dataframe: pd.DataFrame,
+        kept_old_positions: np.ndarray,
+        kept_new_positions: np.ndarray,
+    ) -> np.ndarray:
+        """Switches to dataframe keeping display strings of unchanged kept cells,
+        returns which kept cells changed (rows in current view order)"""
+        changed_cells = np.zeros(
+            (len(kept_old_positions), len(self._column_labels)), dtype=bool
+        )
+        display_columns = []
+        for column, old_display_column in enumerate(self._display_columns):
+            changed_cells[:, column] = _find_changed_values(
+                self._dataframe.iloc[kept_old_positions, column],
+                dataframe.iloc[kept_new_positions, column],
+            )
+            kept_display = old_display_column[kept_old_positions]
+            kept_display[changed_cells[:, column]] = None
+            display_column = np.full(len(dataframe), None, dtype=object)
+            display_column[kept_new_positions] = kept_display
+            display_columns.append(display_column)
+
+        self._dataframe = dataframe
+        self._display_columns = display_columns
+        self._index_labels = None
+        self._sort_order = np.arange(len(dataframe))
+        self._row_filter = None
+        self._row_order = kept_new_positions
+        return changed_cells
+
+    def _remap_persistent_rows(
+        self, previous_row_order: np.ndarray, position_map: np.ndarray
+    ) -> None:
+        """Moves persistent indexes (selection, current cell) to where their rows went,
+        position_map maps the previous dataframe positions to the current ones"""
+        row_by_position = np.full(len(self._dataframe), -1)
+        row_by_position[self._row_order] = np.arange(len(self._row_order))
+        previous_indexes = self.persistentIndexList()
+        current_indexes = []
+        for previous_index in previous_indexes:
+            row = row_by_position[
+                position_map[previous_row_order[previous_index.row()]]
+            ]
+            current_indexes.append(
+                self.index(int(row), previous_index.column())
+                if row >= 0
+                else QModelIndex()
+            )
+        self.changePersistentIndexList(previous_indexes, current_indexes)
+
+    def _apply_sort(self) -> None:
+        column, order = self._sort_key
+        self._sort_order = (
+            self._get_sort_order(column, ascending=order == Qt.SortOrder.AscendingOrder)
+            if column >= 0
+            else np.arange(len(self._dataframe))
+        )
+
+    def _apply_filter(self) -> None:
+        text, column = self._filter_key
+        if not text:
+            self._row_filter = None
+            return
+        columns = range(len(self._column_labels)) if column is None else [column]
+        self._row_filter = np.zeros(len(self._dataframe), dtype=bool)
+        for filter_column in columns:
+            self._row_filter |= (
+                pd.Series(self._get_display_column(filter_column), dtype=str)
+                .str.contains(text, case=False, regex=False)
+                .to_numpy(dtype=bool)
+            )
+
+    def _get_sort_order(self, column: int, ascending: bool) -> np.ndarray:
+        values = self._dataframe.iloc[:, column].reset_index(drop=True)
+        try:
+            sorted_values = values.sort_values(
+                ascending=ascending, kind="stable", na_position="last"
+            )
+        except TypeError:
+            sorted_values = pd.Series(self._get_display_column(column)).sort_values(
+                ascending=ascending, kind="stable"
+            )
+        return sorted_values.index.to_numpy()
+
+    def _update_row_order(self) -> None:
+        self._row_order = (
+            self._sort_order
+            if self._row_filter is None
+            else self._sort_order[self._row_filter[self._sort_order]]
+        )
+
+
+def _match_rows(
+    old_dataframe: pd.DataFrame,
+    new_dataframe: pd.DataFrame,
+    key_columns: Optional[Sequence[str]] = None,
+) -> np.ndarray:
+    """Position of every old row in the new dataframe, -1 for removed rows"""
+    old_keys, new_keys = (
+        (
+            pd.MultiIndex.from_frame(dataframe[list(key_columns)])
+            if key_columns
+            else dataframe.index
+        )
+        for dataframe in (old_dataframe, new_dataframe)
+    )
+    if not (old_keys.is_unique and new_keys.is_unique):
+        old_keys = pd.RangeIndex(len(old_dataframe))
+        new_keys = pd.RangeIndex(len(new_dataframe))
+    return new_keys.get_indexer(old_keys)
+
+
+def _find_changed_values(old_values: pd.Series, new_values: pd.Series) -> np.ndarray:
+    old_array = old_values.to_numpy(dtype=object)
+    new_array = new_values.to_numpy(dtype=object)
+    try:
+        unchanged = np.asarray(old_array == new_array, dtype=bool) | (
+            pd.isna(old_array) & pd.isna(new_array)
+        )
+    except (TypeError, ValueError):
+        unchanged = old_array.astype(str) == new_array.astype(str)
+    return ~unchanged
+
+
+def _contiguous_runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """(first, last) positions of every run of True values"""
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return list(
+        zip(
+            np.flatnonzero(edges == 1).tolist(),
+            (np.flatnonzero(edges == -1) - 1).tolist(),
+        )
+    )
+
+
+class IncrementalPandasModel(PandasModel):
+    """PandasModel fed page by page from a streaming source
+
+    Appended rows are handed to the view batch_rows at a time through
+    canFetchMore/fetchMore. When the view wants more rows than are loaded,
+    more_rows_requested asks the owner for the next page.
+    """
+
+    more_rows_requested = Signal()
+
+    def __init__(
+        self,
+        batch_rows: int = 200,
+        show_index: bool = False,
+        show_headers: bool = True,
+        parent=None,
+    ):
+        super().__init__(pd.DataFrame(), show_index, show_headers, parent)
+        self._batch_rows = batch_rows
+        self._shown_rows = 0
+        self._awaiting_rows = False
+        self._source_exhausted = False
+
+    @property
+    def loaded_rows(self) -> int:
+        return len(self._dataframe)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Override method from QAbstractTableModel
+
+        Return count of the rows handed to the view so far
+        """
+        if parent != QModelIndex():
+            return 0
+        return min(self._shown_rows, len(self._row_order))
+
+    def canFetchMore(
+        self, parent: Union[QModelIndex, QPersistentModelIndex] = QModelIndex()
+    ) -> bool:
+        """Override method from QAbstractTableModel"""
+        if parent != QModelIndex():
+            return False
+        return self.rowCount() < len(self._row_order) or not (
+            self._awaiting_rows or self._source_exhausted
+        )
+
+    def fetchMore(
+        self, parent: Union[QModelIndex, QPersistentModelIndex] = QModelIndex()
+    ) -> None:
+        """Override method from QAbstractTableModel"""
+        if parent != QModelIndex():
+            return
+        if self.rowCount() < len(self._row_order):
+            self._show_more_rows()
+        elif not (self._awaiting_rows or self._source_exhausted):
+            self._awaiting_rows = True
+            self.more_rows_requested.emit()
+
+    def append_rows(self, rows: pd.DataFrame) -> None:
+        show_rows = self._awaiting_rows or self.rowCount() == 0
+        self._awaiting_rows = False
+
+        if self._dataframe.columns.empty:
+            self.beginResetModel()
+            self._load_dataframe(rows.reset_index(drop=True))
+            self.endResetModel()
+        else:
+            previous_rows = len(self._dataframe)
+            self._dataframe = pd.concat([self._dataframe, rows], ignore_index=True)
+            self._index_labels = None
+            self._display_columns = [
+                np.concatenate([display_column, np.full(len(rows), None, dtype=object)])
+                for display_column in self._display_columns
+            ]
+            self._sort_order = np.concatenate(
+                [self._sort_order, np.arange(previous_rows, len(self._dataframe))]
+            )
+            self._update_row_order()
+            if self._sort_key[0] >= 0:
+                self.sort(*self._sort_key)
+            if self._filter_key[0]:
+                self.set_filter(*self._filter_key)
+
+        if show_rows:
+            self._show_more_rows()
+
+    def cancel_fetch(self) -> None:
+        """The requested page will not arrive, let the view ask for it again"""
+        self._awaiting_rows = False
+
+    def set_source_exhausted(self) -> None:
+        self._awaiting_rows = False
+        self._source_exhausted = True
+
+    def _show_more_rows(self) -> None:
+        shown_rows = self.rowCount()
+        new_shown_rows = min(shown_rows + self._batch_rows, len(self._row_order))
+        if new_shown_rows <= shown_rows:
+            return
+        self.beginInsertRows(QModelIndex(), shown_rows, new_shown_rows - 1)
+        self._shown_rows = new_shown_rows
+        self.endInsertRows()
+
+
+def resize_columns_from_sample(
+    table: QTableView, sample_rows: int = 50, max_width: int = 400
+) -> None:
+    """Sizes columns from the header and the first sample_rows cells only"""
+    model = table.model()
+    if model is None:
+        return
+    font_metrics = table.fontMetrics()
+    padding = 2 * font_metrics.averageCharWidth() + table.showGrid()
+    rows = min(model.rowCount(), sample_rows)
+    for column in range(model.columnCount()):
+        texts = [
+            model.headerData(
+                column, Qt.Orientation.Horizontal, Qt.ItemDataRole.DisplayRole
+            )
+        ] + [model.index(row, column).data() for row in range(rows)]
+        text_width = max(
+            (font_metrics.horizontalAdvance(str(text)) for text in texts if text),
+            default=0,
+        )
+        table.setColumnWidth(column, min(text_width + padding, max_width))
+
+
+class AirportWatchPanel(QWidget):
+    """Watched airports table, kept current by a (shared) AirportWatchScheduler
+
+    Snapshots arrive on the scheduler thread and are diffed into the table on the
+    GUI thread, so only cells that changed are repainted.
+    """
+
+    snapshot_received = Signal(object)
+    airports_changed = Signal(list)
+
+    def __init__(
+        self,
+        scheduler: AirportWatchScheduler,
+        airports: Sequence[str] = (),
+        parent: Optional[QWidget] = None,
+    ):
+        super().__init__(parent)
+        self.airports_lineedit = QLineEdit(", ".join(airports))
+        self.airports_lineedit.setPlaceholderText("ICAO codes, comma separated")
+        self.table = QTableView()
+        self.table.setWordWrap(False)
+        self._model = PandasModel(
+            pd.DataFrame(columns=[col.value for col in WatchColumns]),
+            parent=self.table,
+        )
+        self.table.setModel(self._model)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.airports_lineedit)
+        layout.addWidget(self.table)
+
+        self.snapshot_received.connect(self._show_snapshot)
+        self.airports_lineedit.editingFinished.connect(self._update_airports)
+        self._scheduler = scheduler
+        self._subscription_id = scheduler.subscribe(
+            self.airports, self.snapshot_received.emit
+        )
+        self.destroyed.connect(partial(scheduler.unsubscribe, self._subscription_id))
+
+    @property
+    def airports(self) -> List[str]:
+        return [
+            airport.strip().upper()
+            for airport in self.airports_lineedit.text().replace(" ", ",").split(",")
+            if airport.strip()
+        ]
+
+    def _update_airports(self) -> None:
+        airports = self.airports
+        self._scheduler.update_subscription(self._subscription_id, airports)
+        self.airports_changed.emit(airports)
+
+    @Slot(object)
+    def _show_snapshot(self, snapshot: pd.DataFrame) -> None:
+        self._model.update_dataframe(snapshot, key_columns=[WatchColumns.ICAO.value])
+
 
 class PreferencesDialog(QDialog):
     def __init__(
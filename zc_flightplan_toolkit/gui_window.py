@@ -1,35 +1,80 @@
-from typing import Optional
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
 
+import pandas as pd
 from loguru import logger
-from PySide6.QtWidgets import QMainWindow
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QCloseEvent, QPainter
+from PySide6.QtWidgets import (
+    QDockWidget,
+    QGraphicsScene,
+    QLineEdit,
+    QMainWindow,
+    QProgressBar,
+    QTableView,
+)
 
-from zc_flightplan_toolkit.api import CheckWxAPI, FlightAwareAPI, FlightInfoAPI
-from zc_flightplan_toolkit.constants import Preferences
+from zc_flightplan_toolkit.airport_search import AirportSearchIndex
+from zc_flightplan_toolkit.api import (
+    CheckWxAPI,
+    ClowdIoDATISAPI,
+    FlightAwareAPI,
+    FlightInfoAPI,
+)
+from zc_flightplan_toolkit.constants import FlightAwareAirportColumns, Preferences
 from zc_flightplan_toolkit.gui_classes import (
+    AirportCompleter,
+    AirportWatchPanel,
+    IncrementalPandasModel,
     PandasModel,
     PreferencesDialog,
+    RequestRunner,
     ToolkitPreferences,
+    resize_columns_from_sample,
 )
 from zc_flightplan_toolkit.qdesigner_generated_ui.generated_mainwindow import (
     Ui_mainWindow,
 )
+from zc_flightplan_toolkit.runway_diagram import (
+    RunwayDiagramCache,
+    build_runway_scene,
+    project_runway_ends,
+)
 from zc_flightplan_toolkit.tracks import get_north_atlantic_tracks, get_pacific_tracks
+from zc_flightplan_toolkit.utils import get_unique_value
+from zc_flightplan_toolkit.watch import AirportWatchScheduler
+
+RUNWAY_KEY_COLUMN = "ident"
 
 
 class FlightPlanToolkit(QMainWindow):
-    def __init__(self, api: Optional[FlightInfoAPI] = None):
+    def __init__(
+        self,
+        api: Optional[FlightInfoAPI] = None,
+        airport_search_index: Optional[AirportSearchIndex] = None,
+        watch_scheduler: Optional[AirportWatchScheduler] = None,
+    ):
         super().__init__()
         self._api: FlightInfoAPI
+        self._airport_completers: List[AirportCompleter] = []
+        self._route_pages: Iterator[pd.DataFrame] = iter([])
+        self._route_model = IncrementalPandasModel()
+        self._runway_diagrams = RunwayDiagramCache()
+        self._watch_scheduler = watch_scheduler
+        self._airport_search_index = airport_search_index
+        self._tab_initializers: Dict[int, Callable[[], None]] = {}
 
         self.ui = Ui_mainWindow()
         self.ui.setupUi(self)
         self.preferences = ToolkitPreferences()
+        self._requests = RequestRunner(self)
+        self._request_progress = QProgressBar()
 
         self._initialize_api(api)
 
         self._setup_buttons()
         self._setup_toolbar()
         self._setup_signals()
+        self._setup_tabs()
 
     def _initialize_api(self, api: Optional[FlightInfoAPI] = None) -> None:
         aero_api_key = self.preferences.get_setting(Preferences.AERO_API_KEY.value)
@@ -39,6 +84,8 @@ class FlightPlanToolkit(QMainWindow):
         self._api = api or FlightAwareAPI(
             api_key=aero_api_key, weather_api=CheckWxAPI(api_key=checkwx_api_key)
         )
+        # the api's own weather client, so a key swap reaches the one it uses
+        self._weather_api = self._api.weather_api
 
     def _setup_buttons(self) -> None:
         self.ui.get_airport_info_button.clicked.connect(
@@ -54,63 +101,248 @@ class FlightPlanToolkit(QMainWindow):
 
     def _setup_toolbar(self) -> None:
         self.ui.toolbar_preferences_button.triggered.connect(self._open_settings_dialog)
+        self.watch_airports_action = self.ui.menuFile.addAction("Watch Airports")
+        self.watch_airports_action.triggered.connect(self._open_watch_panel)
 
     def _setup_signals(self) -> None:
-        pass
+        self._request_progress.setRange(0, 0)
+        self._request_progress.setMaximumWidth(120)
+        self._request_progress.hide()
+        self.ui.statusbar.addPermanentWidget(self._request_progress)
+
+        self._requests.pending_changed.connect(self._update_request_progress)
+        self._requests.request_failed.connect(self._show_request_error)
+
+    def _setup_tabs(self) -> None:
+        """Tabs are set up the first time they are shown, not before the window is"""
+        self._tab_initializers = {
+            self.ui.main_tabs.indexOf(self.ui.route_info_tab): self._setup_route_tab,
+            self.ui.main_tabs.indexOf(
+                self.ui.airport_info_tab
+            ): self._setup_airport_tab,
+        }
+        self.ui.main_tabs.currentChanged.connect(self._initialize_tab)
+        self._initialize_tab(self.ui.main_tabs.currentIndex())
+
+    def _initialize_tab(self, index: int) -> None:
+        initializer = self._tab_initializers.pop(index, None)
+        if initializer is not None:
+            initializer()
+
+    def _setup_route_tab(self) -> None:
+        self.ui.route_info_table.horizontalHeader().setSortIndicator(
+            -1, Qt.SortOrder.AscendingOrder
+        )
+        self.ui.route_info_table.setSortingEnabled(True)
+        self._setup_airport_completers(
+            self.ui.start_airport_lineedit, self.ui.end_airport_lineedit
+        )
+
+    def _setup_airport_tab(self) -> None:
+        self.ui.runway_map_view.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._setup_airport_completers(self.ui.airport_id_lineedit)
+
+    def closeEvent(self, event: QCloseEvent) -> None:
+        self._requests.cancel_all()
+        if self._watch_scheduler is not None:
+            self._watch_scheduler.stop()
+        super().closeEvent(event)
+
+    def _update_request_progress(self, pending: int) -> None:
+        self._request_progress.setVisible(pending > 0)
+        if pending:
+            self.ui.statusbar.showMessage(f"waiting on {pending} request(s)")
+        else:
+            self.ui.statusbar.clearMessage()
+
+    def _show_request_error(self, request_name: str, error: str) -> None:
+        self.ui.statusbar.showMessage(f"{request_name} failed: {error}", 10_000)
+
+    def _setup_airport_completers(self, *line_edits: QLineEdit) -> None:
+        if self._airport_search_index is None:
+            return
+        self._airport_completers += [
+            AirportCompleter(self._airport_search_index, line_edit)
+            for line_edit in line_edits
+        ]
+
+    def _open_watch_panel(self) -> AirportWatchPanel:
+        """Opens another watch panel, all panels share one scheduler and its fetches"""
+        watched_airports = self.preferences.get_setting(
+            Preferences.WATCHED_AIRPORTS.value
+        )
+        panel = AirportWatchPanel(
+            self._get_watch_scheduler(),
+            [airport for airport in watched_airports.split(",") if airport],
+        )
+        panel.airports_changed.connect(
+            lambda airports: self.preferences.set_setting(
+                Preferences.WATCHED_AIRPORTS.value, ",".join(airports)
+            )
+        )
+
+        dock = QDockWidget("Watched Airports", self)
+        dock.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        dock.setWidget(panel)
+        self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, dock)
+        return panel
+
+    def _get_watch_scheduler(self) -> AirportWatchScheduler:
+        if self._watch_scheduler is None:
+            self._watch_scheduler = AirportWatchScheduler(
+                weather_api=self._weather_api, datis_api=ClowdIoDATISAPI()
+            )
+        self._watch_scheduler.start()
+        return self._watch_scheduler
 
     def _get_and_display_airport_info(self) -> None:
         airport_id = self.ui.airport_id_lineedit.text()
+        self._requests.submit(
+            "airport info",
+            lambda: self._api.lookup_airport_information(airport_id),
+            self._display_airport_info,
+        )
+
+    def _display_airport_info(self, airport_info: pd.DataFrame) -> None:
+        self._update_table(self.ui.airport_info_table, airport_info)
+
+        # read here rather than from the api, a superseded lookup still running on
+        # a worker must not decide which airport the follow-up requests are for
+        icao_column = FlightAwareAirportColumns.ICAO.value
+        icao = (
+            get_unique_value(airport_info, icao_column, str)
+            if icao_column in airport_info.columns
+            else ""
+        )
+        self._update_datis_display(icao)
+        self._update_airport_runways_table(icao)
+        self._update_runway_diagram(icao)
+        self._fetch_metar(icao)
+
+    def _update_datis_display(self, icao: str) -> None:
+        self._requests.submit(
+            "datis",
+            lambda: self._api.get_datis(icao),
+            self.ui.atis_display.setPlainText,
+        )
 
-        airport_info = self._api.get_airport_information(airport_id)
-        model = PandasModel(airport_info)
+    def _update_airport_runways_table(self, icao: str) -> None:
+        self._requests.submit(
+            "runways",
+            lambda: self._api.get_airport_runways(icao),
+            self._display_airport_runways,
+        )
 
-        self.ui.airport_info_table.setModel(model)
-        self.ui.airport_info_table.resizeColumnsToContents()
-        self.ui.airport_info_table.resizeRowsToContents()
+    def _display_airport_runways(self, airport_runways: pd.DataFrame) -> None:
+        self._update_table(
+            self.ui.runway_info_table,
+            airport_runways,
+            key_columns=[RUNWAY_KEY_COLUMN]
+            if RUNWAY_KEY_COLUMN in airport_runways.columns
+            else None,
+        )
 
-        self._update_datis_display()
-        self._update_airport_runways_table()
-        self._fetch_metar()
+    def _update_runway_diagram(self, icao: str) -> None:
+        if not icao:
+            return
+        cached_scene = self._runway_diagrams.get(icao)
+        if cached_scene is not None:
+            self._show_runway_diagram(cached_scene)
+            return
+        self._requests.submit(
+            "runway diagram",
+            lambda: project_runway_ends(self._api.get_airport_runway_segments(icao)),
+            lambda diagram: self._show_runway_diagram(
+                self._runway_diagrams.put(icao, build_runway_scene(diagram))
+            ),
+        )
 
-    def _update_datis_display(self) -> None:
-        airport_datis = self._api.get_datis()
-        self.ui.atis_display.setPlainText(airport_datis)
+    def _show_runway_diagram(self, scene: QGraphicsScene) -> None:
+        self.ui.runway_map_view.setScene(scene)
+        self.ui.runway_map_view.fitInView(
+            scene.itemsBoundingRect(), Qt.AspectRatioMode.KeepAspectRatio
+        )
 
-    def _update_airport_runways_table(self) -> None:
-        airport_runways = self._api.get_airport_runways()
-        model = PandasModel(airport_runways)
-        self.ui.runway_info_table.setModel(model)
-        self.ui.runway_info_table.resizeColumnsToContents()
-        self.ui.runway_info_table.resizeRowsToContents()
+    def _fetch_metar(self, icao: str) -> None:
+        self._requests.submit(
+            "metar",
+            lambda: (
+                self._api.get_metar(icao=icao),
+                self._api.get_metar(decoded=True, icao=icao),
+            ),
+            self._display_metar,
+        )
 
-    def _fetch_metar(self) -> None:
-        metar = self._api.get_metar()
+    def _display_metar(self, metars: Tuple[str, pd.DataFrame]) -> None:
+        metar, decoded_metar = metars
         self.ui.metar_display.setPlainText(metar)
 
-        decoded_metar = self._api.get_metar(decoded=True)
-        model = PandasModel(decoded_metar, show_index=True, show_headers=False)
-        self.ui.decoded_metar_table.setModel(model)
-        self.ui.decoded_metar_table.resizeColumnsToContents()
-        self.ui.decoded_metar_table.resizeRowsToContents()
+        self._update_table(
+            self.ui.decoded_metar_table,
+            decoded_metar,
+            show_index=True,
+            show_headers=False,
+        )
+
+    def _update_table(
+        self,
+        table: QTableView,
+        data: pd.DataFrame,
+        key_columns: Optional[Sequence[str]] = None,
+        **model_options,
+    ) -> None:
+        """Diffs refreshed data into the table's model, keeping selection and scroll
+        position, the model is only created (and cells measured) the first time"""
+        model = table.model()
+        if isinstance(model, PandasModel):
+            model.update_dataframe(data, key_columns)
+            return
+
+        table.setModel(PandasModel(data, parent=table, **model_options))
+        table.resizeColumnsToContents()
+        table.resizeRowsToContents()
 
     def _get_and_display_route_info(self) -> None:
         start_airport_id = self.ui.start_airport_lineedit.text()
         end_airport_id = self.ui.end_airport_lineedit.text()
 
-        route_info = self._api.get_route_info(start_airport_id, end_airport_id)
-        model = PandasModel(route_info)
+        self._route_pages = self._api.iter_route_info(start_airport_id, end_airport_id)
+        self._route_model = IncrementalPandasModel()
+        self._route_model.more_rows_requested.connect(self._fetch_next_route_page)
+        self.ui.route_info_table.setModel(self._route_model)
+        self._route_model.fetchMore()
+
+    def _fetch_next_route_page(self) -> None:
+        route_pages = self._route_pages
+        route_model = self._route_model
+        self._requests.submit(
+            "route info",
+            lambda: next(route_pages, None),
+            self._display_route_page,
+            lambda _: route_model.cancel_fetch(),
+        )
+
+    def _display_route_page(self, route_page: Optional[pd.DataFrame]) -> None:
+        if route_page is None:
+            self._route_model.set_source_exhausted()
+            return
 
-        self.ui.route_info_table.setModel(model)
-        self.ui.route_info_table.resizeColumnsToContents()
-        self.ui.route_info_table.resizeRowsToContents()
+        first_page = self._route_model.loaded_rows == 0
+        self._route_model.append_rows(route_page)
+        if first_page:
+            resize_columns_from_sample(self.ui.route_info_table)
 
     def _get_north_atlantic_tracks_button_clicked(self) -> None:
-        tracks_data = get_north_atlantic_tracks()
-        self.ui.north_atlantic_text_display.setHtml(tracks_data)
+        self._requests.submit(
+            "north atlantic tracks",
+            get_north_atlantic_tracks,
+            self.ui.north_atlantic_text_display.setHtml,
+        )
 
     def _get_pacific_tracks_button_clicked(self) -> None:
-        tracks_data = get_pacific_tracks()
-        self.ui.pacific_tracks_display.setHtml(tracks_data)
+        self._requests.submit(
+            "pacific tracks", get_pacific_tracks, self.ui.pacific_tracks_display.setHtml
+        )
 
     def _open_settings_dialog(self):
         aero_api_key = self.preferences.get_setting(Preferences.AERO_API_KEY.value)
@@ -123,16 +355,14 @@ class FlightPlanToolkit(QMainWindow):
         if dialog.exec():
             aero_api_key = dialog.aero_api_key
             checkwx_api_key = dialog.checkwx_api_key
-        if any(
-            [
-                self.preferences.set_setting(
-                    Preferences.AERO_API_KEY.value, aero_api_key
-                ),
-                self.preferences.set_setting(
-                    Preferences.CHECKWX_API_KEY.value, checkwx_api_key
-                ),
-            ]
-        ):
-            self._api.reinitialize(
-                api_key=aero_api_key, weather_api=CheckWxAPI(api_key=checkwx_api_key)
-            )
+        aero_api_key_changed = self.preferences.set_setting(
+            Preferences.AERO_API_KEY.value, aero_api_key
+        )
+        checkwx_api_key_changed = self.preferences.set_setting(
+            Preferences.CHECKWX_API_KEY.value, checkwx_api_key
+        )
+        # swapped in place, so warm caches and loaded data survive a key change
+        self._api.update_credentials(
+            api_key=aero_api_key if aero_api_key_changed else None,
+            weather_api_key=checkwx_api_key if checkwx_api_key_changed else None,
+        )
@@ -0,0 +1,446 @@
+import bisect
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from enum import Enum
+from functools import wraps
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    TypeVar,
+)
+
+from loguru import logger
+
+from zc_flightplan_toolkit.caching import SingleFlight, StaleWhileRevalidateCache
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+DEFAULT_PREFIX = "zc_flightplan"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+FunctionType = TypeVar("FunctionType", bound=Callable)
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+MetricKey = Tuple[str, LabelSet]
+
+
+class MetricType(Enum):
+    COUNTER = "counter"
+    GAUGE = "gauge"
+    HISTOGRAM = "histogram"
+
+
+class MetricSample(NamedTuple):
+    name: str
+    labels: LabelSet
+    value: float
+    metric_type: MetricType = MetricType.COUNTER
+
+
+class HistogramSnapshot(NamedTuple):
+    """Bucket counts are per bucket (not cumulative), the last one is above all bounds"""
+
+    bounds: Tuple[float, ...]
+    bucket_counts: Tuple[int, ...]
+    observations: int
+    total: float
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.observations if self.observations else 0.0
+
+    def quantile(self, quantile: float) -> float:
+        """Upper bound of the bucket holding the quantile, inf past the last bound"""
+        rank = quantile * self.observations
+        seen = 0
+        for bound, bucket_count in zip(self.bounds, self.bucket_counts):
+            seen += bucket_count
+            if seen >= rank and seen:
+                return bound
+        return float("inf") if self.observations else 0.0
+
+
+MetricsListener = Callable[[MetricType, str, LabelSet, float], None]
+
+Collector = Callable[[], Iterable[MetricSample]]
+
+
+class CachedFunction(Protocol):
+    def cache_info(self) -> Any:
+        ...
+
+
+class _Histogram:
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.bucket_counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.bucket_counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            self.bounds, tuple(self.bucket_counts), self.count, self.total
+        )
+
+
+class MetricsRegistry:
+    """Thread safe counters and histograms, plus collectors sampled on export
+
+    Counters and histograms are keyed by name and labels. Collectors report values
+    other objects already keep (cache statistics) when the registry is exported, a
+    collector registered again under the same name replaces the previous one.
+    Listeners see every increment and observation as it happens.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._lock = threading.Lock()
+        self._counters: Dict[MetricKey, float] = {}
+        self._histograms: Dict[MetricKey, _Histogram] = {}
+        self._collectors: Dict[str, Collector] = {}
+        self._listeners: List[MetricsListener] = []
+
+    def increment(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = (name, _freeze_labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+            listeners = self._listeners
+        self._notify(listeners, MetricType.COUNTER, key, value)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = (name, _freeze_labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self._buckets)
+            histogram.observe(value)
+            listeners = self._listeners
+        self._notify(listeners, MetricType.HISTOGRAM, key, value)
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        """Observes the seconds spent in the block, also when it raises"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started_at, **labels)
+
+    def register_collector(self, name: str, collector: Collector) -> None:
+        with self._lock:
+            self._collectors[name] = collector
+
+    def unregister_collector(self, name: str) -> None:
+        with self._lock:
+            self._collectors.pop(name, None)
+
+    def add_listener(self, listener: MetricsListener) -> None:
+        with self._lock:
+            self._listeners = [*self._listeners, listener]
+
+    def remove_listener(self, listener: MetricsListener) -> None:
+        with self._lock:
+            self._listeners = [
+                added for added in self._listeners if added is not listener
+            ]
+
+    def counters(self) -> Dict[MetricKey, float]:
+        with self._lock:
+            return dict(self._counters)
+
+    def histograms(self) -> Dict[MetricKey, HistogramSnapshot]:
+        with self._lock:
+            return {
+                key: histogram.snapshot() for key, histogram in self._histograms.items()
+            }
+
+    def collect(self) -> List[MetricSample]:
+        """Samples of every collector, a failing collector is logged and skipped"""
+        with self._lock:
+            collectors = list(self._collectors.items())
+        samples = []
+        for name, collector in collectors:
+            try:
+                samples.extend(collector())
+            except Exception as error:
+                logger.warning(f"metrics collector {name} failed: {error}")
+        return samples
+
+    def reset(self) -> None:
+        """Drops counters and histograms, collectors and listeners stay"""
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def _notify(
+        self,
+        listeners: List[MetricsListener],
+        metric_type: MetricType,
+        key: MetricKey,
+        value: float,
+    ) -> None:
+        for listener in listeners:
+            try:
+                listener(metric_type, key[0], key[1], value)
+            except Exception as error:
+                logger.warning(f"metrics listener failed: {error}")
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """The registry every instrumented source records to"""
+    return _metrics
+
+
+def timed(name: str, **labels: str) -> Callable[[FunctionType], FunctionType]:
+    """Decorator observing the seconds each call takes in the default registry"""
+
+    def decorator(function: FunctionType) -> FunctionType:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_metrics().time(name, **labels):
+                return function(*args, **kwargs)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+def cache_collector(cache_name: str, cache: StaleWhileRevalidateCache) -> Collector:
+    """Lookups by result, refreshes, evictions, hit ratio and size of a response cache"""
+
+    def collect() -> List[MetricSample]:
+        stats = cache.stats
+        lookups = stats.hits + stats.stale_hits + stats.misses
+        hit_ratio = (stats.hits + stats.stale_hits) / lookups if lookups else 0.0
+        labels = (("cache", cache_name),)
+        return [
+            *(
+                MetricSample(
+                    "cache_lookups_total", (*labels, ("result", result)), count
+                )
+                for result, count in [
+                    ("hit", stats.hits),
+                    ("stale_hit", stats.stale_hits),
+                    ("miss", stats.misses),
+                ]
+            ),
+            MetricSample("cache_refreshes_total", labels, stats.refreshes),
+            MetricSample("cache_refresh_errors_total", labels, stats.refresh_errors),
+            MetricSample("cache_evictions_total", labels, stats.evictions),
+            MetricSample("cache_hit_ratio", labels, hit_ratio, MetricType.GAUGE),
+            MetricSample("cache_entries", labels, len(cache), MetricType.GAUGE),
+        ]
+
+    return collect
+
+
+def lru_cache_collector(cache_name: str, cached_function: CachedFunction) -> Collector:
+    """Lookups by result and size of a functools cache or lru_cache"""
+
+    def collect() -> List[MetricSample]:
+        cache_info = cached_function.cache_info()
+        labels = (("cache", cache_name),)
+        lookups = cache_info.hits + cache_info.misses
+        return [
+            MetricSample(
+                "cache_lookups_total", (*labels, ("result", "hit")), cache_info.hits
+            ),
+            MetricSample(
+                "cache_lookups_total", (*labels, ("result", "miss")), cache_info.misses
+            ),
+            MetricSample(
+                "cache_hit_ratio",
+                labels,
+                cache_info.hits / lookups if lookups else 0.0,
+                MetricType.GAUGE,
+            ),
+            MetricSample(
+                "cache_entries", labels, cache_info.currsize, MetricType.GAUGE
+            ),
+        ]
+
+    return collect
+
+
+def single_flight_collector(source: str, single_flight: SingleFlight) -> Collector:
+    """Upstream calls made and identical concurrent calls that shared them"""
+
+    def collect() -> List[MetricSample]:
+        stats = single_flight.stats
+        labels = (("source", source),)
+        return [
+            MetricSample("single_flight_calls_total", labels, stats.calls),
+            MetricSample("single_flight_coalesced_total", labels, stats.coalesced),
+        ]
+
+    return collect
+
+
+def format_prometheus(
+    registry: Optional[MetricsRegistry] = None, prefix: str = DEFAULT_PREFIX
+) -> str:
+    """Every metric of the registry in the Prometheus text exposition format"""
+    registry = registry or get_metrics()
+    families: Dict[str, Tuple[MetricType, List[str]]] = {}
+
+    def add_line(name: str, metric_type: MetricType, line: str) -> None:
+        families.setdefault(name, (metric_type, []))[1].append(line)
+
+    for (name, labels), value in registry.counters().items():
+        name = _prefixed(prefix, name)
+        add_line(name, MetricType.COUNTER, f"{name}{_format_labels(labels)} {value:g}")
+    for sample in registry.collect():
+        name = _prefixed(prefix, sample.name)
+        add_line(
+            name,
+            sample.metric_type,
+            f"{name}{_format_labels(sample.labels)} {sample.value:g}",
+        )
+    for (name, labels), histogram in registry.histograms().items():
+        name = _prefixed(prefix, name)
+        cumulative_count = 0
+        for bound, bucket_count in zip(
+            (*histogram.bounds, float("inf")), histogram.bucket_counts
+        ):
+            cumulative_count += bucket_count
+            bucket_labels = _format_labels((*labels, ("le", _format_bound(bound))))
+            add_line(
+                name,
+                MetricType.HISTOGRAM,
+                f"{name}_bucket{bucket_labels} {cumulative_count}",
+            )
+        add_line(
+            name,
+            MetricType.HISTOGRAM,
+            f"{name}_sum{_format_labels(labels)} {histogram.total:g}",
+        )
+        add_line(
+            name,
+            MetricType.HISTOGRAM,
+            f"{name}_count{_format_labels(labels)} {histogram.observations}",
+        )
+
+    lines = []
+    for name, (metric_type, family_lines) in sorted(families.items()):
+        lines.append(f"# TYPE {name} {metric_type.value}")
+        lines.extend(family_lines)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class StatsdExporter:
+    """Pushes metrics to a StatsD daemon over UDP as they are recorded
+
+    Counter increments are sent as counters, observations in seconds as timers in
+    milliseconds, labels as DogStatsD tags. Collector samples have no events of
+    their own and are sent as gauges by flush, which stop calls a last time.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8125,
+        prefix: str = DEFAULT_PREFIX,
+        registry: Optional[MetricsRegistry] = None,
+    ):
+        self._address = (host, port)
+        self._prefix = prefix
+        self._registry = registry or get_metrics()
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sent = 0
+
+    def start(self) -> "StatsdExporter":
+        self._registry.add_listener(self._send_event)
+        return self
+
+    def flush(self) -> None:
+        for sample in self._registry.collect():
+            self._send(f"{sample.name}:{sample.value:g}|g", sample.labels)
+
+    def stop(self) -> None:
+        self._registry.remove_listener(self._send_event)
+        self.flush()
+        self._socket.close()
+
+    def __enter__(self) -> "StatsdExporter":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def _send_event(
+        self, metric_type: MetricType, name: str, labels: LabelSet, value: float
+    ) -> None:
+        if metric_type is MetricType.HISTOGRAM and name.endswith("_seconds"):
+            self._send(f"{name[:-8]}:{value * 1000:.3f}|ms", labels)
+        elif metric_type is MetricType.HISTOGRAM:
+            self._send(f"{name}:{value:g}|h", labels)
+        else:
+            self._send(f"{name}:{value:g}|c", labels)
+
+    def _send(self, metric: str, labels: LabelSet) -> None:
+        tags = ",".join(f"{label}:{value}" for label, value in labels)
+        line = (
+            f"{self._prefix}.{metric}|#{tags}" if tags else f"{self._prefix}.{metric}"
+        )
+        try:
+            self._socket.sendto(line.encode(), self._address)
+            self.sent += 1
+        except OSError as error:
+            logger.debug(f"statsd send failed: {error}")
+
+
+def _freeze_labels(labels: Dict[str, str]) -> LabelSet:
+    return tuple(sorted((label, str(value)) for label, value in labels.items()))
+
+
+def _prefixed(prefix: str, name: str) -> str:
+    return f"{prefix}_{name}" if prefix else name
+
+
+def _format_labels(labels: LabelSet) -> str:
+    if not labels:
+        return ""
+    formatted = ",".join(
+        f'{label}="{_escape_label_value(value)}"' for label, value in labels
+    )
+    return f"{{{formatted}}}"
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else f"{bound:g}"
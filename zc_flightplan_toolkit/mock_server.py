@@ -0,0 +1,457 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Mapping, NamedTuple, Optional, Tuple, cast
+from urllib.parse import parse_qsl, urlsplit
+
+from loguru import logger
+
+from zc_flightplan_toolkit.constants import CHECKWX_MAX_STATIONS
+
+AIRCRAFT_TYPES = [
+    "A20N",
+    "A21N",
+    "A320",
+    "A333",
+    "A359",
+    "B38M",
+    "B738",
+    "B77W",
+    "B789",
+]
+
+DATIS_AIRPORTS = [
+    "KATL",
+    "KBOS",
+    "KDEN",
+    "KDFW",
+    "KJFK",
+    "KLAX",
+    "KORD",
+    "KSEA",
+    "KSFO",
+]
+
+
+class Upstream(Enum):
+    AEROAPI = "aeroapi"
+    CHECKWX = "checkwx"
+    DATIS = "datis"
+    FAA = "faa"
+
+
+class UpstreamBehaviour(NamedTuple):
+    """How a mocked upstream misbehaves
+
+    latency is sampled once per request in seconds, error_rate is the share of
+    requests answered 503 and beyond rate_limit requests per second (bursts of up to
+    burst requests) the upstream answers 429 with a Retry-After header.
+    """
+
+    latency: Callable[[], float] = lambda: 0.0
+    error_rate: float = 0.0
+    rate_limit: Optional[float] = None
+    burst: int = 10
+
+
+class MockUpstreamURLs(NamedTuple):
+    aeroapi: str
+    checkwx: str
+    datis: str
+    nat_tracks: str
+    pacific_tracks: str
+
+
+def constant_latency(seconds: float) -> Callable[[], float]:
+    return lambda: seconds
+
+
+class _MockResponse(NamedTuple):
+    status: int
+    body: bytes
+    content_type: str = "application/json"
+    headers: Tuple[Tuple[str, str], ...] = ()
+
+
+class _TokenBucket:
+    def __init__(self, rate: float, burst: int, clock: Callable[[], float]):
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated_at = clock()
+        self._lock = threading.Lock()
+
+    def take(self) -> Optional[float]:
+        """None when the request may go ahead, otherwise seconds until it could"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated_at) * self._rate
+            )
+            self._updated_at = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return None
+            return (1 - self._tokens) / self._rate
+
+
+class MockUpstreamServer(ThreadingHTTPServer):
+    """Local stand-in for AeroAPI, CheckWX, the clowd.io DATIS API and FAA tracks
+
+    Serves the endpoints the toolkit uses with generated, deterministic data under
+    /aeroapi, /checkwx, /datis/api and /faa, so the API classes can be pointed at
+    it through urls. Route results are paginated like AeroAPI, routes_per_page per
+    page and route_pages pages per city pair. Each upstream can be slowed down,
+    made to fail or rate limited through behaviours.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        server_address: Tuple[str, int] = ("127.0.0.1", 0),
+        behaviours: Optional[Mapping[Upstream, UpstreamBehaviour]] = None,
+        routes_per_page: int = 20,
+        route_pages: int = 5,
+        seed: int = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(server_address, _MockUpstreamHandler)
+        self.behaviours = {
+            upstream: (behaviours or {}).get(upstream, UpstreamBehaviour())
+            for upstream in Upstream
+        }
+        self.routes_per_page = routes_per_page
+        self.route_pages = route_pages
+        self._seed = seed
+        self._rate_limiters = {
+            upstream: _TokenBucket(behaviour.rate_limit, behaviour.burst, clock)
+            for upstream, behaviour in self.behaviours.items()
+            if behaviour.rate_limit is not None
+        }
+        self._error_rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.responses: Dict[Upstream, Counter] = {
+            upstream: Counter() for upstream in Upstream
+        }
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host if isinstance(host, str) else host.decode()}:{port}"
+
+    @property
+    def urls(self) -> MockUpstreamURLs:
+        return MockUpstreamURLs(
+            aeroapi=f"{self.base_url}/aeroapi",
+            checkwx=f"{self.base_url}/checkwx",
+            datis=f"{self.base_url}/datis/api/",
+            nat_tracks=f"{self.base_url}/faa/nat.html",
+            pacific_tracks=f"{self.base_url}/faa/pacific",
+        )
+
+    def start(self) -> "MockUpstreamServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="mock-upstream", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"mock upstreams listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "MockUpstreamServer":
+        return self.start()
+
+    def __exit__(self, *_) -> None:
+        self.stop()
+
+    def respond(
+        self,
+        method: str,
+        path: str,
+        params: Dict[str, str],
+        headers: Mapping[str, str],
+    ) -> _MockResponse:
+        upstream, handler = self._route(method, path)
+        if upstream is None or handler is None:
+            return _json_response({"error": f"no mocked endpoint {path}"}, 404)
+
+        behaviour = self.behaviours[upstream]
+        time.sleep(max(behaviour.latency(), 0.0))
+        response = self._misbehave(upstream, behaviour)
+        if response is None:
+            response = handler(params=params, headers=headers)
+        with self._lock:
+            self.responses[upstream][response.status] += 1
+        return response
+
+    def _misbehave(
+        self, upstream: Upstream, behaviour: UpstreamBehaviour
+    ) -> Optional[_MockResponse]:
+        rate_limiter = self._rate_limiters.get(upstream)
+        retry_after = rate_limiter.take() if rate_limiter is not None else None
+        if retry_after is not None:
+            return _json_response(
+                {"title": "Too Many Requests", "status": 429},
+                429,
+                (("Retry-After", str(max(1, round(retry_after)))),),
+            )
+        with self._lock:
+            failed = self._error_rng.random() < behaviour.error_rate
+        if failed:
+            return _json_response({"title": "Service Unavailable", "status": 503}, 503)
+        return None
+
+    def _route(
+        self, method: str, path: str
+    ) -> Tuple[Optional[Upstream], Optional[Callable[..., _MockResponse]]]:
+        routes: List[Tuple[str, str, Upstream, Callable[..., _MockResponse]]] = [
+            (
+                "GET",
+                r"/aeroapi/airports/(\w+)/routes/(\w+)",
+                Upstream.AEROAPI,
+                self._routes,
+            ),
+            ("GET", r"/aeroapi/airports/(\w+)", Upstream.AEROAPI, self._airport),
+            ("GET", r"/checkwx/metar/([\w,]+)/decoded", Upstream.CHECKWX, self._metars),
+            ("GET", r"/checkwx/taf/(\w+)/decoded", Upstream.CHECKWX, self._taf),
+            ("GET", r"/datis/api/(\w+)", Upstream.DATIS, self._datis),
+            ("GET", r"/faa/nat\.html", Upstream.FAA, self._nat_tracks),
+            ("POST", r"/faa/pacific", Upstream.FAA, self._pacific_tracks),
+        ]
+        for route_method, pattern, upstream, handler in routes:
+            match = re.fullmatch(pattern, path)
+            if match is not None and route_method == method:
+                return upstream, lambda **kwargs: handler(*match.groups(), **kwargs)
+        return None, None
+
+    def _rng(self, *key: str) -> random.Random:
+        return random.Random(f"{self._seed}:{':'.join(key)}")
+
+    def _airport(
+        self, airport_id: str, headers: Mapping[str, str], **_
+    ) -> _MockResponse:
+        if "x-apikey" not in headers:
+            return _json_response({"title": "Unauthorized", "status": 401}, 401)
+        return _json_response({**self._airport_record(airport_id), "alternatives": []})
+
+    def _airport_record(self, airport_id: str) -> Dict[str, Any]:
+        rng = self._rng("airport", airport_id.upper())
+        icao = airport_id.upper()
+        return {
+            "airport_code": icao,
+            "code_icao": icao,
+            "code_iata": icao[1:],
+            "code_lid": None,
+            "name": f"{icao} International",
+            "elevation": rng.randint(0, 5000),
+            "city": f"{icao.title()} City",
+            "state": None,
+            "longitude": round(rng.uniform(-180, 180), 4),
+            "latitude": round(rng.uniform(-60, 70), 4),
+            "timezone": "UTC",
+            "country_code": icao[:2],
+            "wiki_url": None,
+            "airport_flights_url": f"/airports/{icao}/flights",
+        }
+
+    def _routes(
+        self,
+        origin: str,
+        destination: str,
+        params: Dict[str, str],
+        headers: Mapping[str, str],
+    ) -> _MockResponse:
+        if "x-apikey" not in headers:
+            return _json_response({"title": "Unauthorized", "status": 401}, 401)
+        first_page = int(params.get("cursor", 0))
+        last_page = min(first_page + int(params.get("max_pages", 1)), self.route_pages)
+        routes = [
+            self._route_record(origin, destination, page * self.routes_per_page + index)
+            for page in range(first_page, last_page)
+            for index in range(self.routes_per_page)
+        ]
+        next_page = (
+            {"next": f"/airports/{origin}/routes/{destination}?cursor={last_page}"}
+            if last_page < self.route_pages
+            else None
+        )
+        return _json_response(
+            {"routes": routes, "links": next_page, "num_pages": last_page - first_page}
+        )
+
+    def _route_record(
+        self, origin: str, destination: str, index: int
+    ) -> Dict[str, Any]:
+        rng = self._rng("route", origin, destination, str(index))
+        last_departure = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(
+            minutes=rng.randint(0, 60 * 24 * 300)
+        )
+        return {
+            "aircraft_types": rng.sample(AIRCRAFT_TYPES, rng.randint(1, 4)),
+            "count": rng.randint(1, 500),
+            "filed_altitude_max": rng.randint(34, 43) * 10,
+            "filed_altitude_min": rng.randint(24, 34) * 10,
+            "last_departure_time": last_departure.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "route": f"{origin}{index % 9} J{index % 500} {destination}{index % 7}",
+            "route_distance": f"{rng.randint(100, 7000)} sm",
+        }
+
+    def _metars(self, stations: str, headers: Mapping[str, str], **_) -> _MockResponse:
+        if "x-api-key" not in headers:
+            return _json_response({"error": "Unauthorized"}, 401)
+        icaos = stations.upper().split(",")[:CHECKWX_MAX_STATIONS]
+        return _json_response(
+            {
+                "results": len(icaos),
+                "data": [self._metar_record(icao) for icao in icaos],
+            }
+        )
+
+    def _metar_record(self, icao: str) -> Dict[str, Any]:
+        rng = self._rng("metar", icao)
+        wind, speed = rng.randrange(10, 370, 10), rng.randint(0, 25)
+        temperature = rng.randint(-10, 35)
+        dewpoint = temperature - rng.randint(0, 10)
+        pressure = rng.randint(990, 1035)
+        return {
+            "icao": icao,
+            "raw_text": f"{icao} 191800Z {wind:03d}{speed:02d}KT 9999 FEW030 "
+            f"{_metar_temperature(temperature)}/{_metar_temperature(dewpoint)} "
+            f"Q{pressure:04d}",
+            "observed": "2026-10-19T18:00:00",
+            "barometer": {"hpa": pressure, "hg": round(pressure * 0.02953, 2)},
+            "clouds": [{"code": "FEW", "text": "Few", "feet": 3000}],
+            "dewpoint": {"celsius": dewpoint},
+            "temperature": {"celsius": temperature},
+            "wind": {"degrees": wind, "speed_kts": speed},
+            "flight_category": "VFR",
+        }
+
+    def _taf(self, icao: str, headers: Mapping[str, str], **_) -> _MockResponse:
+        if "x-api-key" not in headers:
+            return _json_response({"error": "Unauthorized"}, 401)
+        icao = icao.upper()
+        taf = f"TAF {icao} 191700Z 1918/2024 VRB05KT 9999 FEW030"
+        return _json_response({"results": 1, "data": [{"icao": icao, "raw_text": taf}]})
+
+    def _datis(self, airport: str, **_) -> _MockResponse:
+        airports = DATIS_AIRPORTS if airport == "all" else [airport.upper()]
+        return _json_response(
+            [
+                self._datis_record(icao, atis_type)
+                for icao in airports
+                for atis_type in ("arr", "dep")
+            ]
+        )
+
+    def _datis_record(self, icao: str, atis_type: str) -> Dict[str, str]:
+        rng = self._rng("datis", icao, atis_type)
+        code = chr(ord("A") + rng.randrange(26))
+        runway = f"{rng.randint(1, 36):02d}{rng.choice(['', 'L', 'R'])}"
+        action = "LNDG" if atis_type == "arr" else "DEPG"
+        return {
+            "airport": icao,
+            "type": atis_type,
+            "code": code,
+            "datis": f"{icao[1:]} {atis_type.upper()} INFO {code} 1851Z. "
+            f"{action} RWY {runway}. ...ADVS YOU HAVE INFO {code}.",
+        }
+
+    def _nat_tracks(self, **_) -> _MockResponse:
+        now = datetime.now(timezone.utc)
+        valid_from, valid_to = now - timedelta(hours=1), now + timedelta(hours=6)
+        validity = f"{valid_from:%b %d/%H%MZ} TO {valid_to:%b %d/%H%MZ}".upper()
+        tracks = "\n".join(
+            f"{letter} {fix} {52 - index}/50 {53 - index}/40 {54 - index}/30 "
+            f"{55 - index}/20 BEXET\nEAST LVLS NIL\nWEST LVLS 310 330 350 370 390\n"
+            "EUR RTS WEST NIL\nNAR NIL-"
+            for index, (letter, fix) in enumerate(
+                zip("ABCDEF", ["CARPE", "JOOPY", "MUSAK", "ELSIR", "TUDEP", "NICSO"])
+            )
+        )
+        message = (
+            f"191452 CZQXZQZX\n(NAT-1/1 TRACKS FLS 310/390 INCLUSIVE\n{validity}\n"
+            f"PART ONE OF ONE PARTS-\n{tracks}\nREMARKS:\n1.TMI IS {now:%j} AND "
+            "OPERATORS ARE REMINDED TO INCLUDE THE\nTMI NUMBER AS PART OF THE "
+            "OCEANIC CLEARANCE READ BACK.\nEND OF PART ONE OF ONE PARTS)"
+        )
+        html = (
+            "<html><body><table>\n<tr><td>North Atlantic Tracks</td></tr>\n"
+            f"<tr><td><pre>\n{message}\n</pre></td></tr>\n</table></body></html>"
+        )
+        return _MockResponse(200, html.encode(), "text/html")
+
+    def _pacific_tracks(self, **_) -> _MockResponse:
+        now = datetime.now(timezone.utc)
+        valid_from, valid_to = now - timedelta(hours=1), now + timedelta(hours=9)
+        tracks = "\n".join(
+            f"PACOTS TRACK {track_id}<pre>\nRJJJ {now:%d%H%M}\n"
+            f"(TDM TRK {track_id} {now:%y%m%d%H%M}01\n"
+            f"{valid_from:%y%m%d%H%M} {valid_to:%y%m%d%H%M}\n"
+            f"DINTY {45 - index}N150W {43 - index}N160W {40 - index}N170W SMOLT\n"
+            "FLS 310-390\nRTS/KSFO OSI DINTY\nSMOLT OTR15 RJAA\nRMK/0)</pre>"
+            for index, track_id in enumerate("ABCDE")
+        )
+        html = (
+            f"<html><body>Data Current as of: {now:%a, %d %b %Y %H:%M:%S} GMT<br>\n"
+            f"{tracks}\nEnd of Report</body></html>"
+        )
+        return _MockResponse(200, html.encode(), "text/html")
+
+
+class _MockUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._respond("GET")
+
+    def do_POST(self) -> None:
+        self._respond("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"mock upstream {format % args}")
+
+    def _respond(self, method: str) -> None:
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length:
+            self.rfile.read(content_length)
+        url = urlsplit(self.path)
+        response = cast(MockUpstreamServer, self.server).respond(
+            method,
+            url.path,
+            dict(parse_qsl(url.query)),
+            {key.lower(): value for key, value in self.headers.items()},
+        )
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        for header, value in response.headers:
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(response.body)
+
+
+def _json_response(
+    value: Any, status: int = 200, headers: Tuple[Tuple[str, str], ...] = ()
+) -> _MockResponse:
+    return _MockResponse(status, json.dumps(value).encode(), headers=headers)
+
+
+def _metar_temperature(celsius: int) -> str:
+    return f"M{-celsius:02d}" if celsius < 0 else f"{celsius:02d}"
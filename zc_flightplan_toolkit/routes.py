@@ -0,0 +1,328 @@
+from enum import Enum
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from zc_flightplan_toolkit.geodesy import DistanceMethod, great_circle_distance
+from zc_flightplan_toolkit.track_geometry import (
+    Coordinate,
+    FixDatabase,
+    resolve_waypoints,
+)
+
+_DIRECT_TOKENS = {"DCT", "DIRECT"}
+
+_TOKEN_PATTERNS = {
+    "COORDINATE": (
+        r"\d{2,4}[NS]/?\d{3,5}[EW]|\d{2}(?:\d{2})?/\d{2,3}|\d{4}[NESW]|\d{2}[NESW]\d{2}"
+    ),
+    "AIRWAY": r"(?:[A-Z]{1,2}|OTR)\d{1,4}",
+    "PROCEDURE": r"[A-Z]{3,6}\d{1,2}[A-Z]?",
+    "AIRPORT": r"[A-Z]{4}",
+    "FIX": r"[A-Z]{2,5}",
+}
+
+
+class RouteTokenType(Enum):
+    SID = "sid"
+    STAR = "star"
+    AIRWAY = "airway"
+    FIX = "fix"
+    COORDINATE = "coordinate"
+    AIRPORT = "airport"
+    UNKNOWN = "unknown"
+
+
+class RouteTokenColumns(Enum):
+    ROUTE = "route_index"
+    POSITION = "position"
+    TOKEN = "token"
+    TOKEN_TYPE = "token_type"
+
+
+class RouteWaypointColumns(Enum):
+    ROUTE = "route_index"
+    SEQUENCE = "sequence"
+    IDENT = "ident"
+    LATITUDE = "latitude"
+    LONGITUDE = "longitude"
+    LEG_DISTANCE = "leg_distance_nm"
+
+
+class RouteDistanceColumns(Enum):
+    GREAT_CIRCLE_DISTANCE = "great_circle_distance_nm"
+    ROUTE_LENGTH = "route_length_nm"
+
+
+class NavDataColumns(Enum):
+    NAME = "name"
+    SEQUENCE = "sequence"
+    IDENT = "ident"
+
+
+class NavDataStore:
+    """Local navigation data used to expand route strings into waypoints
+
+    airways and procedures (SIDs/STARs) need name, sequence and ident columns
+    listing the fixes of each in order, fixes provide the coordinates.
+    """
+
+    def __init__(
+        self,
+        fixes: Optional[FixDatabase] = None,
+        airways: Union[str, pd.DataFrame, None] = None,
+        procedures: Union[str, pd.DataFrame, None] = None,
+    ):
+        self.fixes = fixes
+        self._airways = self._load_sequences(airways)
+        self._procedures = self._load_sequences(procedures)
+
+    def get_airway_segment(
+        self, airway: str, entry: str, exit_: str
+    ) -> Optional[Tuple[str, ...]]:
+        """Returns the fixes flown along airway from entry to exit, both inclusive"""
+        airway_fixes = self._airways.get(airway)
+        if (
+            airway_fixes is None
+            or entry not in airway_fixes
+            or exit_ not in airway_fixes
+        ):
+            return None
+        entry_index = airway_fixes.index(entry)
+        exit_index = airway_fixes.index(exit_)
+        if entry_index <= exit_index:
+            return airway_fixes[entry_index : exit_index + 1]
+        return airway_fixes[exit_index : entry_index + 1][::-1]
+
+    def get_procedure(self, procedure: str) -> Optional[Tuple[str, ...]]:
+        return self._procedures.get(procedure)
+
+    def _load_sequences(
+        self, source: Union[str, pd.DataFrame, None]
+    ) -> Dict[str, Tuple[str, ...]]:
+        if source is None:
+            return {}
+        data = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+        data = data.sort_values(
+            [NavDataColumns.NAME.value, NavDataColumns.SEQUENCE.value]
+        )
+        return {
+            str(name).upper(): tuple(idents.str.upper())
+            for name, idents in data.groupby(NavDataColumns.NAME.value)[
+                NavDataColumns.IDENT.value
+            ]
+        }
+
+
+def tokenize_routes(routes: pd.Series) -> pd.DataFrame:
+    """Splits a series of route strings into one row per classified token
+
+    Tokens are interned as a categorical so each distinct token is classified once,
+    SIDs and STARs are procedure shaped tokens at the start or end of a route
+    (ignoring airports).
+    """
+    exploded = (
+        routes.fillna("")
+        .astype(str)
+        .str.upper()
+        .str.replace("..", " ", regex=False)
+        .str.split()
+        .explode()
+        .dropna()
+    )
+    exploded = exploded[~exploded.isin(_DIRECT_TOKENS)]
+
+    tokens = pd.Categorical(exploded.to_numpy())
+    token_kinds = _classify_tokens(pd.Series(tokens.categories))[tokens.codes]
+
+    route_index = exploded.index.to_numpy()
+    positions = exploded.groupby(level=0, sort=False).cumcount().to_numpy()
+
+    is_enroute = pd.Series(token_kinds != "AIRPORT", index=exploded.index)
+    enroute_counts = is_enroute.groupby(level=0, sort=False).cumsum().to_numpy()
+    enroute_totals = is_enroute.groupby(level=0, sort=False).transform("sum").to_numpy()
+    is_first = is_enroute.to_numpy() & (enroute_counts == 1)
+    is_last = is_enroute.to_numpy() & (enroute_counts == enroute_totals)
+
+    token_types = np.select(
+        [
+            (token_kinds == "PROCEDURE") & is_first,
+            (token_kinds == "PROCEDURE") & is_last,
+            token_kinds == "PROCEDURE",
+            token_kinds == "AIRWAY",
+            token_kinds == "COORDINATE",
+            token_kinds == "AIRPORT",
+            token_kinds == "FIX",
+        ],
+        [
+            RouteTokenType.SID.value,
+            RouteTokenType.STAR.value,
+            RouteTokenType.AIRWAY.value,
+            RouteTokenType.AIRWAY.value,
+            RouteTokenType.COORDINATE.value,
+            RouteTokenType.AIRPORT.value,
+            RouteTokenType.FIX.value,
+        ],
+        default=RouteTokenType.UNKNOWN.value,
+    )
+
+    return pd.DataFrame(
+        {
+            RouteTokenColumns.ROUTE.value: route_index,
+            RouteTokenColumns.POSITION.value: positions,
+            RouteTokenColumns.TOKEN.value: tokens,
+            RouteTokenColumns.TOKEN_TYPE.value: pd.Categorical(
+                token_types, categories=[token.value for token in RouteTokenType]
+            ),
+        }
+    )
+
+
+def expand_routes(routes: pd.Series, navdata: NavDataStore) -> pd.DataFrame:
+    """Expands route strings into waypoint sequences with coordinates
+
+    Airways are replaced by the fixes between their entry and exit fix and
+    SIDs/STARs by their published fixes, tokens that cannot be expanded are kept.
+    """
+    route_tokens = tokenize_routes(routes)
+    tokens = route_tokens[RouteTokenColumns.TOKEN.value].astype(str).to_numpy()
+    token_types = route_tokens[RouteTokenColumns.TOKEN_TYPE.value].to_numpy()
+    route_index = route_tokens[RouteTokenColumns.ROUTE.value].to_numpy()
+    route_starts = np.flatnonzero(np.append(True, route_index[1:] != route_index[:-1]))
+    route_ends = np.append(route_starts[1:], len(route_index))
+
+    segment_cache: Dict[Tuple[str, str, str], Optional[Tuple[str, ...]]] = {}
+    waypoint_routes: List = []
+    waypoints: List[str] = []
+    for start, end in zip(route_starts, route_ends):
+        expanded = _expand_route(
+            tokens[start:end], token_types[start:end], navdata, segment_cache
+        )
+        waypoint_routes.extend([route_index[start]] * len(expanded))
+        waypoints.extend(expanded)
+
+    waypoint_frame = pd.DataFrame(
+        {
+            RouteWaypointColumns.ROUTE.value: waypoint_routes,
+            RouteWaypointColumns.IDENT.value: waypoints,
+        }
+    )
+    waypoint_frame.insert(
+        1,
+        RouteWaypointColumns.SEQUENCE.value,
+        waypoint_frame.groupby(RouteWaypointColumns.ROUTE.value).cumcount(),
+    )
+
+    unique_waypoints = pd.Categorical(waypoints)
+    coordinates = resolve_waypoints(list(unique_waypoints.categories), navdata.fixes)[
+        unique_waypoints.codes
+    ]
+    waypoint_frame[RouteWaypointColumns.LATITUDE.value] = coordinates[:, 0]
+    waypoint_frame[RouteWaypointColumns.LONGITUDE.value] = coordinates[:, 1]
+    return waypoint_frame
+
+
+def add_leg_distances(
+    waypoints: pd.DataFrame, method: DistanceMethod = "haversine"
+) -> pd.DataFrame:
+    """Adds the distance (nm) from the previous resolved waypoint of the same route
+
+    waypoints is an expand_routes frame, unresolved waypoints are dropped.
+    """
+    latitude_col = RouteWaypointColumns.LATITUDE.value
+    longitude_col = RouteWaypointColumns.LONGITUDE.value
+    waypoints = waypoints.dropna(subset=[latitude_col, longitude_col]).sort_values(
+        [RouteWaypointColumns.ROUTE.value, RouteWaypointColumns.SEQUENCE.value],
+        kind="stable",
+    )
+    route_index = waypoints[RouteWaypointColumns.ROUTE.value].to_numpy()
+    latitudes = waypoints[latitude_col].to_numpy(dtype=np.float64)
+    longitudes = waypoints[longitude_col].to_numpy(dtype=np.float64)
+
+    distances = np.full(len(waypoints), np.nan)
+    if len(waypoints) > 1:
+        same_route = route_index[1:] == route_index[:-1]
+        legs = great_circle_distance(
+            latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:], method
+        )
+        distances[1:] = np.where(same_route, legs, np.nan)
+    return waypoints.assign(**{RouteWaypointColumns.LEG_DISTANCE.value: distances})
+
+
+def compute_route_lengths(
+    routes: pd.Series,
+    navdata: NavDataStore,
+    origin: Optional[Coordinate] = None,
+    destination: Optional[Coordinate] = None,
+    method: DistanceMethod = "haversine",
+) -> pd.Series:
+    """Returns the flown length (nm) of every route string, indexed like routes
+
+    origin and destination, when given, are joined to the first and last waypoint.
+    """
+    waypoints = expand_routes(routes, navdata)
+    endpoints = [
+        pd.DataFrame(
+            {
+                RouteWaypointColumns.ROUTE.value: routes.index,
+                RouteWaypointColumns.SEQUENCE.value: sequence,
+                RouteWaypointColumns.IDENT.value: "",
+                RouteWaypointColumns.LATITUDE.value: endpoint[0],
+                RouteWaypointColumns.LONGITUDE.value: endpoint[1],
+            }
+        )
+        for endpoint, sequence in ((origin, -1), (destination, np.iinfo(np.int64).max))
+        if endpoint is not None
+    ]
+    if endpoints:
+        waypoints = pd.concat([waypoints, *endpoints], ignore_index=True)
+
+    legs = add_leg_distances(waypoints, method)
+    route_lengths: pd.Series = legs.groupby(RouteWaypointColumns.ROUTE.value)[
+        RouteWaypointColumns.LEG_DISTANCE.value
+    ].sum()
+    return route_lengths.reindex(routes.index, fill_value=0.0).rename(
+        RouteDistanceColumns.ROUTE_LENGTH.value
+    )
+
+
+def _expand_route(
+    tokens: np.ndarray,
+    token_types: np.ndarray,
+    navdata: NavDataStore,
+    segment_cache: Dict[Tuple[str, str, str], Optional[Tuple[str, ...]]],
+) -> List[str]:
+    expanded: List[str] = []
+    for position, (token, token_type) in enumerate(zip(tokens, token_types)):
+        if token_type in (RouteTokenType.SID.value, RouteTokenType.STAR.value):
+            procedure = navdata.get_procedure(token)
+            _extend_without_repeats(expanded, procedure or (token,))
+            continue
+
+        is_enclosed = 0 < position < len(tokens) - 1
+        if token_type == RouteTokenType.AIRWAY.value and is_enclosed:
+            segment_key = (token, tokens[position - 1], tokens[position + 1])
+            if segment_key not in segment_cache:
+                segment_cache[segment_key] = navdata.get_airway_segment(*segment_key)
+            segment = segment_cache[segment_key]
+            if segment is not None:
+                _extend_without_repeats(expanded, segment)
+                continue
+
+        _extend_without_repeats(expanded, (token,))
+    return expanded
+
+
+def _extend_without_repeats(waypoints: List[str], new_waypoints: Tuple[str, ...]):
+    for waypoint in new_waypoints:
+        if not waypoints or waypoints[-1] != waypoint:
+            waypoints.append(waypoint)
+
+
+def _classify_tokens(unique_tokens: pd.Series) -> np.ndarray:
+    conditions = [
+        unique_tokens.str.fullmatch(pattern).to_numpy(dtype=bool)
+        for pattern in _TOKEN_PATTERNS.values()
+    ]
+    return np.select(conditions, list(_TOKEN_PATTERNS), default="UNKNOWN")
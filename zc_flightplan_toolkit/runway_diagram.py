@@ -0,0 +1,142 @@
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from PySide6.QtCore import QPointF, Qt
+from PySide6.QtGui import QBrush, QColor, QPen, QPolygonF
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsScene
+
+from zc_flightplan_toolkit.geodesy import EARTH_RADIUS_NM, METERS_PER_NM
+from zc_flightplan_toolkit.runways import DMColumns
+
+METERS_PER_FOOT = 0.3048
+
+DEFAULT_RUNWAY_WIDTH_M = 45.0
+
+# runways narrower than this fraction of the diagram extent are drawn wider
+MIN_RUNWAY_WIDTH_FRACTION = 0.015
+
+RUNWAY_COLOR = QColor(60, 60, 60)
+
+CLOSED_RUNWAY_COLOR = QColor(200, 60, 60)
+
+
+class RunwayDiagram(NamedTuple):
+    ends: np.ndarray
+    """(n, 2, 2) threshold positions in metres east/north of the airport centre"""
+    widths: np.ndarray
+    idents: Tuple[Tuple[str, str], ...]
+    closed: np.ndarray
+
+
+def project_runway_ends(segments: pd.DataFrame) -> RunwayDiagram:
+    """Projects both thresholds of every runway onto a local plane in one step
+
+    segments is DMAirportRunwayInfo.get_runway_segments output. An equirectangular
+    projection around the mean threshold position is accurate to well under a metre
+    over an airport.
+    """
+    latitudes = segments[
+        [DMColumns.LEFT_END_LATITUDE.name, DMColumns.RIGHT_END_LATITUDE.name]
+    ].to_numpy(dtype=np.float64)
+    longitudes = segments[
+        [DMColumns.LEFT_END_LONGITUDE.name, DMColumns.RIGHT_END_LONGITUDE.name]
+    ].to_numpy(dtype=np.float64)
+
+    ends = np.zeros((len(segments), 2, 2))
+    if len(segments):
+        earth_radius_m = EARTH_RADIUS_NM * METERS_PER_NM
+        origin_latitude = latitudes.mean()
+        longitude_offsets = (longitudes - longitudes[0, 0] + 180) % 360 - 180
+        longitude_offsets -= longitude_offsets.mean()
+        ends[..., 0] = (
+            np.radians(longitude_offsets)
+            * np.cos(np.radians(origin_latitude))
+            * earth_radius_m
+        )
+        ends[..., 1] = np.radians(latitudes - origin_latitude) * earth_radius_m
+
+    widths = segments[DMColumns.WIDTH.name].to_numpy(dtype=np.float64) * METERS_PER_FOOT
+    return RunwayDiagram(
+        ends=ends,
+        widths=np.where(np.isnan(widths), DEFAULT_RUNWAY_WIDTH_M, widths),
+        idents=tuple(
+            zip(
+                segments[DMColumns.LEFT_END_IDENT.name].astype(str),
+                segments[DMColumns.RIGHT_END_IDENT.name].astype(str),
+            )
+        ),
+        closed=segments[DMColumns.CLOSED.name].fillna(0).to_numpy(dtype=bool),
+    )
+
+
+def build_runway_scene(diagram: RunwayDiagram) -> QGraphicsScene:
+    """Draws runways as filled strips labelled with their end identifiers, north up"""
+    scene = QGraphicsScene()
+    if not len(diagram.ends):
+        scene.addSimpleText("no runway data")
+        return scene
+
+    ends = diagram.ends * np.array([1, -1])
+    directions = ends[:, 1] - ends[:, 0]
+    lengths = np.linalg.norm(directions, axis=1, keepdims=True)
+    directions = np.divide(
+        directions, lengths, out=np.zeros_like(directions), where=lengths > 0
+    )
+    normals = np.stack([-directions[:, 1], directions[:, 0]], axis=1)
+
+    extent = max(np.ptp(ends[..., 0]), np.ptp(ends[..., 1]), 1.0)
+    half_widths = np.maximum(diagram.widths, extent * MIN_RUNWAY_WIDTH_FRACTION) / 2
+    offsets = normals * half_widths[:, None]
+    corners = np.stack(
+        [
+            ends[:, 0] + offsets,
+            ends[:, 1] + offsets,
+            ends[:, 1] - offsets,
+            ends[:, 0] - offsets,
+        ],
+        axis=1,
+    )
+    label_positions = ends + np.stack([-directions, directions], axis=1) * (
+        extent * 0.03
+    )
+
+    for runway_corners, runway_labels, idents, closed in zip(
+        corners.tolist(), label_positions.tolist(), diagram.idents, diagram.closed
+    ):
+        scene.addPolygon(
+            QPolygonF([QPointF(x, y) for x, y in runway_corners]),
+            QPen(Qt.PenStyle.NoPen),
+            QBrush(CLOSED_RUNWAY_COLOR if closed else RUNWAY_COLOR),
+        )
+        for ident, (x, y) in zip(idents, runway_labels):
+            label = scene.addSimpleText(ident)
+            label.setFlag(QGraphicsItem.GraphicsItemFlag.ItemIgnoresTransformations)
+            label.setPos(x, y)
+    return scene
+
+
+class RunwayDiagramCache:
+    """Runway scenes of recently shown airports, least recently used dropped first"""
+
+    def __init__(self, max_airports: int = 16):
+        self._max_airports = max_airports
+        self._scenes: OrderedDict[str, QGraphicsScene] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._scenes)
+
+    def get(self, icao: str) -> Optional[QGraphicsScene]:
+        scene = self._scenes.get(icao.upper())
+        if scene is not None:
+            self._scenes.move_to_end(icao.upper())
+        return scene
+
+    def put(self, icao: str, scene: QGraphicsScene) -> QGraphicsScene:
+        self._scenes[icao.upper()] = scene
+        self._scenes.move_to_end(icao.upper())
+        while len(self._scenes) > self._max_airports:
+            _, evicted_scene = self._scenes.popitem(last=False)
+            evicted_scene.deleteLater()
+        return scene
@@ -1,8 +1,10 @@
+import threading
 from enum import Enum
-from typing import NamedTuple, Protocol
+from typing import NamedTuple, Optional, Protocol
 
 import pandas as pd
 
+from zc_flightplan_toolkit.metrics import get_metrics, timed
 from zc_flightplan_toolkit.utils import get_unique_value
 
 
@@ -25,7 +27,9 @@ class RunwayInfo(NamedTuple):
 
 
 class AirportRunwayInfo(Protocol):
-    data: pd.DataFrame
+    @property
+    def data(self) -> pd.DataFrame:
+        ...
 
     def get_airport_runways(self, icao: str) -> pd.DataFrame:
         ...
@@ -33,6 +37,9 @@ class AirportRunwayInfo(Protocol):
     def get_runway_info(self, icao: str, runway_ident: str) -> RunwayInfo:
         ...
 
+    def get_runway_segments(self, icao: str) -> pd.DataFrame:
+        ...
+
 
 class DMColumns(Enum):
     ICAO = "airport_ident"
@@ -73,13 +80,40 @@ DM_END_INFO_MAP = {
 }
 
 
+DM_RUNWAY_END_COORDINATES = (
+    DMColumns.LEFT_END_LATITUDE,
+    DMColumns.LEFT_END_LONGITUDE,
+    DMColumns.RIGHT_END_LATITUDE,
+    DMColumns.RIGHT_END_LONGITUDE,
+)
+
+
 class DMAirportRunwayInfo:
+    """Runways from the OurAirports runways.csv, read on first use rather than on
+    construction so creating one (as a default argument) costs nothing"""
+
     def __init__(
         self,
         info_source: str = "https://davidmegginson.github.io/ourairports-data/runways.csv",
     ):
-        self.data = pd.read_csv(info_source)
-
+        self._info_source = info_source
+        self._data: Optional[pd.DataFrame] = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def data(self) -> pd.DataFrame:
+        if self._data is None:
+            with self._load_lock:
+                if self._data is None:
+                    with get_metrics().time("runway_load_seconds"):
+                        self._data = pd.read_csv(self._info_source)
+        return self._data
+
+    @data.setter
+    def data(self, data: pd.DataFrame) -> None:
+        self._data = data
+
+    @timed("runway_lookup_seconds", operation="airport_runways")
     def get_airport_runways(self, icao: str) -> pd.DataFrame:
         airport_data = self._get_runways_info_for_airport(icao)
         left_end_idents = airport_data[DMColumns.LEFT_END_IDENT.name].unique().tolist()
@@ -94,6 +128,18 @@ class DMAirportRunwayInfo:
             rows_with_runway_info.append(runway_info._asdict())
         return pd.DataFrame(rows_with_runway_info)
 
+    @timed("runway_lookup_seconds", operation="runway_segments")
+    def get_runway_segments(self, icao: str) -> pd.DataFrame:
+        """One row per runway with both ends, columns named after DMColumns members
+
+        Runways missing threshold coordinates for either end are left out.
+        """
+        airport_data = self._get_runways_info_for_airport(icao)
+        return airport_data.dropna(
+            subset=[col.name for col in DM_RUNWAY_END_COORDINATES]
+        ).reset_index(drop=True)
+
+    @timed("runway_lookup_seconds", operation="runway_info")
     def get_runway_info(self, icao: str, runway_ident: str) -> RunwayInfo:
         runway_ident = runway_ident.upper()
 
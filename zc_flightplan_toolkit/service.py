@@ -0,0 +1,451 @@
+import argparse
+import json
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+    cast,
+)
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+from loguru import logger
+
+from zc_flightplan_toolkit.api import BaseAPI, make_response_cache
+from zc_flightplan_toolkit.caching import PrefetchScheduler
+from zc_flightplan_toolkit.cli import (
+    DEFAULT_WORKERS,
+    ERROR_COLUMN,
+    QUERY_COLUMN,
+    QUERY_LOOKUPS,
+    ToolkitClients,
+    add_metrics_arguments,
+    add_transport_arguments,
+    archive_transport,
+    export_metrics,
+    get_decoded_metar,
+    run_queries,
+)
+from zc_flightplan_toolkit.metrics import PROMETHEUS_CONTENT_TYPE, format_prometheus
+from zc_flightplan_toolkit.tracks import (
+    get_north_atlantic_track_records,
+    get_pacific_track_records,
+    get_pacific_tracks_for_city_pair,
+)
+
+DEFAULT_HOST = "127.0.0.1"
+
+DEFAULT_PORT = 8750
+
+DEFAULT_CACHE_SOFT_TTL = timedelta(minutes=2)
+
+DEFAULT_CACHE_HARD_TTL = timedelta(minutes=30)
+
+MAX_BATCH_QUERIES = 1000
+
+JSON_CONTENT_TYPE = "application/json"
+
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+class ServiceError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ServiceResponse(NamedTuple):
+    """A body of bytes is sent whole, an iterator is streamed chunk by chunk"""
+
+    status: int
+    body: Union[bytes, Iterator[bytes]]
+    content_type: str = JSON_CONTENT_TYPE
+
+
+_Handler = Callable[..., ServiceResponse]
+
+
+class ToolkitService:
+    """Answers toolkit queries of every client from one set of warm API clients
+
+    All clients share the response cache (kept warm by a prefetch scheduler), the
+    runway index, the track caches and one worker pool for batch queries. Transport
+    is left to ToolkitHTTPServer, handle takes a parsed request and never raises.
+    """
+
+    def __init__(
+        self,
+        clients: Optional[ToolkitClients] = None,
+        workers: int = DEFAULT_WORKERS,
+        prefetch: bool = True,
+    ):
+        self.clients = clients or ToolkitClients(
+            response_cache=make_response_cache(
+                DEFAULT_CACHE_SOFT_TTL, DEFAULT_CACHE_HARD_TTL
+            )
+        )
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="service-query"
+        )
+        response_cache = self.clients.response_cache
+        self._prefetch_scheduler = (
+            PrefetchScheduler([response_cache])
+            if prefetch and response_cache is not None
+            else None
+        )
+        self._routes: List[Tuple[str, Pattern[str], _Handler]] = [
+            ("GET", re.compile(r"/health"), self._get_health),
+            ("GET", re.compile(r"/stats"), self._get_stats),
+            ("GET", re.compile(r"/metrics"), self._get_metrics),
+            ("GET", re.compile(r"/airports/(?P<airport_id>\w+)"), self._get_airport),
+            (
+                "GET",
+                re.compile(r"/routes/(?P<origin>\w+)/(?P<destination>\w+)"),
+                self._get_routes,
+            ),
+            (
+                "GET",
+                re.compile(r"/routes/(?P<origin>\w+)/(?P<destination>\w+)/pages"),
+                self._stream_route_pages,
+            ),
+            ("GET", re.compile(r"/metar/(?P<icao>\w+)"), self._get_metar),
+            ("GET", re.compile(r"/metars"), self._get_metars),
+            ("GET", re.compile(r"/taf/(?P<icao>\w+)"), self._get_taf),
+            ("GET", re.compile(r"/datis"), self._get_all_datis),
+            ("GET", re.compile(r"/datis/(?P<icao>\w+)"), self._get_datis),
+            ("GET", re.compile(r"/runways/(?P<icao>\w+)"), self._get_runways),
+            ("GET", re.compile(r"/tracks/(?P<system>nat|pacific)"), self._get_tracks),
+            ("POST", re.compile(r"/batch/(?P<command>\w+)"), self._stream_batch),
+        ]
+
+    def start(self) -> None:
+        """Loads the runway index up front so the first runway query does not wait"""
+        threading.Thread(
+            target=lambda: self.clients.runway_info.data,
+            name="runway-warmup",
+            daemon=True,
+        ).start()
+        if self._prefetch_scheduler is not None:
+            self._prefetch_scheduler.start()
+
+    def stop(self) -> None:
+        if self._prefetch_scheduler is not None:
+            self._prefetch_scheduler.stop()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def handle(
+        self, method: str, path: str, params: Dict[str, str], body: bytes = b""
+    ) -> ServiceResponse:
+        path = path.rstrip("/") or "/"
+        path_matched = False
+        for route_method, pattern, handler in self._routes:
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            path_matched = True
+            if route_method != method:
+                continue
+            try:
+                return handler(params=params, body=body, **match.groupdict())
+            except ServiceError as error:
+                return _error_response(error.status, str(error))
+            except ValueError as error:
+                return _error_response(400, str(error))
+            except Exception as error:
+                logger.warning(f"{method} {path} failed: {error}")
+                return _error_response(502, str(error))
+        if path_matched:
+            return _error_response(405, f"{method} not allowed on {path}")
+        return _error_response(404, f"no endpoint {path}")
+
+    def _get_health(self, **_) -> ServiceResponse:
+        return _json_response({"status": "ok"})
+
+    def _get_stats(self, **_) -> ServiceResponse:
+        response_cache = self.clients.response_cache
+        return _json_response(
+            {
+                "response_cache": (
+                    {**response_cache.stats._asdict(), "entries": len(response_cache)}
+                    if response_cache is not None
+                    else None
+                ),
+                "coalescing": BaseAPI.get_coalescing_stats()._asdict(),
+                "prefetches": (
+                    self._prefetch_scheduler.prefetches
+                    if self._prefetch_scheduler is not None
+                    else 0
+                ),
+            }
+        )
+
+    def _get_metrics(self, **_) -> ServiceResponse:
+        return ServiceResponse(
+            200, format_prometheus().encode(), PROMETHEUS_CONTENT_TYPE
+        )
+
+    def _get_airport(self, airport_id: str, **_) -> ServiceResponse:
+        return _frame_response(
+            self.clients.flightaware_api.get_airport_information(airport_id)
+        )
+
+    def _get_routes(
+        self, origin: str, destination: str, params: Dict[str, str], **_
+    ) -> ServiceResponse:
+        return _frame_response(
+            self.clients.flightaware_api.get_route_info(
+                origin, destination, max_pages=int(params.get("max_pages", 1))
+            )
+        )
+
+    def _stream_route_pages(
+        self, origin: str, destination: str, params: Dict[str, str], **_
+    ) -> ServiceResponse:
+        """One route per line, each FlightAware page is sent as soon as it arrives"""
+        route_pages = self.clients.flightaware_api.iter_route_info(
+            origin, destination, max_pages=int(params.get("max_pages", 10))
+        )
+
+        def stream() -> Iterator[bytes]:
+            try:
+                for route_page in route_pages:
+                    yield _frame_lines(route_page)
+            except Exception as error:
+                logger.warning(f"streaming routes {origin}-{destination}: {error}")
+                yield _json_line({ERROR_COLUMN: str(error)})
+
+        return ServiceResponse(200, stream(), NDJSON_CONTENT_TYPE)
+
+    def _get_metar(self, icao: str, params: Dict[str, str], **_) -> ServiceResponse:
+        if _is_true(params.get("decoded", "")):
+            return _frame_response(get_decoded_metar(self.clients, icao))
+        metars = self.clients.weather_api.get_metars([icao])
+        return _json_response({"metar": metars.get(icao.upper(), "no metar found")})
+
+    def _get_metars(self, params: Dict[str, str], **_) -> ServiceResponse:
+        icaos = [icao for icao in params.get("icao", "").split(",") if icao]
+        if not icaos:
+            raise ValueError("icao parameter is required, comma separated")
+        return _json_response(self.clients.weather_api.get_metars(icaos))
+
+    def _get_taf(self, icao: str, **_) -> ServiceResponse:
+        return _json_response({"taf": self.clients.weather_api.get_taf(icao)})
+
+    def _get_datis(self, icao: str, **_) -> ServiceResponse:
+        return _json_response(
+            {"datis": self.clients.datis_api.request_datis(icao.upper())}
+        )
+
+    def _get_all_datis(self, **_) -> ServiceResponse:
+        return _frame_response(self.clients.datis_api.request_all_datis())
+
+    def _get_runways(self, icao: str, **_) -> ServiceResponse:
+        return _frame_response(self.clients.runway_info.get_airport_runways(icao))
+
+    def _get_tracks(self, system: str, params: Dict[str, str], **_) -> ServiceResponse:
+        if system == "nat":
+            tracks: List[Any] = get_north_atlantic_track_records()
+        elif "origin" in params and "destination" in params:
+            tracks = get_pacific_tracks_for_city_pair(
+                params["origin"], params["destination"]
+            )
+        else:
+            tracks = get_pacific_track_records()
+        return _json_response([track._asdict() for track in tracks])
+
+    def _stream_batch(self, command: str, body: bytes, **_) -> ServiceResponse:
+        """Runs {"queries": [...]} on the shared workers, one result line per query
+
+        Lines keep the order of the queries and are sent as soon as the query and
+        those before it are done.
+        """
+        lookup = QUERY_LOOKUPS.get(command)
+        if lookup is None:
+            raise ServiceError(404, f"no batch command {command}")
+        try:
+            request = json.loads(body or b"{}")
+        except json.JSONDecodeError as error:
+            raise ValueError(f"invalid json body: {error}") from error
+        queries = request.get("queries") if isinstance(request, dict) else None
+        if not isinstance(queries, list) or not all(
+            isinstance(query, str) for query in queries
+        ):
+            raise ValueError('body must be {"queries": ["...", ...]}')
+        if len(queries) > MAX_BATCH_QUERIES:
+            raise ServiceError(413, f"at most {MAX_BATCH_QUERIES} queries per batch")
+
+        lookup = partial(lookup, self.clients)
+        if command == "routes":
+            lookup = partial(lookup, max_pages=int(request.get("max_pages", 1)))
+        results = run_queries(lookup, queries, executor=self._executor)
+        return ServiceResponse(
+            200,
+            (_batch_line(query, result) for query, result in zip(queries, results)),
+            NDJSON_CONTENT_TYPE,
+        )
+
+
+class ToolkitHTTPServer(ThreadingHTTPServer):
+    """HTTP/1.1 front of a ToolkitService, one thread per connection"""
+
+    daemon_threads = True
+
+    def __init__(
+        self, server_address: Tuple[str, int], service: Optional[ToolkitService] = None
+    ):
+        super().__init__(server_address, ToolkitRequestHandler)
+        self.service = service or ToolkitService()
+
+
+class ToolkitRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        self._respond("GET")
+
+    def do_POST(self) -> None:
+        self._respond("POST")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug(f"{self.address_string()} {format % args}")
+
+    def _respond(self, method: str) -> None:
+        url = urlsplit(self.path)
+        content_length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(content_length) if content_length else b""
+        service = cast(ToolkitHTTPServer, self.server).service
+        response = service.handle(method, url.path, dict(parse_qsl(url.query)), body)
+
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        if isinstance(response.body, bytes):
+            self.send_header("Content-Length", str(len(response.body)))
+            self.end_headers()
+            self.wfile.write(response.body)
+            return
+
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in response.body:
+                if chunk:
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        except Exception as error:
+            # the status is already sent, end the stream without the final chunk
+            logger.warning(f"{method} {url.path} stream failed: {error}")
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def serve(
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    service: Optional[ToolkitService] = None,
+) -> None:
+    server = ToolkitHTTPServer((host, port), service)
+    server.service.start()
+    logger.info(f"serving toolkit apis on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="zc-flightplan-service",
+        description="Serve the toolkit apis as JSON over HTTP with one warm cache",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("-w", "--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument("--aero-api-key", default="", help="defaults to AERO_API_KEY")
+    parser.add_argument(
+        "--checkwx-api-key", default="", help="defaults to CHECKWX_API_KEY"
+    )
+    parser.add_argument("--log-level", default="INFO")
+    add_transport_arguments(parser)
+    add_metrics_arguments(parser)
+    args = parser.parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level=args.log_level.upper())
+
+    clients = ToolkitClients(
+        args.aero_api_key,
+        args.checkwx_api_key,
+        response_cache=make_response_cache(
+            DEFAULT_CACHE_SOFT_TTL, DEFAULT_CACHE_HARD_TTL
+        ),
+    )
+    with archive_transport(args), export_metrics(args):
+        serve(args.host, args.port, ToolkitService(clients, workers=args.workers))
+    return 0
+
+
+def _is_true(value: str) -> bool:
+    return value.lower() in ("1", "true", "yes")
+
+
+def _json_line(value: Any) -> bytes:
+    return f"{json.dumps(value, default=str)}\n".encode()
+
+
+def _json_response(value: Any, status: int = 200) -> ServiceResponse:
+    return ServiceResponse(status, json.dumps(value, default=str).encode())
+
+
+def _error_response(status: int, message: str) -> ServiceResponse:
+    return _json_response({ERROR_COLUMN: message}, status)
+
+
+def _frame_json(frame: pd.DataFrame) -> str:
+    return frame.to_json(orient="records", date_format="iso") or "[]"
+
+
+def _frame_response(frame: pd.DataFrame) -> ServiceResponse:
+    return ServiceResponse(200, _frame_json(frame).encode())
+
+
+def _frame_lines(frame: pd.DataFrame) -> bytes:
+    if frame.empty:
+        return b""
+    lines = frame.to_json(orient="records", lines=True, date_format="iso") or ""
+    return f"{lines.rstrip()}\n".encode()
+
+
+def _batch_line(query: str, result: pd.DataFrame) -> bytes:
+    query_json = json.dumps(query)
+    if (
+        len(result)
+        and ERROR_COLUMN in result.columns
+        and result[ERROR_COLUMN].notna().all()
+    ):
+        error = json.dumps(str(result[ERROR_COLUMN].iloc[0]))
+        return (
+            f'{{"{QUERY_COLUMN}": {query_json}, "{ERROR_COLUMN}": {error}}}\n'.encode()
+        )
+    records = _frame_json(result.drop(columns=QUERY_COLUMN, errors="ignore"))
+    return f'{{"{QUERY_COLUMN}": {query_json}, "records": {records}}}\n'.encode()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
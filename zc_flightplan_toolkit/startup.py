@@ -0,0 +1,49 @@
+import time
+from typing import Callable, List, NamedTuple, Optional
+
+from loguru import logger
+
+
+class StartupPhase(NamedTuple):
+    name: str
+    seconds: float
+
+
+class StartupTimer:
+    """Records how long each startup phase took, from started_at (default: now)
+
+    Deliberately light on imports so it can be created before anything heavy loads.
+    """
+
+    def __init__(
+        self,
+        started_at: Optional[float] = None,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._clock = clock
+        self._started_at = clock() if started_at is None else started_at
+        self._last_mark = self._started_at
+        self.phases: List[StartupPhase] = []
+
+    @property
+    def total(self) -> float:
+        return self._last_mark - self._started_at
+
+    def mark(self, phase: str) -> float:
+        """Ends the current phase, returns its duration in seconds"""
+        now = self._clock()
+        duration = now - self._last_mark
+        self.phases.append(StartupPhase(phase, duration))
+        self._last_mark = now
+        return duration
+
+    def report(self) -> str:
+        name_width = max((len(phase.name) for phase in self.phases), default=0)
+        lines = [
+            f"{phase.name:<{name_width}}  {phase.seconds * 1000:8.1f} ms"
+            for phase in self.phases
+        ]
+        lines.append(f"{'total':<{name_width}}  {self.total * 1000:8.1f} ms")
+        breakdown = "\n".join(lines)
+        logger.info(f"startup timing:\n{breakdown}")
+        return breakdown
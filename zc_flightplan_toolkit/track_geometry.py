@@ -0,0 +1,199 @@
+import re
+from enum import Enum
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from zc_flightplan_toolkit.geodesy import leg_distances
+from zc_flightplan_toolkit.tracks import NATTrack, PacificTrack
+
+Coordinate = Tuple[float, float]
+Track = Union[NATTrack, PacificTrack]
+
+_NAT_SLASH_PATTERN = re.compile(r"^(\d{2})(\d{2})?/(\d{2,3})$")
+_ARINC_SUFFIX_PATTERN = re.compile(r"^(\d{2})(\d{2})([NESW])$")
+_ARINC_INFIX_PATTERN = re.compile(r"^(\d{2})([NESW])(\d{2})$")
+_DEGREES_PATTERN = re.compile(r"^(\d{2})(\d{2})?([NS])(\d{3})(\d{2})?([EW])$")
+
+_ARINC_HEMISPHERES = {"N": (1, -1), "E": (1, 1), "S": (-1, 1), "W": (-1, -1)}
+
+
+class FixColumns(Enum):
+    IDENT = "ident"
+    LATITUDE = "latitude"
+    LONGITUDE = "longitude"
+
+
+class TrackGeometryColumns(Enum):
+    TRACK = "track"
+    WAYPOINTS = "waypoints"
+    UNRESOLVED = "unresolved_waypoints"
+    LEG_DISTANCES = "leg_distances_nm"
+    TOTAL_DISTANCE = "total_distance_nm"
+
+
+class FixDatabase:
+    """Named fix coordinates loaded from a local file
+
+    The source needs ident, latitude and longitude columns (degrees), fix idents are
+    not globally unique so only the first occurrence of each ident is kept.
+    """
+
+    def __init__(self, info_source: Union[str, pd.DataFrame]):
+        data = (
+            info_source
+            if isinstance(info_source, pd.DataFrame)
+            else pd.read_csv(info_source)
+        )
+        data = data.drop_duplicates(subset=[FixColumns.IDENT.value])
+        self._idents = pd.Index(data[FixColumns.IDENT.value].str.upper())
+        self._coordinates = data[
+            [FixColumns.LATITUDE.value, FixColumns.LONGITUDE.value]
+        ].to_numpy(dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self._idents)
+
+    def resolve(self, idents: Sequence[str]) -> np.ndarray:
+        """Returns an (n, 2) array of latitude/longitude, NaN for unknown idents"""
+        positions = self._idents.get_indexer(
+            pd.Index([ident.upper() for ident in idents])
+        )
+        coordinates = np.full((len(idents), 2), np.nan)
+        found = positions >= 0
+        coordinates[found] = self._coordinates[positions[found]]
+        return coordinates
+
+
+def parse_coordinate_waypoint(waypoint: str) -> Optional[Coordinate]:
+    """Converts latitude/longitude shorthand into (latitude, longitude) degrees
+
+    Supports NAT slash format (57/20, 5730/20), ARINC 424 five character
+    format (5720N, 57N20) and PACOTS degree format (36N160E, 4530N15000W).
+    Returns None for named fixes.
+    """
+    if match := _NAT_SLASH_PATTERN.match(waypoint):
+        degrees, minutes, longitude = match.groups()
+        latitude = int(degrees) + int(minutes or 0) / 60
+        return latitude, -float(longitude)
+
+    if match := _ARINC_SUFFIX_PATTERN.match(waypoint):
+        latitude, longitude, hemisphere = match.groups()
+        return _apply_arinc_hemisphere(int(latitude), int(longitude), hemisphere)
+
+    if match := _ARINC_INFIX_PATTERN.match(waypoint):
+        latitude, hemisphere, longitude = match.groups()
+        return _apply_arinc_hemisphere(int(latitude), 100 + int(longitude), hemisphere)
+
+    if match := _DEGREES_PATTERN.match(waypoint):
+        (
+            latitude_degrees,
+            latitude_minutes,
+            latitude_hemisphere,
+            longitude_degrees,
+            longitude_minutes,
+            longitude_hemisphere,
+        ) = match.groups()
+        latitude = int(latitude_degrees) + int(latitude_minutes or 0) / 60
+        longitude = int(longitude_degrees) + int(longitude_minutes or 0) / 60
+        return (
+            latitude if latitude_hemisphere == "N" else -latitude,
+            longitude if longitude_hemisphere == "E" else -longitude,
+        )
+
+    return None
+
+
+def resolve_waypoints(
+    waypoints: Sequence[str], fix_database: Optional[FixDatabase] = None
+) -> np.ndarray:
+    """Returns an (n, 2) array of latitude/longitude, NaN for unresolved waypoints"""
+    coordinates = np.full((len(waypoints), 2), np.nan)
+    named_fix_positions: List[int] = []
+    named_fixes: List[str] = []
+    for position, waypoint in enumerate(waypoints):
+        coordinate = parse_coordinate_waypoint(waypoint)
+        if coordinate is None:
+            named_fix_positions.append(position)
+            named_fixes.append(waypoint)
+        else:
+            coordinates[position] = coordinate
+
+    if named_fixes and fix_database is not None:
+        coordinates[named_fix_positions] = fix_database.resolve(named_fixes)
+    return coordinates
+
+
+def compute_track_distances(
+    tracks: Sequence[Track],
+    fix_database: Optional[FixDatabase] = None,
+    origin: Optional[Coordinate] = None,
+    destination: Optional[Coordinate] = None,
+) -> pd.DataFrame:
+    """Computes leg and total great circle distances (nm) for all tracks at once
+
+    origin and destination, when given, are joined to the first and last track
+    waypoint so tracks can be compared for a city pair. Unresolved waypoints are
+    skipped and counted in the unresolved_waypoints column.
+    """
+    track_coordinates: List[np.ndarray] = []
+    unresolved_counts: List[int] = []
+    for track in tracks:
+        coordinates = resolve_waypoints(_get_track_waypoints(track), fix_database)
+        resolved = ~np.isnan(coordinates).any(axis=1)
+        unresolved_counts.append(int((~resolved).sum()))
+        if origin is not None:
+            coordinates = np.concatenate([[origin], coordinates])
+            resolved = np.concatenate([[True], resolved])
+        if destination is not None:
+            coordinates = np.concatenate([coordinates, [destination]])
+            resolved = np.concatenate([resolved, [True]])
+        track_coordinates.append(coordinates[resolved])
+
+    if unresolved := sum(unresolved_counts):
+        logger.warning(f"{unresolved} track waypoints could not be resolved")
+
+    legs = _padded_leg_distances(track_coordinates)
+    leg_counts = [max(len(coordinates) - 1, 0) for coordinates in track_coordinates]
+
+    return pd.DataFrame(
+        {
+            TrackGeometryColumns.TRACK.value: [
+                _get_track_name(track) for track in tracks
+            ],
+            TrackGeometryColumns.WAYPOINTS.value: [
+                len(coordinates) for coordinates in track_coordinates
+            ],
+            TrackGeometryColumns.UNRESOLVED.value: unresolved_counts,
+            TrackGeometryColumns.LEG_DISTANCES.value: [
+                track_legs[:leg_count]
+                for track_legs, leg_count in zip(legs, leg_counts)
+            ],
+            TrackGeometryColumns.TOTAL_DISTANCE.value: np.nansum(legs, axis=1),
+        }
+    )
+
+
+def _padded_leg_distances(track_coordinates: List[np.ndarray]) -> np.ndarray:
+    max_points = max((len(coordinates) for coordinates in track_coordinates), default=0)
+    padded = np.full((len(track_coordinates), max(max_points, 1), 2), np.nan)
+    for index, coordinates in enumerate(track_coordinates):
+        padded[index, : len(coordinates)] = coordinates
+    return leg_distances(padded)
+
+
+def _apply_arinc_hemisphere(
+    latitude: int, longitude: int, hemisphere: str
+) -> Coordinate:
+    latitude_sign, longitude_sign = _ARINC_HEMISPHERES[hemisphere]
+    return float(latitude_sign * latitude), float(longitude_sign * longitude)
+
+
+def _get_track_waypoints(track: Track) -> Tuple[str, ...]:
+    return track.waypoints if isinstance(track, NATTrack) else track.fixes
+
+
+def _get_track_name(track: Track) -> str:
+    return track.letter if isinstance(track, NATTrack) else track.track_id
@@ -1,18 +1,293 @@
+import html as html_lib
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
 import requests
 from loguru import logger
 
+from zc_flightplan_toolkit.caching import SingleFlight
+from zc_flightplan_toolkit.metrics import get_metrics
+from zc_flightplan_toolkit.transport import get_default_transport
+
+NORTH_ATLANTIC_TRACKS_URL = "https://www.notams.faa.gov/common/nat.html"
+
+PACIFIC_TRACKS_URL = "https://www.notams.faa.gov/dinsQueryWeb/advancedNotamMapAction.do"
+
+UNPARSED_TRACKS_CACHE_TTL = timedelta(minutes=5)
+
+_MONTHS = {
+    month: index
+    for index, month in enumerate(
+        [
+            "JAN",
+            "FEB",
+            "MAR",
+            "APR",
+            "MAY",
+            "JUN",
+            "JUL",
+            "AUG",
+            "SEP",
+            "OCT",
+            "NOV",
+            "DEC",
+        ],
+        start=1,
+    )
+}
+
+_NAT_VALIDITY_PATTERN = re.compile(
+    r"^([A-Z]{3}) (\d{2})/(\d{2})(\d{2})Z TO ([A-Z]{3}) (\d{2})/(\d{2})(\d{2})Z"
+)
+_NAT_TRACK_PATTERN = re.compile(r"^([A-Z]) ([A-Z0-9/ ]+)$")
+_NAT_LEVELS_PATTERN = re.compile(r"^(EAST|WEST) LVLS\s*(.*)$")
+_NAT_TMI_PATTERN = re.compile(r"TMI IS (\d{3}[A-Z]?)")
+
+_PACOTS_TRACK_PATTERN = re.compile(r"TDM TRK (\w+) \d{12}")
+_PACOTS_VALIDITY_PATTERN = re.compile(r"^(\d{10}) (\d{10})$")
+_PACOTS_FLIGHT_LEVELS_PATTERN = re.compile(r"\bFLS?\s*/?\s*((?:\d{3}[\s/-]*)+)")
+_AIRPORT_PATTERN = re.compile(r"^[A-Z]{4}$")
+
+
+class NATTrack(NamedTuple):
+    letter: str
+    waypoints: Tuple[str, ...]
+    east_levels: Tuple[int, ...]
+    west_levels: Tuple[int, ...]
+    valid_from: datetime
+    valid_to: datetime
+    tmi: str = ""
+
+
+class PacificTrack(NamedTuple):
+    track_id: str
+    fixes: Tuple[str, ...]
+    valid_from: datetime
+    valid_to: datetime
+    flight_levels: Tuple[int, ...] = ()
+    airports: Tuple[str, ...] = ()
+    routes: Tuple[str, ...] = ()
+
+
+class _TrackCacheEntry(NamedTuple):
+    html: str
+    tracks: tuple
+    expires_at: datetime
+
+
+_track_cache: Dict[str, _TrackCacheEntry] = {}
+_track_cache_lock = threading.Lock()
+
+_track_fetches: SingleFlight[Optional[_TrackCacheEntry]] = SingleFlight()
+
 
 def get_north_atlantic_tracks(
-    url: str = "https://www.notams.faa.gov/common/nat.html",
+    url: str = NORTH_ATLANTIC_TRACKS_URL, timeout: int = 5
 ) -> str:
     """Returns HTML representation for display in QTextBrowser"""
-    response = requests.get(url, timeout=5)
-    if response.status_code == 200:
-        return _extract_north_atlantic_tracks(response.text).strip()
-    logger.warning("Failed to retrieve north atlantic tracks data")
+    cache_entry = _get_north_atlantic_cache_entry(url, timeout)
+    if cache_entry is not None:
+        return _extract_north_atlantic_tracks(cache_entry.html).strip()
     return "Failed to retrieve North Atlantic Tracks Data"
 
 
+def get_north_atlantic_track_records(
+    url: str = NORTH_ATLANTIC_TRACKS_URL, timeout: int = 5, refresh: bool = False
+) -> List[NATTrack]:
+    """Returns the currently published NAT tracks as typed records
+
+    The track set is fetched once and served from cache until its validity window ends.
+    """
+    cache_entry = _get_north_atlantic_cache_entry(url, timeout, refresh)
+    return list(cache_entry.tracks) if cache_entry is not None else []
+
+
+def parse_north_atlantic_tracks(
+    text: str, reference_time: Optional[datetime] = None
+) -> List[NATTrack]:
+    """Parses a NAT track message (plain text or the FAA HTML page) into track records
+
+    NAT messages omit the year, it is inferred from reference_time (defaults to now).
+    """
+    reference_time = reference_time or datetime.now(timezone.utc)
+    lines = _html_to_lines(text)
+
+    tmi_match = _NAT_TMI_PATTERN.search("\n".join(lines))
+    tmi = tmi_match.group(1) if tmi_match else ""
+
+    tracks: List[NATTrack] = []
+    validity: Optional[Tuple[datetime, datetime]] = None
+    pending_track: Optional[Tuple[str, Tuple[str, ...]]] = None
+    levels: Dict[str, Tuple[int, ...]] = {}
+
+    for line in lines:
+        if validity_match := _NAT_VALIDITY_PATTERN.match(line):
+            validity = _parse_nat_validity(validity_match, reference_time)
+            continue
+
+        if validity is None:
+            continue
+
+        if levels_match := _NAT_LEVELS_PATTERN.match(line):
+            if pending_track is None:
+                continue
+            direction, raw_levels = levels_match.groups()
+            levels[direction] = tuple(
+                int(level) for level in raw_levels.split() if level.isdigit()
+            )
+            if "EAST" in levels and "WEST" in levels:
+                letter, waypoints = pending_track
+                tracks.append(
+                    NATTrack(
+                        letter=letter,
+                        waypoints=waypoints,
+                        east_levels=levels["EAST"],
+                        west_levels=levels["WEST"],
+                        valid_from=validity[0],
+                        valid_to=validity[1],
+                        tmi=tmi,
+                    )
+                )
+                pending_track = None
+                levels = {}
+            continue
+
+        if track_match := _NAT_TRACK_PATTERN.match(line):
+            letter, raw_waypoints = track_match.groups()
+            pending_track = (letter, tuple(raw_waypoints.split()))
+            levels = {}
+
+    return tracks
+
+
+def clear_track_cache() -> None:
+    with _track_cache_lock:
+        _track_cache.clear()
+
+
+def _get_north_atlantic_cache_entry(
+    url: str, timeout: int, refresh: bool = False
+) -> Optional[_TrackCacheEntry]:
+    return _get_cached_tracks(
+        url,
+        lambda: get_default_transport().request("GET", url, timeout=timeout),
+        parse_north_atlantic_tracks,
+        refresh,
+        "north atlantic tracks",
+        "nat",
+    )
+
+
+def _get_cached_tracks(
+    cache_key: str,
+    fetch: Callable[[], requests.Response],
+    parse: Callable[[str, datetime], list],
+    refresh: bool,
+    description: str,
+    system: str,
+) -> Optional[_TrackCacheEntry]:
+    """Cached tracks, fetched once for every caller waiting on the same url
+
+    The cache lock only guards the cache itself, fetches of other urls (and readers
+    of their cached tracks) never wait on a slow upstream.
+    """
+    metrics = get_metrics()
+    with _track_cache_lock:
+        cache_entry = _track_cache.get(cache_key)
+    if (
+        cache_entry is not None
+        and not refresh
+        and datetime.now(timezone.utc) < cache_entry.expires_at
+    ):
+        metrics.increment("track_cache_lookups_total", system=system, result="hit")
+        return cache_entry
+    result = "refresh" if refresh else "miss"
+    metrics.increment("track_cache_lookups_total", system=system, result=result)
+
+    return _track_fetches.call(
+        cache_key,
+        lambda: _fetch_tracks(cache_key, fetch, parse, description, system),
+    )
+
+
+def _fetch_tracks(
+    cache_key: str,
+    fetch: Callable[[], requests.Response],
+    parse: Callable[[str, datetime], list],
+    description: str,
+    system: str,
+) -> Optional[_TrackCacheEntry]:
+    now = datetime.now(timezone.utc)
+    response = fetch()
+    if response.status_code != 200:
+        logger.warning(f"Failed to retrieve {description} data")
+        return None
+
+    with get_metrics().time("track_parse_seconds", system=system):
+        tracks = tuple(parse(response.text, now))
+    cache_entry = _TrackCacheEntry(
+        response.text, tracks, _get_cache_expiry(tracks, now)
+    )
+    with _track_cache_lock:
+        _track_cache[cache_key] = cache_entry
+    return cache_entry
+
+
+def _get_cache_expiry(tracks: tuple, now: datetime) -> datetime:
+    current_expiries = [track.valid_to for track in tracks if track.valid_to > now]
+    if not current_expiries:
+        return now + UNPARSED_TRACKS_CACHE_TTL
+    return min(current_expiries)
+
+
+def _parse_nat_validity(
+    validity_match: re.Match, reference_time: datetime
+) -> Tuple[datetime, datetime]:
+    (
+        start_month,
+        start_day,
+        start_hour,
+        start_minute,
+        end_month,
+        end_day,
+        end_hour,
+        end_minute,
+    ) = validity_match.groups()
+    valid_from = _build_nat_datetime(
+        start_month, start_day, start_hour, start_minute, reference_time
+    )
+    valid_to = _build_nat_datetime(
+        end_month, end_day, end_hour, end_minute, reference_time
+    )
+    if valid_to < valid_from:
+        valid_to = valid_to.replace(year=valid_to.year + 1)
+    return valid_from, valid_to
+
+
+def _build_nat_datetime(
+    month: str, day: str, hour: str, minute: str, reference_time: datetime
+) -> datetime:
+    month_number = _MONTHS[month]
+    year = reference_time.year
+    if month_number - reference_time.month > 6:
+        year -= 1
+    elif reference_time.month - month_number > 6:
+        year += 1
+    return datetime(
+        year, month_number, int(day), int(hour), int(minute), tzinfo=timezone.utc
+    )
+
+
+def _html_to_lines(text: str) -> List[str]:
+    text = re.sub(
+        r"<(?:br|/?p|/?tr|/?td|/?pre|/?div)\b[^>]*>", "\n", text, flags=re.IGNORECASE
+    )
+    text = html_lib.unescape(re.sub(r"<[^>]+>", "", text))
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
 def _extract_north_atlantic_tracks(html: str) -> str:
     html_tr_tag = "<tr>"
     first_html_tr_tag_index = html.index(html_tr_tag)
@@ -21,19 +296,132 @@ def _extract_north_atlantic_tracks(html: str) -> str:
     return html[second_html_tr_tag_index:]
 
 
-def get_pacific_tracks(
-    url: str = "https://www.notams.faa.gov/dinsQueryWeb/advancedNotamMapAction.do",
-) -> str:
+def get_pacific_tracks(url: str = PACIFIC_TRACKS_URL, timeout: int = 10) -> str:
+    cache_entry = _get_pacific_cache_entry(url, timeout)
+    if cache_entry is not None:
+        return _process_pacific_tracks_data(cache_entry.html)
+    return "Failed to retrieve Pacific Tracks Data"
+
+
+def get_pacific_track_records(
+    url: str = PACIFIC_TRACKS_URL, timeout: int = 10, refresh: bool = False
+) -> List[PacificTrack]:
+    """Returns the currently published PACOTS tracks as typed records
+
+    The track set is fetched once and served from cache until its validity window ends.
+    """
+    cache_entry = _get_pacific_cache_entry(url, timeout, refresh)
+    return list(cache_entry.tracks) if cache_entry is not None else []
+
+
+def get_pacific_tracks_for_city_pair(
+    origin: str,
+    destination: str,
+    url: str = PACIFIC_TRACKS_URL,
+    timeout: int = 10,
+) -> List[PacificTrack]:
+    """Returns PACOTS tracks whose connecting routes serve both airports (ICAO codes)"""
+    city_pair = {origin.upper(), destination.upper()}
+    return [
+        track
+        for track in get_pacific_track_records(url, timeout)
+        if city_pair.issubset(track.airports)
+    ]
+
+
+def parse_pacific_tracks(
+    text: str, reference_time: Optional[datetime] = None
+) -> List[PacificTrack]:
+    """Parses PACOTS track messages (TDM) from plain text or the FAA NOTAM search page
+
+    reference_time is unused as TDM messages carry the full date, it is accepted
+    to share the NAT parser signature.
+    """
+    lines = _html_to_lines(text)
+    track_starts = [
+        index for index, line in enumerate(lines) if _PACOTS_TRACK_PATTERN.search(line)
+    ]
+    track_ends = track_starts[1:] + [len(lines)]
+
+    tracks = []
+    for start, end in zip(track_starts, track_ends):
+        track = _parse_pacific_track(lines[start:end])
+        if track is not None:
+            tracks.append(track)
+    return tracks
+
+
+def _get_pacific_cache_entry(
+    url: str, timeout: int, refresh: bool = False
+) -> Optional[_TrackCacheEntry]:
     form_data = {
         "queryType": "pacificTracks",
         "actionType": "advancedNOTAMFunctions",
         "submit": "Pacific Tracks",
     }
-    response = requests.post(url, data=form_data)
-    if response.status_code == 200:
-        return _process_pacific_tracks_data(response.text)
-    logger.warning("Failed to retrieve Pacific Tracks Data")
-    return "Failed to retrieve Pacific Tracks Data"
+    return _get_cached_tracks(
+        url,
+        lambda: get_default_transport().request(
+            "POST", url, data=form_data, timeout=timeout
+        ),
+        parse_pacific_tracks,
+        refresh,
+        "Pacific Tracks",
+        "pacific",
+    )
+
+
+def _parse_pacific_track(lines: List[str]) -> Optional[PacificTrack]:
+    track_match = _PACOTS_TRACK_PATTERN.search(lines[0])
+    if track_match is None or len(lines) < 2:
+        return None
+    validity_match = _PACOTS_VALIDITY_PATTERN.match(lines[1])
+    if validity_match is None:
+        logger.warning(f"missing validity for pacific track {track_match.group(1)}")
+        return None
+    valid_from, valid_to = (
+        datetime.strptime(timestamp, "%y%m%d%H%M").replace(tzinfo=timezone.utc)
+        for timestamp in validity_match.groups()
+    )
+
+    sections: Dict[str, List[str]] = {"FIXES": [], "RTS": [], "RMK": []}
+    current_section = "FIXES"
+    for line in lines[2:]:
+        line = line.rstrip(")")
+        for section in ("RTS", "RMK"):
+            if line.startswith(f"{section}/"):
+                current_section = section
+                line = line[len(section) + 1 :]
+        if current_section == "FIXES" and _PACOTS_FLIGHT_LEVELS_PATTERN.match(line):
+            continue
+        if line:
+            sections[current_section].append(line)
+
+    fixes = tuple(" ".join(sections["FIXES"]).split())
+    airports = tuple(
+        dict.fromkeys(
+            token
+            for route in sections["RTS"]
+            for token in route.split()
+            if _AIRPORT_PATTERN.match(token)
+        )
+    )
+    flight_levels_match = _PACOTS_FLIGHT_LEVELS_PATTERN.search(" ".join(lines[2:]))
+    flight_levels = (
+        tuple(int(level) for level in re.findall(r"\d{3}", flight_levels_match[1]))
+        if flight_levels_match
+        else ()
+    )
+
+    return PacificTrack(
+        track_id=track_match.group(1),
+        fixes=fixes,
+        valid_from=valid_from,
+        valid_to=valid_to,
+        flight_levels=flight_levels,
+        airports=airports,
+        routes=tuple(sections["RTS"]),
+    )
 
 
 def _process_pacific_tracks_data(html: str) -> str:
@@ -0,0 +1,393 @@
+import base64
+import gzip
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Protocol,
+    Tuple,
+    Union,
+)
+from urllib.parse import urlsplit
+
+import requests
+from loguru import logger
+from requests import Response
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from zc_flightplan_toolkit.metrics import MetricsRegistry, get_metrics
+
+RequestFields = Optional[Mapping[str, Union[str, int]]]
+
+_ExchangeKey = Tuple[str, str, Tuple[Tuple[str, str], ...], Tuple[Tuple[str, str], ...]]
+
+# airport codes and comma separated lists of them, collapsed in endpoint labels
+_AIRPORT_SEGMENT_PATTERN = re.compile(
+    r"(?:[A-Za-z0-9]{4}|[A-Z0-9]{3})(?:,[A-Za-z0-9]{3,4})*"
+)
+
+
+class Transport(Protocol):
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        ...
+
+
+class RequestsTransport:
+    """Live HTTP through one requests.Session, connections are pooled per host"""
+
+    def __init__(self, pool_maxsize: int = 32):
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_maxsize=pool_maxsize)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        return self._session.request(
+            method, url, params=params, data=data, headers=headers, timeout=timeout
+        )
+
+
+class ArchivedExchange(NamedTuple):
+    """One recorded request and its response, request headers are never kept"""
+
+    method: str
+    url: str
+    params: Tuple[Tuple[str, str], ...]
+    data: Tuple[Tuple[str, str], ...]
+    status_code: int
+    content_type: str
+    body: bytes
+    elapsed: float
+
+    @property
+    def key(self) -> _ExchangeKey:
+        return (self.method, self.url, self.params, self.data)
+
+
+class RecordingTransport:
+    """Passes requests to another transport and appends every exchange to an archive
+
+    The archive is gzipped JSON lines, appending to an existing archive adds to it.
+    Request headers (api keys) are not recorded.
+    """
+
+    def __init__(self, archive_path: str, transport: Optional[Transport] = None):
+        self._transport = transport or RequestsTransport()
+        self._lock = threading.Lock()
+        self._archive: IO[str] = gzip.open(archive_path, "at", encoding="utf-8")
+        self.recorded = 0
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        started_at = time.perf_counter()
+        response = self._transport.request(
+            method, url, params=params, data=data, headers=headers, timeout=timeout
+        )
+        exchange = ArchivedExchange(
+            method.upper(),
+            url,
+            _freeze_fields(params),
+            _freeze_fields(data),
+            response.status_code,
+            response.headers.get("Content-Type", ""),
+            response.content,
+            time.perf_counter() - started_at,
+        )
+        line = _dump_exchange(exchange)
+        with self._lock:
+            self._archive.write(line)
+            self.recorded += 1
+        return response
+
+    def close(self) -> None:
+        with self._lock:
+            self._archive.close()
+
+    def __enter__(self) -> "RecordingTransport":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+class MeteredTransport:
+    """Passes requests to another transport, recording each one in a metrics registry
+
+    Per host and endpoint it records request latency, requests by status, response
+    bytes, errors (non 2xx statuses and exceptions) and 429 throttling. Airport codes
+    in paths are collapsed so endpoints stay few, see endpoint_labels.
+    """
+
+    def __init__(
+        self, transport: Transport, registry: Optional[MetricsRegistry] = None
+    ):
+        self.transport = transport
+        self._registry = registry
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        registry = self._registry or get_metrics()
+        host, endpoint = endpoint_labels(url)
+        started_at = time.perf_counter()
+        try:
+            response = self.transport.request(
+                method, url, params=params, data=data, headers=headers, timeout=timeout
+            )
+        except Exception as error:
+            registry.observe(
+                "upstream_request_seconds",
+                time.perf_counter() - started_at,
+                host=host,
+                endpoint=endpoint,
+            )
+            registry.increment(
+                "upstream_errors_total",
+                host=host,
+                endpoint=endpoint,
+                error=type(error).__name__,
+            )
+            raise
+
+        registry.observe(
+            "upstream_request_seconds",
+            time.perf_counter() - started_at,
+            host=host,
+            endpoint=endpoint,
+        )
+        status = str(response.status_code)
+        registry.increment(
+            "upstream_requests_total", host=host, endpoint=endpoint, status=status
+        )
+        registry.increment(
+            "upstream_response_bytes_total",
+            _content_length(response),
+            host=host,
+            endpoint=endpoint,
+        )
+        if not response.ok:
+            registry.increment(
+                "upstream_errors_total", host=host, endpoint=endpoint, error=status
+            )
+        if response.status_code == 429:
+            registry.increment("upstream_throttled_total", host=host, endpoint=endpoint)
+        return response
+
+
+def metered(transport: Transport) -> Transport:
+    """The transport wrapped in a MeteredTransport, unless it already is one"""
+    if isinstance(transport, MeteredTransport):
+        return transport
+    return MeteredTransport(transport)
+
+
+def endpoint_labels(url: str) -> Tuple[str, str]:
+    """Host and path of a url, with airport code segments replaced by {icao}"""
+    parts = urlsplit(url)
+    path = "/".join(
+        "{icao}" if _AIRPORT_SEGMENT_PATTERN.fullmatch(segment) else segment
+        for segment in parts.path.split("/")
+    )
+    return parts.netloc, path or "/"
+
+
+class NotRecordedError(LookupError):
+    pass
+
+
+LatencyModel = Callable[[ArchivedExchange], float]
+
+
+def recorded_latency(scale: float = 1.0) -> LatencyModel:
+    """Replays the upstream latency measured while recording, scaled"""
+    return lambda exchange: exchange.elapsed * scale
+
+
+def fixed_latency(seconds: float) -> LatencyModel:
+    return lambda _: seconds
+
+
+def lognormal_sampler(
+    median: float, sigma: float = 0.5, seed: Optional[int] = None
+) -> Callable[[], float]:
+    """Latencies with the long right tail of real upstreams, median in seconds"""
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def sample() -> float:
+        with lock:
+            return median * rng.lognormvariate(0, sigma)
+
+    return sample
+
+
+def lognormal_latency(
+    median: float, sigma: float = 0.5, seed: Optional[int] = None
+) -> LatencyModel:
+    sample = lognormal_sampler(median, sigma, seed)
+    return lambda _: sample()
+
+
+class ReplayTransport:
+    """Answers requests from a recorded archive instead of the network
+
+    Requests match on method, url, query parameters and form data. A request
+    recorded several times is answered with its recordings in turn. Latency is
+    simulated with a sleep, so concurrent callers overlap as they would upstream.
+    """
+
+    def __init__(
+        self,
+        archive_path: str,
+        latency: Optional[LatencyModel] = None,
+    ):
+        self._latency = latency
+        self._lock = threading.Lock()
+        recordings: Dict[_ExchangeKey, List[ArchivedExchange]] = {}
+        for exchange in read_archive(archive_path):
+            recordings.setdefault(exchange.key, []).append(exchange)
+        self._exchanges: Dict[_ExchangeKey, Iterator[ArchivedExchange]] = {
+            key: itertools.cycle(exchanges) for key, exchanges in recordings.items()
+        }
+        self.replayed = 0
+        logger.info(f"replaying {len(self._exchanges)} recorded requests")
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        params: RequestFields = None,
+        data: RequestFields = None,
+        headers: Optional[Mapping[str, str]] = None,
+        timeout: float = 5,
+    ) -> Response:
+        key = (method.upper(), url, _freeze_fields(params), _freeze_fields(data))
+        with self._lock:
+            exchanges = self._exchanges.get(key)
+            if exchanges is None:
+                raise NotRecordedError(f"{method} {url} {params or ''} not recorded")
+            exchange = next(exchanges)
+            self.replayed += 1
+        if self._latency is not None:
+            delay = self._latency(exchange)
+            if delay > timeout:
+                time.sleep(timeout)
+                raise requests.Timeout(f"{method} {url} timed out after {timeout}s")
+            time.sleep(delay)
+        return _make_response(exchange)
+
+
+def read_archive(archive_path: str) -> Iterator[ArchivedExchange]:
+    with gzip.open(archive_path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            if line.strip():
+                yield _load_exchange(line)
+
+
+_default_transport: Transport = metered(RequestsTransport())
+
+
+def get_default_transport() -> Transport:
+    """The transport of every API client and fetcher not given one explicitly"""
+    return _default_transport
+
+
+def set_default_transport(transport: Transport) -> Transport:
+    """Replaces the default transport, returns the previous one to restore later
+
+    The new transport is metered like the one it replaces.
+    """
+    global _default_transport
+    previous_transport = _default_transport
+    _default_transport = metered(transport)
+    return previous_transport
+
+
+def _content_length(response: Response) -> int:
+    content = response.content
+    return len(content) if isinstance(content, bytes) else 0
+
+
+def _freeze_fields(fields: RequestFields) -> Tuple[Tuple[str, str], ...]:
+    return tuple(
+        sorted((str(key), str(value)) for key, value in (fields or {}).items())
+    )
+
+
+def _dump_exchange(exchange: ArchivedExchange) -> str:
+    try:
+        body, encoding = exchange.body.decode("utf-8"), "text"
+    except UnicodeDecodeError:
+        body, encoding = base64.b64encode(exchange.body).decode("ascii"), "base64"
+    record = {
+        **exchange._asdict(),
+        "body": body,
+        "body_encoding": encoding,
+        "elapsed": round(exchange.elapsed, 6),
+    }
+    return f"{json.dumps(record, separators=(',', ':'))}\n"
+
+
+def _load_exchange(line: str) -> ArchivedExchange:
+    record = json.loads(line)
+    body = record.pop("body")
+    encoding = record.pop("body_encoding", "text")
+    return ArchivedExchange(
+        **{
+            **record,
+            "params": tuple(map(tuple, record["params"])),
+            "data": tuple(map(tuple, record["data"])),
+            "body": base64.b64decode(body) if encoding == "base64" else body.encode(),
+        }
+    )
+
+
+def _make_response(exchange: ArchivedExchange) -> Response:
+    response = Response()
+    response.status_code = exchange.status_code
+    response._content = exchange.body
+    response.headers = CaseInsensitiveDict({"Content-Type": exchange.content_type})
+    response.url = exchange.url
+    response.encoding = "utf-8"
+    return response
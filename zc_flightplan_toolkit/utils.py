@@ -1,5 +1,6 @@
 from typing import Type, TypeVar
 
+import numpy as np
 import pandas as pd
 from loguru import logger
 
@@ -15,3 +16,38 @@ def get_unique_value(
     elif len(unique_values) != 1:
         logger.warning("no values, returning empty string")
     return dtype(unique_values[0]) if unique_values else dtype()
+
+
+def join_unique_values(list_column: pd.Series, separator: str = ", ") -> pd.Series:
+    """Joins the unique values of every list in a column into a categorical string
+
+    Values are sorted, rows with the same set of values share one interned category.
+    """
+    exploded = list_column.reset_index(drop=True).explode().dropna()
+    values = pd.Categorical(exploded.astype(str))
+    codes = values.codes.astype(np.int64)
+
+    value_bits = np.zeros(
+        (len(list_column), len(values.categories) // 64 + 1), dtype="<u8"
+    )
+    np.bitwise_or.at(
+        value_bits,
+        (exploded.index.to_numpy(dtype=np.int64), codes // 64),
+        np.left_shift(np.uint64(1), (codes % 64).astype(np.uint64)),
+    )
+    unique_value_bits, inverse = np.unique(value_bits, axis=0, return_inverse=True)
+
+    categories = values.categories.to_numpy()
+    labels = [
+        separator.join(
+            categories[
+                np.flatnonzero(np.unpackbits(bits.view(np.uint8), bitorder="little"))
+            ]
+        )
+        for bits in unique_value_bits
+    ]
+    return pd.Series(
+        pd.Categorical.from_codes(inverse.reshape(-1), pd.Index(labels)),
+        index=list_column.index,
+        name=list_column.name,
+    )
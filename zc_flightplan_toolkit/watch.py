@@ -0,0 +1,344 @@
+import itertools
+import re
+import threading
+import time
+from datetime import timedelta
+from enum import Enum
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Set
+
+import pandas as pd
+from loguru import logger
+
+from zc_flightplan_toolkit.api import DATISAPI, WeatherAPI
+from zc_flightplan_toolkit.constants import DATISInfo
+
+
+class WatchColumns(Enum):
+    ICAO = "icao"
+    METAR = "metar"
+    ATIS_CODE = "atis_code"
+    RUNWAYS_IN_USE = "runways_in_use"
+    DATIS = "datis"
+
+
+class WatchSource(Enum):
+    METAR = "metar"
+    DATIS = "datis"
+
+
+DEFAULT_REFRESH_INTERVALS = {
+    WatchSource.METAR: timedelta(minutes=5),
+    WatchSource.DATIS: timedelta(minutes=2),
+}
+
+SOURCE_COLUMNS = {
+    WatchSource.METAR: (WatchColumns.METAR,),
+    WatchSource.DATIS: (
+        WatchColumns.ATIS_CODE,
+        WatchColumns.RUNWAYS_IN_USE,
+        WatchColumns.DATIS,
+    ),
+}
+
+NO_METAR = "no metar found"
+
+METAR_UNAVAILABLE = "metar unavailable"
+
+_RUNWAY_GROUP = re.compile(
+    r"\bR(?:UNWAY|WY)S?\s+"
+    r"(\d{1,2}[LRC]?(?:\s*(?:,|/|&|AND|OR)\s*(?:RWY\s+)?\d{1,2}[LRC]?)*)"
+    r"(\s+(?:IS\s+|ARE\s+)?(?:CLSD|CLOSED))?"
+)
+
+_RUNWAY_IDENT = re.compile(r"\d{1,2}[LRC]?")
+
+
+def parse_runways_in_use(atis_text: str) -> str:
+    """Runway idents mentioned in an ATIS, in order of appearance
+
+    A heuristic, runways reported closed are skipped but any other mention (a taxiway
+    or crossing NOTAM for example) counts as in use.
+    """
+    runways: Dict[str, None] = {}
+    for match in _RUNWAY_GROUP.finditer(atis_text.upper()):
+        if match.group(2):
+            continue
+        for ident in _RUNWAY_IDENT.findall(match.group(1)):
+            runways[ident.zfill(3) if ident[-1].isalpha() else ident.zfill(2)] = None
+    return ", ".join(runways)
+
+
+def summarize_datis(datis_records: pd.DataFrame) -> pd.DataFrame:
+    """One row per airport from request_all_datis rows, indexed by upper case ICAO
+
+    Arrival and departure ATIS of an airport are combined, codes as "A/B".
+    """
+    columns = [col.value for col in SOURCE_COLUMNS[WatchSource.DATIS]]
+    if datis_records.empty:
+        return pd.DataFrame(columns=columns, index=pd.Index([], dtype=object))
+
+    records = datis_records.assign(
+        **{
+            DATISInfo.AIRPORT.value: datis_records[DATISInfo.AIRPORT.value]
+            .astype(str)
+            .str.upper(),
+            DATISInfo.CODE.value: datis_records[DATISInfo.CODE.value]
+            .fillna("")
+            .astype(str),
+            DATISInfo.ATIS.value: datis_records[DATISInfo.ATIS.value]
+            .fillna("")
+            .astype(str),
+        }
+    ).groupby(DATISInfo.AIRPORT.value, sort=False)
+    summary = pd.DataFrame(
+        {
+            WatchColumns.ATIS_CODE.value: records[DATISInfo.CODE.value].agg("/".join),
+            WatchColumns.DATIS.value: records[DATISInfo.ATIS.value].agg("\n".join),
+        }
+    )
+    summary[WatchColumns.RUNWAYS_IN_USE.value] = summary[WatchColumns.DATIS.value].map(
+        parse_runways_in_use
+    )
+    return summary[columns]
+
+
+class _Subscription:
+    def __init__(self, airports: List[str], callback: Callable[[pd.DataFrame], None]):
+        self.airports = airports
+        self.callback = callback
+
+
+class AirportWatchScheduler:
+    """Refreshes METAR and DATIS of watched airports on one background thread
+
+    Airports are watched through subscriptions. Each source is fetched in one batch
+    for the union of all subscribed airports once per refresh interval, so upstream
+    calls do not grow with the number of subscribers. Subscribers are called (on the
+    scheduler thread) with the rows of their airports when one of them changed.
+    """
+
+    def __init__(
+        self,
+        weather_api: WeatherAPI,
+        datis_api: DATISAPI,
+        refresh_intervals: Optional[Mapping[WatchSource, timedelta]] = None,
+        tick: timedelta = timedelta(seconds=1),
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._weather_api = weather_api
+        self._datis_api = datis_api
+        self._refresh_intervals = {
+            source: interval.total_seconds()
+            for source, interval in {
+                **DEFAULT_REFRESH_INTERVALS,
+                **(refresh_intervals or {}),
+            }.items()
+        }
+        self._tick = tick.total_seconds()
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, _Subscription] = {}
+        self._subscription_ids = itertools.count()
+        self._rows: Dict[str, Dict[str, str]] = {}
+        self._last_refreshed: Dict[WatchSource, float] = {}
+        self._datis_summary: Optional[Dict[str, Dict[str, str]]] = None
+        self.upstream_calls = {source: 0 for source in WatchSource}
+
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def watched_airports(self) -> List[str]:
+        with self._lock:
+            return self._get_watched_airports()
+
+    def subscribe(
+        self, airports: Iterable[str], callback: Callable[[pd.DataFrame], None]
+    ) -> int:
+        subscription_id = next(self._subscription_ids)
+        with self._lock:
+            self._subscriptions[subscription_id] = _Subscription([], callback)
+        self.update_subscription(subscription_id, airports)
+        return subscription_id
+
+    def update_subscription(self, subscription_id: int, airports: Iterable[str]):
+        """Changes the airports of a subscription, new airports are fetched next tick"""
+        airports = list(dict.fromkeys(airport.strip().upper() for airport in airports))
+        with self._lock:
+            subscription = self._subscriptions[subscription_id]
+            subscription.airports = [airport for airport in airports if airport]
+            for airport in subscription.airports:
+                self._rows.setdefault(airport, {WatchColumns.ICAO.value: airport})
+            self._drop_unwatched_rows()
+            snapshot = self._get_snapshot(subscription.airports)
+        subscription.callback(snapshot)
+        self._wake.set()
+
+    def unsubscribe(self, subscription_id: int) -> None:
+        with self._lock:
+            self._subscriptions.pop(subscription_id, None)
+            self._drop_unwatched_rows()
+
+    def start(self) -> None:
+        if self.is_running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="airport-watch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self) -> List[WatchSource]:
+        """Fetches the sources that are due, or have airports never fetched before"""
+        with self._lock:
+            watched_airports = self._get_watched_airports()
+            now = self._clock()
+            due_sources = [
+                source
+                for source in WatchSource
+                if now - self._last_refreshed.get(source, float("-inf"))
+                >= self._refresh_intervals[source]
+            ]
+            unfetched_airports = [
+                airport
+                for airport in watched_airports
+                if WatchColumns.METAR.value not in self._rows[airport]
+            ]
+        if not watched_airports:
+            return []
+
+        metar_airports = (
+            watched_airports if WatchSource.METAR in due_sources else unfetched_airports
+        )
+        updates: Dict[str, Dict[str, str]] = {}
+        if metar_airports:
+            metars = self._fetch_metars(metar_airports)
+            if metars is None:
+                # keep what was shown, but do not retry new airports every tick
+                metars = {airport: METAR_UNAVAILABLE for airport in unfetched_airports}
+            updates = {
+                airport: {WatchColumns.METAR.value: metar}
+                for airport, metar in metars.items()
+            }
+
+        datis_summary = self._datis_summary
+        if WatchSource.DATIS in due_sources:
+            datis_summary = self._fetch_datis_summary()
+        if datis_summary is not None:
+            for airport, datis_row in self._get_datis_rows(
+                datis_summary, watched_airports
+            ).items():
+                updates.setdefault(airport, {}).update(datis_row)
+
+        self._apply_updates(updates, due_sources, datis_summary)
+        return due_sources
+
+    def get_snapshot(self, airports: Iterable[str]) -> pd.DataFrame:
+        with self._lock:
+            return self._get_snapshot([airport.upper() for airport in airports])
+
+    def _fetch_metars(self, airports: List[str]) -> Optional[Dict[str, str]]:
+        try:
+            metars = self._weather_api.get_metars(airports)
+        except Exception as error:
+            logger.warning(f"watched metar refresh failed: {error}")
+            return None
+        finally:
+            self.upstream_calls[WatchSource.METAR] += 1
+        return {airport: metars.get(airport, NO_METAR) for airport in airports}
+
+    def _fetch_datis_summary(self) -> Optional[Dict[str, Dict[str, str]]]:
+        try:
+            datis_summary = summarize_datis(self._datis_api.request_all_datis())
+        except Exception as error:
+            logger.warning(f"watched datis refresh failed: {error}")
+            return self._datis_summary
+        finally:
+            self.upstream_calls[WatchSource.DATIS] += 1
+        return {
+            str(airport): {str(col): str(value) for col, value in row.items()}
+            for airport, row in datis_summary.to_dict("index").items()
+        }
+
+    def _get_datis_rows(
+        self, datis_summary: Dict[str, Dict[str, str]], airports: List[str]
+    ) -> Dict[str, Dict[str, str]]:
+        no_datis = {col.value: "" for col in SOURCE_COLUMNS[WatchSource.DATIS]}
+        return {airport: datis_summary.get(airport, no_datis) for airport in airports}
+
+    def _apply_updates(
+        self,
+        updates: Dict[str, Dict[str, str]],
+        refreshed_sources: List[WatchSource],
+        datis_summary: Optional[Dict[str, Dict[str, str]]],
+    ) -> None:
+        with self._lock:
+            now = self._clock()
+            for source in refreshed_sources:
+                self._last_refreshed[source] = now
+            self._datis_summary = datis_summary
+
+            changed_airports: Set[str] = set()
+            for airport, update in updates.items():
+                row = self._rows.get(airport)
+                if row is None:
+                    continue
+                if any(row.get(col) != value for col, value in update.items()):
+                    row.update(update)
+                    changed_airports.add(airport)
+
+            notifications = [
+                (subscription.callback, self._get_snapshot(subscription.airports))
+                for subscription in self._subscriptions.values()
+                if changed_airports.intersection(subscription.airports)
+            ]
+        for callback, snapshot in notifications:
+            try:
+                callback(snapshot)
+            except Exception as error:
+                logger.warning(f"airport watch subscriber failed: {error}")
+
+    def _get_watched_airports(self) -> List[str]:
+        return list(
+            dict.fromkeys(
+                airport
+                for subscription in self._subscriptions.values()
+                for airport in subscription.airports
+            )
+        )
+
+    def _drop_unwatched_rows(self) -> None:
+        watched_airports = set(self._get_watched_airports())
+        self._rows = {
+            airport: row
+            for airport, row in self._rows.items()
+            if airport in watched_airports
+        }
+
+    def _get_snapshot(self, airports: List[str]) -> pd.DataFrame:
+        return pd.DataFrame(
+            [self._rows[airport] for airport in airports],
+            columns=[col.value for col in WatchColumns],
+        ).fillna("")
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as error:
+                logger.warning(f"airport watch refresh failed: {error}")
+            self._wake.wait(self._tick)
+            self._wake.clear()